@@ -6,6 +6,7 @@ Generated by 'django-admin startproject' using Django 5.2.10.
 
 from pathlib import Path
 from datetime import timedelta
+from corsheaders.defaults import default_headers
 import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -57,6 +58,11 @@ INSTALLED_APPS = [
     'templates.apps.TemplatesConfig',
     'user.apps.UserConfig',
     'django_filters',
+
+    # Admin personnalisé (en dernier : son registre de modèles lit les hooks
+    # enregistrés par les autres apps, et ses signaux tiennent les compteurs
+    # des tableaux de bord dès le démarrage)
+    'admin_custom.apps.AdminCustomConfig',
 ]
 
 AUTH_USER_MODEL = 'user.User'
@@ -109,6 +115,10 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Requêtes conditionnelles (ETag / Last-Modified) sur le catalogue et les documents
+CORS_ALLOW_HEADERS = (*default_headers, 'if-none-match', 'if-modified-since')
+CORS_EXPOSE_HEADERS = ['ETag', 'Last-Modified']
+
 
 # Database
 DATABASES = {
@@ -119,6 +129,28 @@ DATABASES = {
 }
 
 
+# Cache partagé entre les processus (gunicorn, worker de génération) : versions
+# du catalogue, plans de validation, statistiques et menus de l'admin.
+# Définir REDIS_URL dès qu'il y a plusieurs workers (paquet `redis` requis).
+# Sans REDIS_URL, cache en mémoire de chaque processus : suffisant pour un seul
+# processus (développement), sinon une modification n'invaliderait que le cache
+# du processus qui l'a faite (avertissement document.W001). Pas de cache en
+# base : chaque lecture ferait une requête SQL, y compris pour les 304.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -255,6 +287,62 @@ LOGGING = {
 }
 
 
+# ============================================================================
+# DOCUMENT GENERATION CONFIGURATION
+# ============================================================================
+DOCUMENT_GENERATION = {
+    # Pool d'instances LibreOffice headless (par processus worker) pour les PDF
+    'LIBREOFFICE_BINARY': 'libreoffice',
+    'PDF_POOL_SIZE': 2,          # Nombre d'instances gardées au chaud
+    'PDF_POOL_MAX_JOBS': 50,     # Recyclage d'une instance après N conversions
+    'PDF_POOL_TIMEOUT': 120,     # Secondes (attente d'une instance libre / conversion)
+    'PDF_POOL_PROFILE_DIR': None,  # None = dossier temporaire du système
+    # Sans le module uno : instances unoserver à l'écoute (pip install unoserver)
+    'UNOSERVER_BINARY': 'unoserver',
+    'UNOCONVERT_BINARY': 'unoconvert',
+
+    # Génération asynchrone : POST /documents/ répond 202 et la commande
+    # `python manage.py generation_worker` génère les fichiers en arrière-plan
+    # (activable aussi par requête avec ?async=1)
+    'ASYNC': False,
+    'QUEUE_MAX_ATTEMPTS': 3,
+    'QUEUE_RETRY_BACKOFF': 30,        # Secondes, doublées à chaque nouvel essai
+    'QUEUE_VISIBILITY_TIMEOUT': 600,  # Secondes avant qu'un document bloqué soit repris
+    'QUEUE_POLL_INTERVAL': 2,         # Secondes entre deux interrogations de la file
+
+    # Génération par lot (POST /api/documents/documents/batch/)
+    'BATCH_MAX_ROWS': 5000,
+    'BATCH_WORKERS': None,            # Processus de rendu (None = nombre de CPU)
+    # Au-delà, le lot passe par la file d'attente même sans ?async=1
+    'BATCH_INLINE_MAX_ROWS': 100,
+    'BATCH_INLINE_MAX_PDF_ROWS': 10,  # Conversion PDF : plus lente
+
+    # Cache LRU des templates lus et compilés, par processus (0 = désactivé)
+    'TEMPLATE_CACHE_MAX_BYTES': 64 * 1024 * 1024,
+
+    # Plans de validation des réponses gardés dans le cache Django
+    # (invalidés par signaux à chaque modification des questions)
+    'VALIDATION_PLAN_TIMEOUT': 3600,  # Secondes
+
+    # Réponses en lecture du catalogue (catégories, templates, formulaires)
+    # gardées dans le cache Django ; toute modification du catalogue les
+    # invalide (0 = désactivé)
+    'CATALOGUE_CACHE_TIMEOUT': 3600,  # Secondes
+
+    # Synchronisation différentielle (?since=) : durée de conservation des
+    # traces de suppression (`python manage.py purge_suppressions`)
+    'SYNC_TOMBSTONE_RETENTION': 90,   # Jours
+    # Recul du curseur renvoyé, au moins la durée de la plus longue transaction
+    # d'écriture du catalogue (les objets de cette marge sont renvoyés deux fois)
+    'SYNC_CURSOR_MARGIN': 60,         # Secondes
+
+    # Import de templates en masse (POST /api/documents/templates/importer/
+    # ou `python manage.py import_templates archive.zip`)
+    'INGESTION_MAX_FILES': 500,
+    'INGESTION_MAX_FILE_BYTES': 20 * 1024 * 1024,
+}
+
+
 # ============================================================================
 # SWAGGER/API DOCUMENTATION CONFIGURATION
 # ============================================================================
@@ -100,7 +100,12 @@ class CustomAdminSite(admin.AdminSite):
         """
         Retourne la liste des applications, en excluant admin_custom
         et en ajoutant les icônes pour l'interface moderne.
+        Mise en cache par requête et par utilisateur / permissions (cf. app_list.py).
         """
+        from .app_list import get_app_list
+        return get_app_list(self, request, app_label, self._build_app_list)
+
+    def _build_app_list(self, request, app_label=None):
         app_list = super().get_app_list(request, app_label)
         
         model_icons = {
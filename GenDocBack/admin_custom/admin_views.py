@@ -1,8 +1,6 @@
 from django.contrib import admin
 from django.contrib.admin.views.decorators import staff_member_required
 from django.shortcuts import render
-from django.db.models import Sum
-from django.apps import apps
 
 from .auth_views import SESSION_INTERFACE_KEY, INTERFACE_CLASSIC, INTERFACE_MODERN
 from .autodiscover import get_all_models_for_charts, get_all_models_for_grids
@@ -47,59 +45,22 @@ def grids_view(request):
 
 
 def dashboard_view(request):
-    """Vue dashboard principal - utilise l'auto-découverte"""
-    from django.db.models import Sum, Count
-    
-    # Détecter automatiquement les modèles avec des montants
-    stats = {}
-    total_revenue = 0
-    
-    # Parcourir tous les modèles pour trouver ceux avec total_amount ou amount
-    for app_config in apps.get_app_configs():
-        # Ignorer les apps Django internes
-        if app_config.name.startswith('django.contrib'):
-            continue
-        
-        for model in app_config.get_models():
-            if model._meta.abstract or model._meta.proxy:
-                continue
-            
-            # Ignorer les modèles swappés (ex: auth.User remplacé par user.User)
-            if getattr(model._meta, 'swapped', False):
-                continue
-            
-            model_name = model.__name__.lower()
-            
-            try:
-                # Chercher des champs de montant
-                if hasattr(model, 'total_amount'):
-                    count = model.objects.count()
-                    revenue = float(model.objects.aggregate(Sum('total_amount'))['total_amount__sum'] or 0)
-                    stats[f'total_{model_name}'] = count
-                    total_revenue += revenue
-                elif hasattr(model, 'amount'):
-                    count = model.objects.count()
-                    revenue = float(model.objects.aggregate(Sum('amount'))['amount__sum'] or 0)
-                    stats[f'total_{model_name}'] = count
-                    total_revenue += revenue
-                else:
-                    # Compter simplement le nombre d'objets
-                    count = model.objects.count()
-                    if count > 0:  # Ne garder que les modèles avec des données
-                        stats[f'total_{model_name}'] = count
-            except Exception:
-                # Ignorer les modèles qui posent problème (table inexistante, etc.)
-                continue
-    
-    # Ajouter manuellement le compteur d'utilisateurs (gère le swap auth.User)
+    """Vue dashboard principal (compteurs mis en cache, cf. stats.py)"""
     from django.contrib.auth import get_user_model
-    UserModel = get_user_model()
-    try:
-        stats['total_user'] = UserModel.objects.count()
-    except Exception:
-        stats['total_user'] = 0
-    
-    stats['total_revenue'] = total_revenue
+    from .stats import amount_field, get_stats, tracked_models
+
+    data = get_stats()
+    counts = data['counts']
+    # Les modèles avec montant sont toujours affichés, les autres seulement s'ils ont des données
+    with_amount = {model.__name__.lower() for model in tracked_models() if amount_field(model)}
+    stats = {
+        f'total_{model_name}': count
+        for model_name, count in counts.items()
+        if count > 0 or model_name in with_amount
+    }
+    # Compteur d'utilisateurs (gère le swap auth.User)
+    stats['total_user'] = counts.get(get_user_model().__name__.lower(), 0)
+    stats['total_revenue'] = data['revenue']
     
     custom_admin_site = get_custom_admin_site()
     context = custom_admin_site.each_context(request)
@@ -0,0 +1,141 @@
+"""
+Cache de la liste des applications de l'admin (menu latéral, index).
+
+CustomAdminSite.get_app_list est appelé plusieurs fois par page (each_context
+de Django, each_context de l'interface moderne, puis la vue). La liste est
+gardée sur la requête, et dans le cache Django entre les requêtes sous une clé
+qui contient :
+
+- l'utilisateur et l'empreinte de ses permissions (superutilisateur, actif,
+  staff, liste des permissions) : une permission ajoutée ou retirée, même par
+  un groupe, change la clé ;
+- un numéro de version, changé quand des permissions, des groupes ou
+  l'appartenance aux groupes sont modifiés (pour les ModelAdmin dont les
+  has_*_permission ne se limitent pas aux permissions) ;
+- la langue (libellés traduits).
+
+Configuration (settings.py) :
+
+    ADMIN_CUSTOM = {
+        'APP_LIST_TTL': 300,   # secondes
+    }
+
+Le numéro de version et les listes sont dans le cache par défaut, qui doit
+être partagé entre les processus (CACHES dans settings.py) : sinon une
+modification des permissions ne serait vue que par le worker qui l'a faite.
+Comme pour stats.py, les signaux sont branchés par AdminCustomConfig.ready()
+(ou au premier appel si l'app n'est pas installée).
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.utils import translation
+from django.utils.functional import Promise
+
+DEFAULT_TTL = 300
+VERSION_KEY = 'admin_custom:app_list:version'
+APP_LIST_KEY = 'admin_custom:app_list:{version}:{site}:{user}:{fingerprint}:{language}:{app_label}'
+# Attribut de la requête qui garde les listes déjà calculées
+REQUEST_ATTR = '_admin_custom_app_list'
+
+_signals_connected = False
+
+
+def get_ttl():
+    return getattr(settings, 'ADMIN_CUSTOM', {}).get('APP_LIST_TTL', DEFAULT_TTL)
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _bump():
+    cache.set(VERSION_KEY, max(time.time_ns(), (cache.get(VERSION_KEY) or 0) + 1), None)
+
+
+def bump_version():
+    """Invalide toutes les listes en cache (maintenant, et au commit de la transaction)."""
+    _bump()
+    transaction.on_commit(_bump)
+
+
+def permissions_fingerprint(user):
+    if user.is_superuser:
+        permissions = '*'
+    else:
+        permissions = ','.join(sorted(user.get_all_permissions()))
+    raw = f'{user.is_active}|{user.is_staff}|{user.is_superuser}|{permissions}'
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def cache_key(site, request, app_label):
+    return APP_LIST_KEY.format(
+        version=get_version(),
+        site=site.name,
+        user=request.user.pk,
+        fingerprint=permissions_fingerprint(request.user),
+        language=translation.get_language(),
+        app_label=app_label or '',
+    )
+
+
+def _resolve_lazy(app_list):
+    """Traduit les libellés paresseux (gettext_lazy), que le cache ne sait pas sérialiser."""
+    def resolve(values):
+        return {key: str(value) if isinstance(value, Promise) else value for key, value in values.items()}
+    return [
+        {**resolve(app), 'models': [resolve(model) for model in app.get('models', [])]}
+        for app in app_list
+    ]
+
+
+def get_app_list(site, request, app_label, build):
+    """
+    Liste des applications pour la requête : build(request, app_label) n'est
+    appelé que si elle n'est ni sur la requête ni dans le cache.
+    """
+    connect_signals()
+    memo = request.__dict__.setdefault(REQUEST_ATTR, {})
+    memo_key = (site.name, app_label)
+    if memo_key in memo:
+        return memo[memo_key]
+
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        app_list = build(request, app_label)
+    else:
+        key = cache_key(site, request, app_label)
+        app_list = cache.get(key)
+        if app_list is None:
+            app_list = _resolve_lazy(build(request, app_label))
+            cache.set(key, app_list, get_ttl())
+    memo[memo_key] = app_list
+    return app_list
+
+
+def _on_permissions_changed(sender, **kwargs):
+    bump_version()
+
+
+def connect_signals():
+    global _signals_connected
+    if _signals_connected:
+        return
+    user_model = get_user_model()
+    for model in (Group, Permission):
+        post_save.connect(_on_permissions_changed, sender=model, dispatch_uid=f'admin_custom_app_list_save_{model.__name__}')
+        post_delete.connect(_on_permissions_changed, sender=model, dispatch_uid=f'admin_custom_app_list_delete_{model.__name__}')
+    for through in (user_model.groups.through, user_model.user_permissions.through, Group.permissions.through):
+        m2m_changed.connect(_on_permissions_changed, sender=through, dispatch_uid=f'admin_custom_app_list_m2m_{through.__name__}')
+    _signals_connected = True
@@ -25,6 +25,17 @@ class AdminCustomConfig(AppConfig):
         }
         """
         from django.conf import settings
+        from .stats import connect_signals
+        from .app_list import connect_signals as connect_app_list_signals
+        
+        # Compteurs des tableaux de bord tenus à jour par post_save / post_delete
+        connect_signals()
+        # Listes d'applications en cache invalidées quand les permissions changent
+        connect_app_list_signals()
+        
+        # Introspection des modèles faite une fois pour toutes (cf. registry.py)
+        from .registry import load
+        load()
         
         # Vérifier si l'auto-découverte est activée
         admin_custom_config = getattr(settings, 'ADMIN_CUSTOM', {})
@@ -159,61 +159,16 @@ def get_all_models_for_charts():
     """
     Retourne tous les modèles disponibles pour les graphiques.
     Utile pour l'auto-complétion dans l'interface.
+    Lu dans le registre des modèles (cf. registry.py).
     """
-    models_list = []
-    
-    for app_config in apps.get_app_configs():
-        if app_config.name.startswith('django.contrib'):
-            continue
-        
-        for model in app_config.get_models():
-            if model._meta.abstract or model._meta.proxy:
-                continue
-            
-            # Détecter les champs numériques
-            numeric_fields = []
-            for field in model._meta.get_fields():
-                if hasattr(field, 'name'):
-                    try:
-                        field_obj = model._meta.get_field(field.name)
-                        if hasattr(field_obj, 'get_internal_type'):
-                            field_type = field_obj.get_internal_type()
-                            if field_type in ['DecimalField', 'FloatField', 'IntegerField', 
-                                             'PositiveIntegerField', 'BigIntegerField', 'SmallIntegerField']:
-                                numeric_fields.append(field.name)
-                    except Exception:
-                        # Ignorer les champs qui ne peuvent pas être inspectés
-                        continue
-            
-            if numeric_fields:
-                models_list.append({
-                    'name': model.__name__,
-                    'label': model._meta.verbose_name.title(),
-                    'app': model._meta.app_label,
-                    'fields': numeric_fields,
-                })
-    
-    return models_list
+    from .registry import get_registry
+    return list(get_registry().chart_models)
 
 
 def get_all_models_for_grids():
     """
     Retourne tous les modèles disponibles pour les grilles.
+    Lu dans le registre des modèles (cf. registry.py).
     """
-    models_list = []
-    
-    for app_config in apps.get_app_configs():
-        if app_config.name.startswith('django.contrib'):
-            continue
-        
-        for model in app_config.get_models():
-            if model._meta.abstract or model._meta.proxy:
-                continue
-            
-            models_list.append({
-                'name': model.__name__,
-                'label': model._meta.verbose_name.title(),
-                'app': model._meta.app_label,
-            })
-    
-    return models_list
+    from .registry import get_registry
+    return list(get_registry().grid_models)
@@ -0,0 +1,174 @@
+"""
+Lecture paginée des données d'une grille.
+
+Seules les colonnes demandées sont lues : values() pour les champs simples,
+select_related() + only() dès qu'une colonne est une clé étrangère (affichée
+par str() de l'objet lié, sans requête supplémentaire par ligne). Les filtres
+de la DashboardGrid et le tri sont appliqués en SQL, et les pages sont lues
+par curseur (keyset) sur le couple (champ de tri, pk) : le coût d'une page ne
+dépend pas de sa position dans la table.
+
+Les champs sensibles (registry.is_sensitive) ne peuvent être ni lus, ni
+filtrés, ni triés.
+
+Le curseur est opaque pour le client : il renvoie la valeur 'next' de la
+réponse précédente dans ?cursor=.
+"""
+
+import base64
+import datetime
+import json
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, FieldError, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+from .registry import is_sensitive
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class GridError(ValueError):
+    """Paramètre de grille invalide (réponse 400)."""
+
+
+def get_page_size(value):
+    default = getattr(settings, 'ADMIN_CUSTOM', {}).get('GRID_PAGE_SIZE', DEFAULT_PAGE_SIZE)
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    if size <= 0:
+        return default
+    return min(size, MAX_PAGE_SIZE)
+
+
+def split_columns(info, columns):
+    """
+    Sépare les colonnes en champs simples et clés étrangères (cf. registry.ModelInfo).
+
+    Les colonnes qui ne sont pas des champs concrets du modèle (relations
+    inverses, many-to-many, propriétés...) ne sont pas lues et s'affichent '-'.
+    """
+    simple = [column for column in columns if column in info.plain_columns]
+    # 'categorie_id' se lit comme un champ simple, 'categorie' affiche l'objet lié
+    relations = [column for column in columns if column in info.relation_columns]
+    return simple, relations
+
+
+def get_sort_field(model_class, sort):
+    """Champ de tri et sens ('-champ' = décroissant). Par défaut : pk décroissante."""
+    if not sort:
+        return model_class._meta.pk, True
+    descending = sort.startswith('-')
+    name = sort.lstrip('-')
+    try:
+        field = model_class._meta.get_field(name)
+    except FieldDoesNotExist:
+        raise GridError(f'Champ de tri inconnu : {name}')
+    if is_sensitive(field.name):
+        raise GridError(f'Tri impossible sur : {name}')
+    if not field.concrete or field.is_relation:
+        raise GridError(f'Tri impossible sur : {name}')
+    # Un curseur ne sait pas se positionner entre des NULL
+    if field.null:
+        raise GridError(f'Tri impossible sur un champ nullable : {name}')
+    return field, descending
+
+
+def check_filters(filters):
+    """Refuse les filtres qui portent sur un champ sensible, même à travers une relation."""
+    for lookup in filters:
+        if any(is_sensitive(part) for part in lookup.split('__')):
+            raise GridError(f'Filtre invalide : {lookup}')
+
+
+def _cursor_value(value):
+    # isoformat() garde les microsecondes, que DjangoJSONEncoder tronque
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(sort_value, pk):
+    raw = json.dumps([_cursor_value(sort_value), _cursor_value(pk)], cls=DjangoJSONEncoder)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor, sort_field, pk_field):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        sort_value, pk = json.loads(raw)
+        return sort_field.to_python(sort_value), pk_field.to_python(pk)
+    except (ValueError, TypeError, UnicodeError, ValidationError):
+        raise GridError('Curseur invalide')
+
+
+def _display(value):
+    return str(value) if value is not None else None
+
+
+def get_grid_page(info, columns, filters=None, sort=None, cursor=None, page_size=None):
+    """
+    Page de données de la grille du modèle décrit par info (registry.ModelInfo) :
+
+        {'data': [{colonne: valeur}, ...], 'columns': [...], 'next': curseur ou None}
+
+    Lève GridError si les filtres, le tri ou le curseur sont invalides.
+    """
+    model_class = info.model
+    page_size = get_page_size(page_size)
+    simple, relations = split_columns(info, columns)
+    sort_field, descending = get_sort_field(model_class, sort)
+    pk_field = model_class._meta.pk
+    sort_name, pk_name = sort_field.attname, pk_field.attname
+
+    queryset = model_class._default_manager.all()
+    if filters:
+        check_filters(filters)
+        try:
+            queryset = queryset.filter(**filters)
+        except (FieldError, ValidationError, ValueError, TypeError) as e:
+            raise GridError(f'Filtre invalide : {e}')
+
+    prefix = '-' if descending else ''
+    order = [f'{prefix}{sort_name}']
+    if sort_field != pk_field:
+        order.append(f'{prefix}{pk_name}')
+    queryset = queryset.order_by(*order)
+
+    if cursor:
+        sort_value, pk_value = decode_cursor(cursor, sort_field, pk_field)
+        lookup = 'lt' if descending else 'gt'
+        condition = Q(**{f'{pk_name}__{lookup}': pk_value})
+        if sort_field != pk_field:
+            condition = Q(**{f'{sort_name}__{lookup}': sort_value}) | (Q(**{sort_name: sort_value}) & condition)
+        queryset = queryset.filter(condition)
+
+    if relations:
+        # Objets liés chargés par jointure, sans les champs non demandés
+        queryset = queryset.select_related(*relations).only(pk_name, sort_name, *simple, *relations)
+        rows = [
+            {
+                **{column: getattr(obj, column) for column in simple + relations},
+                pk_name: obj.pk,
+                sort_name: getattr(obj, sort_name),
+            }
+            for obj in queryset[:page_size + 1]
+        ]
+    else:
+        rows = list(queryset.values(*dict.fromkeys([pk_name, sort_name, *simple]))[:page_size + 1])
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(last[sort_name], last[pk_name])
+
+    data = [
+        {column: _display(row[column]) if column in row else '-' for column in columns}
+        for row in rows
+    ]
+    return {'data': data, 'columns': columns, 'next': next_cursor}
@@ -25,6 +25,10 @@ class HookRegistry:
         if hook_name not in self._hooks:
             self._hooks[hook_name] = []
         self._hooks[hook_name].append(callback)
+        if hook_name in (HOOK_NAMES['CUSTOM_CHART_MODELS'], HOOK_NAMES['CUSTOM_GRID_MODELS']):
+            # Le registre des modèles lit ces hooks : il sera reconstruit au prochain accès
+            from .registry import reset
+            reset()
     
     def call(self, hook_name: str, *args, **kwargs) -> List[Any]:
         """
@@ -41,19 +41,16 @@ def modern_dashboard(request):
     if redirect_check:
         return redirect_check
 
-    # Stats adaptées au projet GenDoc
-    from .views import get_model_class
-    document_model = get_model_class('DocumentGenere')
-    template_model = get_model_class('TemplateDocument')
-    formulaire_model = get_model_class('Formulaire')
+    # Stats adaptées au projet GenDoc (compteurs mis en cache, cf. stats.py)
+    from .stats import get_stats
     from django.contrib.auth import get_user_model
-    UserModel = get_user_model()
+    counts = get_stats()['counts']
 
     stats = {
-        'documents': document_model.objects.count() if document_model else 0,
-        'templates': template_model.objects.count() if template_model else 0,
-        'formulaires': formulaire_model.objects.count() if formulaire_model else 0,
-        'users': UserModel.objects.count(),
+        'documents': counts.get('documentgenere', 0),
+        'templates': counts.get('templatedocument', 0),
+        'formulaires': counts.get('formulaire', 0),
+        'users': counts.get(get_user_model().__name__.lower(), 0),
     }
 
     context = _get_modern_context(request, {
@@ -0,0 +1,214 @@
+"""
+Registre des modèles utilisés par les graphiques et les grilles.
+
+L'introspection (recherche d'un modèle par son nom, champs numériques, champs
+date, colonnes affichables) est faite une seule fois, dans
+AdminCustomConfig.ready(), ou au premier accès quand admin_custom n'est pas
+dans INSTALLED_APPS. Le registre est immuable : les vues le lisent sans
+verrou.
+
+Les hooks CUSTOM_CHART_MODELS et CUSTOM_GRID_MODELS le complètent. Chaque
+callback retourne une liste de dictionnaires :
+
+    {'name': 'MyModel', 'label': 'Mon Modèle'}                # modèle du projet
+    {'model': Group, 'fields': ['id'], 'columns': ['name']}   # n'importe quel modèle
+
+'fields' remplace les champs proposés pour les graphiques, 'columns' les
+colonnes proposées pour les grilles. Enregistrer un de ces hooks après la
+construction du registre le fait reconstruire au prochain accès.
+
+Les champs sensibles (mot de passe...) ne sont jamais proposés ni lus par les
+API ; la liste se complète dans settings.py :
+
+    ADMIN_CUSTOM = {
+        'SENSITIVE_FIELDS': ['token'],
+    }
+"""
+
+import logging
+from types import MappingProxyType
+from typing import NamedTuple, Optional
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from .hooks import HOOK_NAMES, call_hook
+
+logger = logging.getLogger(__name__)
+
+NUMERIC_TYPES = frozenset({
+    'DecimalField', 'FloatField', 'IntegerField',
+    'PositiveIntegerField', 'BigIntegerField', 'SmallIntegerField',
+})
+DATE_TYPES = frozenset({'DateTimeField', 'DateField'})
+SENSITIVE_FIELDS = frozenset({'password'})
+
+
+def is_sensitive(name):
+    """Champ jamais exposé par les graphiques et les grilles (nom du champ ou de sa colonne)."""
+    extra = getattr(settings, 'ADMIN_CUSTOM', {}).get('SENSITIVE_FIELDS', ())
+    return name in SENSITIVE_FIELDS or name in extra
+
+
+class ModelInfo(NamedTuple):
+    model: type
+    name: str
+    label: str
+    app: str
+    # Champs proposés pour les graphiques
+    numeric_fields: tuple
+    # Premier DateTimeField : axe des graphiques (None s'il n'y en a pas)
+    date_field: Optional[str]
+    date_fields: tuple
+    # Colonnes proposées pour les grilles
+    grid_columns: tuple
+    # Colonnes lisibles par values() / affichées par l'objet lié (clés étrangères)
+    plain_columns: frozenset
+    relation_columns: frozenset
+
+    def as_choice(self, **extra):
+        return MappingProxyType({'name': self.name, 'label': self.label, 'app': self.app, **extra})
+
+
+def inspect_model(model):
+    numeric, dates, columns, plain, relations = [], [], [], set(), set()
+    date_field = None
+    for field in model._meta.get_fields():
+        if not field.concrete or field.many_to_many or is_sensitive(field.name):
+            continue
+        columns.append(field.name)
+        if field.is_relation:
+            relations.add(field.name)
+            # 'categorie_id' se lit comme une valeur simple
+            plain.add(field.attname)
+            continue
+        plain.add(field.name)
+        field_type = field.get_internal_type()
+        if field_type in NUMERIC_TYPES:
+            numeric.append(field.name)
+        elif field_type in DATE_TYPES:
+            dates.append(field.name)
+            if date_field is None and field_type == 'DateTimeField':
+                date_field = field.name
+    return ModelInfo(
+        model=model,
+        name=model.__name__,
+        label=model._meta.verbose_name.title(),
+        app=model._meta.app_label,
+        numeric_fields=tuple(numeric),
+        date_field=date_field,
+        date_fields=tuple(dates),
+        grid_columns=tuple(columns),
+        plain_columns=frozenset(plain),
+        relation_columns=frozenset(relations),
+    )
+
+
+class ModelRegistry:
+    """Registre immuable : nom → ModelInfo, et modèles proposés aux graphiques et grilles."""
+
+    def __init__(self, by_name, chart_models, grid_models):
+        self._by_name = MappingProxyType(dict(by_name))
+        self.chart_models = tuple(chart_models)
+        self.grid_models = tuple(grid_models)
+        self._grid_keys = frozenset((choice['app'], choice['name']) for choice in self.grid_models)
+
+    def get(self, name):
+        """ModelInfo d'un modèle ('DocumentGenere', 'document.DocumentGenere', 'user'...), ou None."""
+        if not name:
+            return None
+        return self._by_name.get(name.lower())
+
+    def get_grid(self, name):
+        """ModelInfo d'un modèle proposé aux grilles, ou None (modèles de django.contrib...)."""
+        info = self.get(name)
+        if info is None or (info.app, info.name) not in self._grid_keys:
+            return None
+        return info
+
+    def get_model(self, name):
+        info = self.get(name)
+        return info.model if info else None
+
+
+def _hook_entries(hook_name):
+    for result in call_hook(HOOK_NAMES[hook_name]):
+        for entry in result or ():
+            yield entry
+
+
+def _resolve(entry, by_name):
+    """ModelInfo désigné par une entrée de hook ('model', ou 'name' et éventuellement 'app')."""
+    model = entry.get('model')
+    if model is not None:
+        return inspect_model(model)
+    name = entry.get('name', '')
+    if entry.get('app'):
+        name = f"{entry['app']}.{name}"
+    return by_name.get(name.lower())
+
+
+def _apply_hook(hook_name, choices, by_name, extra_key, info_attr):
+    for entry in _hook_entries(hook_name):
+        info = _resolve(entry, by_name)
+        if info is None:
+            logger.warning(f"Hook {HOOK_NAMES[hook_name]} : modèle introuvable {entry!r}")
+            continue
+        if extra_key in entry:
+            info = info._replace(**{info_attr: tuple(entry[extra_key])})
+        # Un modèle fourni par hook devient accessible aux API, sous ses deux noms
+        by_name[info.name.lower()] = info
+        by_name[f'{info.app}.{info.name}'.lower()] = info
+        choices[(info.app, info.name)] = info.as_choice(
+            label=entry.get('label', info.label), **{extra_key: getattr(info, info_attr)}
+        )
+
+
+def build_registry():
+    by_name = {}
+    chart_choices = {}
+    grid_choices = {}
+    for app_config in apps.get_app_configs():
+        project_app = not app_config.name.startswith('django.contrib')
+        for model in app_config.get_models():
+            # Ignorer les modèles swappés (ex: auth.User remplacé par user.User)
+            if getattr(model._meta, 'swapped', False):
+                continue
+            info = inspect_model(model)
+            # Le premier modèle trouvé garde le nom court, comme apps.get_app_configs()
+            by_name.setdefault(info.name.lower(), info)
+            by_name[model._meta.label_lower] = info
+            if not project_app or model._meta.proxy:
+                continue
+            if info.numeric_fields:
+                chart_choices[(info.app, info.name)] = info.as_choice(fields=info.numeric_fields)
+            grid_choices[(info.app, info.name)] = info.as_choice(columns=info.grid_columns)
+    # 'user' désigne toujours le modèle utilisateur du projet
+    by_name['user'] = by_name[get_user_model()._meta.label_lower]
+
+    _apply_hook('CUSTOM_CHART_MODELS', chart_choices, by_name, 'fields', 'numeric_fields')
+    _apply_hook('CUSTOM_GRID_MODELS', grid_choices, by_name, 'columns', 'grid_columns')
+    return ModelRegistry(by_name, chart_choices.values(), grid_choices.values())
+
+
+_registry = None
+
+
+def load():
+    """Construit le registre (appelé par AdminCustomConfig.ready())."""
+    global _registry
+    _registry = build_registry()
+    return _registry
+
+
+def get_registry():
+    if _registry is None:
+        return load()
+    return _registry
+
+
+def reset():
+    """Oublie le registre : il sera reconstruit au prochain accès."""
+    global _registry
+    _registry = None
@@ -0,0 +1,178 @@
+"""
+Statistiques des tableaux de bord, mises en cache.
+
+Le nombre d'objets de chaque modèle est gardé dans le cache Django (une clé
+par modèle, lues en une fois avec get_many) : post_save / post_delete
+l'incrémentent ou le décrémentent après le commit, et chaque compteur est
+recalculé par un COUNT(*) au plus toutes les STATS_TTL secondes. Les
+opérations qui n'émettent pas de signaux (bulk_create, update, delete en masse
+sur un queryset sans cascade...) ne faussent donc les chiffres que jusqu'à
+l'expiration. Les revenus (somme de total_amount ou amount) ne peuvent pas être
+suivis par les signaux : ils sont seulement recalculés après STATS_TTL.
+
+Configuration (settings.py) :
+
+    ADMIN_CUSTOM = {
+        'STATS_TTL': 300,   # secondes
+    }
+
+Les compteurs sont dans le cache par défaut, qui doit être partagé entre les
+processus (CACHES dans settings.py). Avec le cache en base, incr() n'est pas
+atomique : deux créations simultanées peuvent n'en compter qu'une, jusqu'au
+recalcul suivant.
+
+Les signaux sont branchés par AdminCustomConfig.ready() ; dans un projet où
+admin_custom n'est pas dans INSTALLED_APPS, ils le sont au premier appel de
+get_stats() et les modifications antérieures ne sont prises en compte qu'au
+recalcul.
+"""
+
+from functools import lru_cache
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from django.db.models import Sum
+from django.db.models.signals import post_delete, post_save
+
+DEFAULT_TTL = 300
+COUNT_KEY = 'admin_custom:stats:count:{label}'
+REVENUE_KEY = 'admin_custom:stats:revenue'
+# Champs de montant reconnus, par ordre de priorité
+AMOUNT_FIELDS = ('total_amount', 'amount')
+
+_signals_connected = False
+
+
+def get_ttl():
+    return getattr(settings, 'ADMIN_CUSTOM', {}).get('STATS_TTL', DEFAULT_TTL)
+
+
+@lru_cache(maxsize=None)
+def tracked_models():
+    """Modèles concrets du projet (hors django.contrib), plus le modèle utilisateur."""
+    models = []
+    for app_config in apps.get_app_configs():
+        if app_config.name.startswith('django.contrib'):
+            continue
+        for model in app_config.get_models():
+            if model._meta.proxy or getattr(model._meta, 'swapped', False):
+                continue
+            models.append(model)
+    user_model = get_user_model()
+    if user_model not in models:
+        models.append(user_model)
+    return tuple(models)
+
+
+def amount_field(model):
+    for name in AMOUNT_FIELDS:
+        if hasattr(model, name):
+            return name
+    return None
+
+
+def _count_key(model):
+    return COUNT_KEY.format(label=model._meta.label_lower)
+
+
+def _is_tracked(model):
+    if model._meta.proxy:
+        model = model._meta.concrete_model
+    return model in tracked_models()
+
+
+def _adjust(model, delta):
+    key = _count_key(model)
+
+    def apply():
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            # Compteur absent ou expiré : il sera recalculé à la prochaine lecture
+            pass
+
+    transaction.on_commit(apply)
+
+
+def _on_save(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and _is_tracked(sender):
+        _adjust(sender._meta.concrete_model, 1)
+
+
+def _on_delete(sender, instance, **kwargs):
+    if _is_tracked(sender):
+        _adjust(sender._meta.concrete_model, -1)
+
+
+def connect_signals():
+    global _signals_connected
+    if _signals_connected:
+        return
+    post_save.connect(_on_save, dispatch_uid='admin_custom_stats_save')
+    post_delete.connect(_on_delete, dispatch_uid='admin_custom_stats_delete')
+    _signals_connected = True
+
+
+def get_counts(models):
+    """Nombre d'objets de chaque modèle : {modèle: nombre}, None si la table est illisible."""
+    keys = {_count_key(model): model for model in models}
+    cached = cache.get_many(keys)
+    counts = {}
+    missing = {}
+    for key, model in keys.items():
+        if key in cached:
+            counts[model] = cached[key]
+            continue
+        try:
+            counts[model] = missing[key] = model._default_manager.count()
+        except DatabaseError:
+            # Table inexistante (migration non appliquée...)
+            counts[model] = None
+    if missing:
+        cache.set_many(missing, get_ttl())
+    return counts
+
+
+def get_revenue(models):
+    revenue = cache.get(REVENUE_KEY)
+    if revenue is not None:
+        return revenue
+    revenue = 0.0
+    for model in models:
+        field = amount_field(model)
+        if field is None:
+            continue
+        try:
+            revenue += float(model._default_manager.aggregate(total=Sum(field))['total'] or 0)
+        except DatabaseError:
+            continue
+    cache.set(REVENUE_KEY, revenue, get_ttl())
+    return revenue
+
+
+def get_stats():
+    """
+    Statistiques de tous les modèles suivis :
+
+        {'counts': {'documentgenere': 120, ...}, 'revenue': 0.0}
+
+    Les clés sont les noms de classe en minuscules ; un modèle dont la table est
+    illisible est absent.
+    """
+    connect_signals()
+    models = tracked_models()
+    counts = get_counts(models)
+    return {
+        'counts': {
+            model.__name__.lower(): count for model, count in counts.items() if count is not None
+        },
+        'revenue': get_revenue(models),
+    }
+
+
+def clear():
+    """Vide le cache des statistiques (recalcul complet à la prochaine lecture)."""
+    cache.delete_many([_count_key(model) for model in tracked_models()] + [REVENUE_KEY])
@@ -0,0 +1,86 @@
+"""
+Tests du cache de la liste des applications de l'admin (app_list.py).
+"""
+
+from unittest.mock import patch
+
+from django.contrib.auth.models import AnonymousUser, Group, Permission
+from django.core.cache import cache, caches
+from django.test import RequestFactory, TestCase
+
+from document.models import Formulaire, TemplateDocument
+from user.models import User
+
+from . import app_list
+from .admin_site import CustomAdminSite
+
+
+class AppListCacheTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        # Site nommé 'admin' pour que les URL de l'admin par défaut se résolvent
+        self.site = CustomAdminSite()
+        for model in (TemplateDocument, Formulaire):
+            self.site.register(model)
+        self.user = User.objects.create_user(email='staff@example.com', password='secret', is_staff=True)
+        self.group = Group.objects.create(name='Rédacteurs')
+        self.group.permissions.add(Permission.objects.get(codename='view_templatedocument'))
+        self.user.groups.add(self.group)
+        self.build = patch.object(CustomAdminSite, '_build_app_list', autospec=True,
+                                  side_effect=CustomAdminSite._build_app_list)
+
+    def _request(self):
+        request = RequestFactory().get('/admin/')
+        # Nouvel objet : pas de cache de permissions d'une requête précédente
+        request.user = User.objects.get(pk=self.user.pk)
+        return request
+
+    def _models(self, app_list_):
+        return [model['object_name'] for app in app_list_ for model in app['models']]
+
+    def test_built_once_per_request(self):
+        request = self._request()
+        request.session = {}
+        with self.build as build:
+            first = self.site.get_app_list(request)
+            self.assertIs(self.site.get_app_list(request), first)
+            # each_context de Django (available_apps) réutilise la même liste
+            self.assertIs(self.site.each_context(request)['available_apps'], first)
+        self.assertEqual(build.call_count, 1)
+        self.assertEqual(self._models(first), ['TemplateDocument'])
+
+    def test_cache_hit_on_next_request(self):
+        self.site.get_app_list(self._request())
+        with self.build as build:
+            app_list_ = self.site.get_app_list(self._request())
+        build.assert_not_called()
+        self.assertEqual(self._models(app_list_), ['TemplateDocument'])
+
+    def test_permission_change_gives_new_key(self):
+        key = app_list.cache_key(self.site, self._request(), None)
+        self.site.get_app_list(self._request())
+
+        self.group.permissions.add(Permission.objects.get(codename='view_formulaire'))
+        self.assertNotEqual(app_list.cache_key(self.site, self._request(), None), key)
+        self.assertEqual(self._models(self.site.get_app_list(self._request())), ['Formulaire', 'TemplateDocument'])
+
+        self.user.groups.remove(self.group)
+        self.assertEqual(self.site.get_app_list(self._request()), [])
+
+    def test_group_change_bumps_shared_version(self):
+        autre_worker = caches.create_connection('default')
+        version = app_list.get_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.name = 'Éditeurs'
+            self.group.save()
+        self.assertGreater(autre_worker.get(app_list.VERSION_KEY), version)
+
+    def test_anonymous_bypasses_cache(self):
+        request = RequestFactory().get('/admin/')
+        request.user = AnonymousUser()
+        with patch.object(app_list, 'cache') as cache_mock, self.build as build:
+            self.assertEqual(self.site.get_app_list(request), [])
+        build.assert_called_once()
+        cache_mock.get.assert_not_called()
+        cache_mock.set.assert_not_called()
@@ -0,0 +1,113 @@
+"""
+Tests de l'API des graphiques (views.chart_data, views.get_periods).
+"""
+
+import json
+from datetime import date, datetime
+from unittest.mock import patch
+
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from document.models import DocumentGenere, TemplateDocument
+from document.testing import LOCAL_CACHES
+from user.models import User
+
+from . import views
+
+# Un mercredi
+TODAY = date(2026, 3, 18)
+
+
+def aware(*args):
+    return timezone.make_aware(datetime(*args))
+
+
+class PeriodsTestCase(TestCase):
+
+    def test_calendar_alignment(self):
+        cases = {
+            'day': (aware(2026, 3, 16), aware(2026, 3, 18), '18/03'),
+            'week': (aware(2026, 3, 2), aware(2026, 3, 16), 'Sem 12'),
+            'month': (aware(2026, 1, 1), aware(2026, 3, 1), '03/2026'),
+            'quarter': (aware(2025, 7, 1), aware(2026, 1, 1), 'T1 2026'),
+            'year': (aware(2024, 1, 1), aware(2026, 1, 1), '2026'),
+        }
+        for frequency, (first, last, label) in cases.items():
+            with self.subTest(frequency=frequency):
+                starts, labels = views.get_periods(frequency, 3, TODAY)
+                self.assertEqual((starts[0], starts[-1], labels[-1]), (first, last, label))
+                self.assertEqual(starts, sorted(starts))
+                self.assertEqual(len(starts), len(labels))
+
+    def test_weeks_start_on_monday(self):
+        starts, _ = views.get_periods('week', 12, TODAY)
+        self.assertEqual({start.weekday() for start in starts}, {0})
+
+    def test_months_cross_year_boundary(self):
+        starts, labels = views.get_periods('month', 12, date(2026, 1, 31))
+        self.assertEqual(starts[0], aware(2025, 2, 1))
+        self.assertEqual(labels[:2], ['02/2025', '03/2025'])
+        self.assertEqual({start.day for start in starts}, {1})
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class ChartDataTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(email='staff@example.com', password='secret', is_staff=True)
+        cls.template = TemplateDocument.objects.create(nom='Contrat', fichier='templates/test.docx')
+        # Deux modèles en mars, un en janvier, un trop ancien pour la série
+        autres = TemplateDocument.objects.bulk_create([
+            TemplateDocument(nom=f'T{i}', fichier='templates/test.docx') for i in range(3)
+        ])
+        TemplateDocument.objects.filter(pk=cls.template.pk).update(date_add=aware(2026, 3, 2, 10))
+        TemplateDocument.objects.filter(pk=autres[0].pk).update(date_add=aware(2026, 3, 17, 23, 59))
+        TemplateDocument.objects.filter(pk=autres[1].pk).update(date_add=aware(2026, 1, 1))
+        TemplateDocument.objects.filter(pk=autres[2].pk).update(date_add=aware(2020, 6, 1))
+        documents = DocumentGenere.objects.bulk_create([
+            DocumentGenere(template=cls.template, format='docx', tentatives=tentatives)
+            for tentatives in (2, 3, 5)
+        ])
+        DocumentGenere.objects.filter(pk__in=[documents[0].pk, documents[1].pk]).update(date_generation=aware(2026, 2, 10))
+        DocumentGenere.objects.filter(pk=documents[2].pk).update(date_generation=aware(2026, 3, 1))
+
+    def _get(self, **params):
+        request = RequestFactory().get('/admin_custom/api/chart-data/', params)
+        request.user = self.staff
+        with patch.object(views.timezone, 'localdate', return_value=TODAY):
+            response = views.chart_data(request)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def _json(self, response):
+        return json.loads(response.content)
+
+    def test_one_query_per_frequency(self):
+        for frequency, (periods, _) in views.FREQUENCIES.items():
+            with self.subTest(frequency=frequency), self.assertNumQueries(1):
+                result = self._json(self._get(model='TemplateDocument', field='id', operation='count', frequency=frequency))
+            self.assertEqual(len(result['data']), periods)
+            self.assertEqual(len(result['labels']), periods)
+
+    def test_empty_periods_filled_with_zero(self):
+        result = self._json(self._get(model='TemplateDocument', field='id', operation='count', frequency='month'))
+        self.assertEqual(result['labels'][-3:], ['01/2026', '02/2026', '03/2026'])
+        self.assertEqual(result['data'], [0] * 9 + [1, 0, 2])
+
+        result = self._json(self._get(model='DocumentGenere', field='tentatives', operation='sum', frequency='month'))
+        self.assertEqual(result['data'], [0.0] * 10 + [5.0, 5.0])
+
+    def test_week_and_day_buckets(self):
+        result = self._json(self._get(model='TemplateDocument', field='id', operation='count', frequency='week'))
+        # Semaines du lundi 2 mars et du lundi 16 mars
+        self.assertEqual(result['data'][-3:], [1, 0, 1])
+        result = self._json(self._get(model='TemplateDocument', field='id', operation='count', frequency='day'))
+        self.assertEqual(result['data'][-2:], [1, 0])
+        self.assertEqual(sum(result['data']), 2)
+
+    def test_year_bucket(self):
+        result = self._json(self._get(model='TemplateDocument', field='id', operation='count', frequency='year'))
+        self.assertEqual(result['labels'], ['2022', '2023', '2024', '2025', '2026'])
+        self.assertEqual(result['data'], [0, 0, 0, 0, 3])
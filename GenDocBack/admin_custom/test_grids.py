@@ -0,0 +1,117 @@
+"""
+Tests de l'API des grilles (views.grid_data, grids.py).
+"""
+
+from django.test import TestCase, override_settings
+
+from document.models import CategorieTemplate, TemplateDocument
+from document.testing import LOCAL_CACHES
+from user.models import User
+
+from .grids import decode_cursor, encode_cursor
+from .models import DashboardGrid
+
+GRID_URL = '/admin_custom/api/grid-data/'
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class GridApiTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(email='staff@example.com', password='secret', is_staff=True)
+        cls.categorie = CategorieTemplate.objects.create(nom='Juridique')
+        for i in range(5):
+            TemplateDocument.objects.create(
+                nom=f'Modèle {i}', fichier='templates/test.docx',
+                categorie=cls.categorie if i % 2 else None,
+            )
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+
+    def _get(self, **params):
+        return self.client.get(GRID_URL, params)
+
+    def test_anonymous_rejected(self):
+        self.client.logout()
+        urls = [
+            GRID_URL + '?model=user&columns=email&columns=password',
+            '/admin_custom/api/chart-data/?model=DocumentGenere&field=id&operation=count',
+            '/admin_custom/api/stats/',
+            '/admin_custom/api/model-fields/?model=user',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 302)
+                self.assertIn('/admin/login/', response['Location'])
+
+    def test_non_staff_rejected(self):
+        User.objects.create_user(email='client@example.com', password='secret')
+        self.client.login(email='client@example.com', password='secret')
+        self.assertEqual(self._get(model='user', columns='email').status_code, 302)
+
+    def test_password_never_returned(self):
+        response = self._get(model='user', columns=['email', 'password'])
+        self.assertEqual(response.status_code, 200)
+        for row in response.json()['data']:
+            self.assertEqual(row['password'], '-')
+        self.assertNotIn(self.staff.password, response.content.decode())
+
+        self.assertEqual(self._get(model='user', columns='email', sort='password').status_code, 400)
+        grid = DashboardGrid.objects.create(name='Fuite', model_name='user', columns=['email'],
+                                            filters={'password__startswith': 'pbkdf2'})
+        self.assertEqual(self._get(grid_id=grid.pk).status_code, 400)
+
+    def test_only_grid_models(self):
+        # Modèle de django.contrib : résolu par le registre mais pas proposé aux grilles
+        response = self._get(model='auth.Permission', columns='codename')
+        self.assertEqual(response.status_code, 400)
+
+    def test_cursor_round_trip(self):
+        template = TemplateDocument.objects.first()
+        sort_field = TemplateDocument._meta.get_field('date_add')
+        pk_field = TemplateDocument._meta.pk
+        cursor = encode_cursor(template.date_add, template.pk)
+        self.assertEqual(decode_cursor(cursor, sort_field, pk_field), (template.date_add, template.pk))
+
+        noms = []
+        cursor = None
+        while True:
+            params = {'model': 'TemplateDocument', 'columns': 'nom', 'sort': 'date_add', 'page_size': 2}
+            if cursor:
+                params['cursor'] = cursor
+            page = self._get(**params).json()
+            noms += [row['nom'] for row in page['data']]
+            cursor = page['next']
+            if not cursor:
+                break
+        self.assertEqual(noms, [f'Modèle {i}' for i in range(5)])
+
+        self.assertEqual(self._get(model='TemplateDocument', columns='nom', cursor='pas-un-curseur').status_code, 400)
+
+    def test_sort_order(self):
+        page = self._get(model='TemplateDocument', columns='nom').json()
+        # Par défaut : pk décroissante
+        self.assertEqual([row['nom'] for row in page['data']], [f'Modèle {i}' for i in reversed(range(5))])
+
+        page = self._get(model='TemplateDocument', columns='nom', sort='-nom').json()
+        self.assertEqual([row['nom'] for row in page['data']], sorted((f'Modèle {i}' for i in range(5)), reverse=True))
+
+        self.assertEqual(self._get(model='TemplateDocument', columns='nom', sort='categorie').status_code, 400)
+
+    def test_saved_grid_filters(self):
+        grid = DashboardGrid.objects.create(
+            name='Juridique', model_name='TemplateDocument',
+            columns=['nom', 'categorie'], filters={'categorie__nom': 'Juridique'},
+        )
+        page = self._get(grid_id=grid.pk, sort='nom').json()
+        self.assertEqual(page['data'], [
+            {'nom': 'Modèle 1', 'categorie': 'Juridique'},
+            {'nom': 'Modèle 3', 'categorie': 'Juridique'},
+        ])
+
+        grid.filters = {'champ_inconnu': 1}
+        grid.save()
+        self.assertEqual(self._get(grid_id=grid.pk).status_code, 400)
@@ -0,0 +1,104 @@
+"""
+Tests du registre des modèles des graphiques et des grilles (registry.py).
+"""
+
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.test import SimpleTestCase
+
+from document.models import DocumentGenere, TemplateDocument
+
+from . import registry
+from .hooks import HOOK_NAMES, hooks, register_hook
+
+
+class RegistryLookupTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.registry = registry.get_registry()
+
+    def test_short_and_qualified_names(self):
+        for name in ('DocumentGenere', 'documentgenere', 'document.DocumentGenere', 'document.documentgenere'):
+            with self.subTest(name=name):
+                self.assertIs(self.registry.get_model(name), DocumentGenere)
+        self.assertIsNone(self.registry.get('Inconnu'))
+        self.assertIsNone(self.registry.get(''))
+        self.assertIsNone(self.registry.get(None))
+
+    def test_user_alias(self):
+        self.assertIs(self.registry.get_model('user'), get_user_model())
+        self.assertIs(self.registry.get('user'), self.registry.get(get_user_model()._meta.label))
+        # auth.User est remplacé par user.User : il n'est pas dans le registre
+        self.assertIsNone(self.registry.get('auth.User'))
+
+    def test_sensitive_fields_hidden(self):
+        info = self.registry.get('user')
+        self.assertNotIn('password', info.grid_columns)
+        self.assertNotIn('password', info.plain_columns)
+
+    def test_grid_models_only_project_models(self):
+        self.assertIsNotNone(self.registry.get_grid('TemplateDocument'))
+        self.assertIsNotNone(self.registry.get('auth.Group'))
+        self.assertIsNone(self.registry.get_grid('auth.Group'))
+
+    def test_immutable(self):
+        self.assertIsInstance(self.registry.chart_models, tuple)
+        self.assertIsInstance(self.registry.grid_models, tuple)
+        choice = self.registry.grid_models[0]
+        with self.assertRaises(TypeError):
+            choice['label'] = 'Modifié'
+        with self.assertRaises(TypeError):
+            self.registry._by_name['autre'] = None
+        with self.assertRaises(AttributeError):
+            self.registry.get('TemplateDocument').name = 'Autre'
+
+
+class RegistryHooksTestCase(SimpleTestCase):
+
+    def setUp(self):
+        # Hooks isolés : ceux du projet sont restaurés après le test
+        patcher = patch.object(hooks, '_hooks', {})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(registry.reset)
+        registry.load()
+
+    def test_register_resets_registry(self):
+        avant = registry.get_registry()
+        register_hook(HOOK_NAMES['CUSTOM_GRID_MODELS'], lambda: [])
+        self.assertIsNone(registry._registry)
+        self.assertIsNot(registry.get_registry(), avant)
+
+    def test_other_hooks_keep_registry(self):
+        avant = registry.get_registry()
+        register_hook(HOOK_NAMES['CUSTOM_THEMES'], lambda: [])
+        self.assertIs(registry.get_registry(), avant)
+
+    def test_grid_hook_adds_model_with_columns(self):
+        register_hook(HOOK_NAMES['CUSTOM_GRID_MODELS'], lambda: [
+            {'model': Group, 'label': 'Groupes', 'columns': ['name']},
+        ])
+        info = registry.get_registry().get_grid('auth.Group')
+        self.assertIs(info.model, Group)
+        self.assertEqual(info.grid_columns, ('name',))
+        choice = next(choice for choice in registry.get_registry().grid_models if choice['name'] == 'Group')
+        self.assertEqual(dict(choice), {'name': 'Group', 'label': 'Groupes', 'app': 'auth', 'columns': ('name',)})
+
+    def test_chart_hook_overrides_fields(self):
+        register_hook(HOOK_NAMES['CUSTOM_CHART_MODELS'], lambda: [
+            {'name': 'TemplateDocument', 'app': 'document', 'label': 'Modèles', 'fields': ['id']},
+        ])
+        info = registry.get_registry().get('TemplateDocument')
+        self.assertIs(info.model, TemplateDocument)
+        self.assertEqual(info.numeric_fields, ('id',))
+        choice = next(choice for choice in registry.get_registry().chart_models if choice['name'] == 'TemplateDocument')
+        self.assertEqual(choice['label'], 'Modèles')
+        self.assertEqual(choice['fields'], ('id',))
+
+    def test_unknown_model_ignored(self):
+        register_hook(HOOK_NAMES['CUSTOM_CHART_MODELS'], lambda: [{'name': 'Inconnu'}])
+        with self.assertLogs('admin_custom.registry', 'WARNING'):
+            chart_models = registry.get_registry().chart_models
+        self.assertNotIn('Inconnu', [choice['name'] for choice in chart_models])
@@ -0,0 +1,67 @@
+"""
+Tests des compteurs des tableaux de bord (stats.py).
+"""
+
+import time
+from unittest.mock import patch
+
+from django.core.cache import cache, caches
+from django.core.cache.backends import locmem
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from document.models import TemplateDocument
+from document.testing import LOCAL_CACHES
+
+from . import stats
+
+
+class StatsProviderTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        TemplateDocument.objects.create(nom='Contrat', fichier='templates/test.docx')
+
+    def _count(self):
+        return stats.get_stats()['counts']['templatedocument']
+
+    def test_signals_connected_at_startup(self):
+        # admin_custom est dans INSTALLED_APPS : ready() a branché les signaux
+        self.assertTrue(stats._signals_connected)
+
+    def test_create_and_delete_adjust_after_commit(self):
+        self.assertEqual(self._count(), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            template = TemplateDocument.objects.create(nom='Devis', fichier='templates/test.docx')
+            # Pas avant le commit : une transaction annulée ne fausse rien
+            self.assertEqual(self._count(), 1)
+        # Incrémenté, pas recompté
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self._count(), 2)
+        self.assertFalse([q for q in queries.captured_queries if 'COUNT(' in q['sql']])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            template.delete()
+        self.assertEqual(self._count(), 1)
+
+    def test_counters_shared_between_processes(self):
+        self._count()
+        with self.captureOnCommitCallbacks(execute=True):
+            TemplateDocument.objects.create(nom='Devis', fichier='templates/test.docx')
+        autre_worker = caches.create_connection('default')
+        self.assertEqual(autre_worker.get(stats._count_key(TemplateDocument)), 2)
+
+    @override_settings(CACHES=LOCAL_CACHES)
+    def test_ttl_triggers_recount(self):
+        self.assertEqual(self._count(), 1)
+        # bulk_create n'émet pas de signaux : le compteur reste faux jusqu'à l'expiration
+        TemplateDocument.objects.bulk_create([
+            TemplateDocument(nom=f'T{i}', fichier='templates/test.docx') for i in range(3)
+        ])
+        self.assertEqual(self._count(), 1)
+
+        plus_tard = time.time() + stats.get_ttl() + 1
+        with patch.object(locmem.time, 'time', return_value=plus_tard):
+            self.assertEqual(self._count(), 4)
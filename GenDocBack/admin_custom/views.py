@@ -1,50 +1,73 @@
+from django.contrib.admin.views.decorators import staff_member_required
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.utils import timezone
 from django.db.models import Sum, Avg, Count
+from django.db.models.functions import TruncDay, TruncMonth, TruncQuarter, TruncWeek, TruncYear
 from django.apps import apps
-from datetime import timedelta, datetime
+from datetime import date, datetime, time, timedelta
 from decimal import Decimal
 import json
 
+from .registry import get_registry
+
 
 def get_model_class(model_name):
     """
-    Retourne la classe du modèle à partir de son nom.
-    Utilise l'auto-découverte Django pour trouver le modèle.
+    Retourne la classe du modèle à partir de son nom ('DocumentGenere',
+    'document.DocumentGenere', 'user'...), ou None (cf. registry.py).
     Gère correctement les modèles swappés (ex: auth.User → user.User).
     """
-    # Cas spécial pour User : toujours utiliser get_user_model()
-    if model_name.lower() == 'user':
-        from django.contrib.auth import get_user_model
-        return get_user_model()
-    
-    # Parcourir toutes les apps pour trouver le modèle
-    for app_config in apps.get_app_configs():
-        try:
-            model = app_config.get_model(model_name)
-            if model and not getattr(model._meta, 'swapped', False):
-                return model
-        except LookupError:
-            # Le modèle n'existe pas dans cette app, continuer
-            continue
-    
-    # Si le modèle n'est pas trouvé, essayer avec le nom complet app.ModelName
-    if '.' in model_name:
-        try:
-            app_label, model_name_only = model_name.split('.', 1)
-            app_config = apps.get_app_config(app_label)
-            model = app_config.get_model(model_name_only)
-            if model and not getattr(model._meta, 'swapped', False):
-                return model
-        except (LookupError, ValueError):
-            pass
-    
-    return None
+    return get_registry().get_model(model_name)
+
+
+# Nombre de périodes affichées et fonction de troncature SQL par fréquence
+FREQUENCIES = {
+    'day': (30, TruncDay),
+    'week': (12, TruncWeek),
+    'month': (12, TruncMonth),
+    'quarter': (8, TruncQuarter),
+    'year': (5, TruncYear),
+}
+
+
+def _shift_month(day, months):
+    """Premier jour du mois décalé de `months` mois."""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def get_periods(frequency, periods, today):
+    """
+    Débuts des périodes (de la plus ancienne à la plus récente) et leurs
+    libellés, alignés sur le calendrier comme les Trunc* de la base.
+    """
+    starts = []
+    labels = []
+    for i in range(periods - 1, -1, -1):
+        if frequency == 'day':
+            start = today - timedelta(days=i)
+            label = start.strftime('%d/%m')
+        elif frequency == 'week':
+            start = today - timedelta(days=today.weekday(), weeks=i)
+            label = f"Sem {start.isocalendar()[1]}"
+        elif frequency == 'month':
+            start = _shift_month(today, -i)
+            label = start.strftime('%m/%Y')
+        elif frequency == 'quarter':
+            start = _shift_month(today, -((today.month - 1) % 3) - 3 * i)
+            label = f"T{(start.month - 1) // 3 + 1} {start.year}"
+        else:  # year
+            start = date(today.year - i, 1, 1)
+            label = str(start.year)
+        starts.append(timezone.make_aware(datetime.combine(start, time.min)))
+        labels.append(label)
+    return starts, labels
 
 
 @require_http_methods(["GET"])
+@staff_member_required
 def chart_data(request):
     """API pour récupérer les données de graphique"""
     model_name = request.GET.get('model')
@@ -56,55 +79,26 @@ def chart_data(request):
     if not model_name or not field_name:
         return JsonResponse({'error': 'Model and field are required'}, status=400)
     
-    model_class = get_model_class(model_name)
-    if not model_class:
+    info = get_registry().get(model_name)
+    if not info:
         return JsonResponse({'error': 'Invalid model'}, status=400)
+    model_class = info.model
     
     # Vérifier que le champ existe
-    try:
-        # Créer une instance pour vérifier les champs
-        instance = model_class()
-        if not hasattr(instance, field_name):
-            # Liste des champs disponibles
-            available_fields = [f.name for f in model_class._meta.get_fields() if hasattr(f, 'name')]
-            numeric_fields = []
-            for field in model_class._meta.get_fields():
-                if hasattr(field, 'name'):
-                    field_obj = model_class._meta.get_field(field.name)
-                    if hasattr(field_obj, 'get_internal_type'):
-                        field_type = field_obj.get_internal_type()
-                        if field_type in ['DecimalField', 'FloatField', 'IntegerField', 'PositiveIntegerField', 'BigIntegerField']:
-                            numeric_fields.append(field.name)
-            
-            return JsonResponse({
-                'error': f'Le champ "{field_name}" n\'existe pas sur le modèle {model_name}',
-                'available_fields': numeric_fields,
-                'suggestion': numeric_fields[0] if numeric_fields else None
-            }, status=400)
-    except Exception as e:
-        return JsonResponse({'error': f'Erreur lors de la vérification du champ: {str(e)}'}, status=400)
-    
-    # Calculer la période selon la fréquence
-    now = timezone.now()
-    periods_map = {
-        'day': 30,
-        'week': 12,
-        'month': 12,
-        'quarter': 8,
-        'year': 5,
-    }
-    periods = periods_map.get(frequency, 12)
+    if field_name not in info.plain_columns and field_name not in info.relation_columns:
+        numeric_fields = list(info.numeric_fields)
+        return JsonResponse({
+            'error': f'Le champ "{field_name}" n\'existe pas sur le modèle {model_name}',
+            'available_fields': numeric_fields,
+            'suggestion': numeric_fields[0] if numeric_fields else None
+        }, status=400)
     
-    # Récupérer les données
-    data = []
-    labels = []
+    if frequency not in FREQUENCIES:
+        frequency = 'month'
+    periods, trunc = FREQUENCIES[frequency]
     
-    # Détecter automatiquement le champ date du modèle (une seule fois)
-    date_field = None
-    for f in model_class._meta.get_fields():
-        if hasattr(f, 'get_internal_type') and f.get_internal_type() == 'DateTimeField' and hasattr(f, 'name'):
-            date_field = f.name
-            break
+    # Champ date du modèle, détecté à la construction du registre
+    date_field = info.date_field
     
     if not date_field:
         # Aucun champ DateTimeField trouvé, retourner des données vides
@@ -115,71 +109,34 @@ def chart_data(request):
             'error': f'Le modèle {model_name} n\'a pas de champ DateTimeField'
         })
     
-    for i in range(periods - 1, -1, -1):
-        if frequency == 'day':
-            start = now - timedelta(days=i+1)
-            end = now - timedelta(days=i)
-            label = start.strftime('%d/%m')
-        elif frequency == 'week':
-            start = now - timedelta(weeks=i+1)
-            end = now - timedelta(weeks=i)
-            label = f"Sem {start.isocalendar()[1]}"
-        elif frequency == 'month':
-            # Calculer le début du mois
-            month_start = now.month - i - 1
-            year = now.year
-            while month_start < 1:
-                month_start += 12
-                year -= 1
-            start = timezone.make_aware(datetime(year, month_start, 1))
-            month_end = now.month - i
-            year_end = now.year
-            while month_end < 1:
-                month_end += 12
-                year_end -= 1
-            end = timezone.make_aware(datetime(year_end, month_end, 1))
-            label = start.strftime('%m/%Y')
-        elif frequency == 'quarter':
-            quarter = ((now.month - 1) // 3) - i
-            year = now.year
-            while quarter < 0:
-                quarter += 4
-                year -= 1
-            month_start = (quarter * 3) + 1
-            start = timezone.make_aware(datetime(year, month_start, 1))
-            label = f"T{quarter + 1} {year}"
-            end = start + timedelta(days=90)
-        else:  # year
-            year = now.year - i
-            start = timezone.make_aware(datetime(year, 1, 1))
-            end = timezone.make_aware(datetime(year + 1, 1, 1))
-            label = str(year)
-        
-        # Filtrer les données pour cette période
-        queryset = model_class.objects.filter(**{f'{date_field}__gte': start, f'{date_field}__lt': end})
-        
-        # Appliquer l'opération
-        if operation == 'sum':
-            try:
-                from django.db.models import Sum
-                result = queryset.aggregate(sum=Sum(field_name))
-                value = float(result['sum'] or 0)
-            except Exception:
-                value = 0
-        elif operation == 'avg':
-            try:
-                from django.db.models import Avg
-                result = queryset.aggregate(avg=Avg(field_name))
-                value = float(result['avg'] or 0)
-            except Exception:
-                value = 0
-        elif operation == 'count':
-            value = queryset.count()
-        else:
-            value = queryset.count()
-        
-        data.append(value)
-        labels.append(label)
+    starts, labels = get_periods(frequency, periods, timezone.localdate())
+    
+    # Toute la série en une requête : GROUP BY sur la date tronquée
+    if operation == 'sum':
+        aggregate = Sum(field_name)
+    elif operation == 'avg':
+        aggregate = Avg(field_name)
+    else:
+        aggregate = Count('pk')
+    
+    try:
+        rows = (
+            model_class.objects
+            .filter(**{f'{date_field}__gte': starts[0]})
+            .annotate(periode=trunc(date_field))
+            .values('periode')
+            .annotate(valeur=aggregate)
+            .order_by()
+        )
+        values = {row['periode']: row['valeur'] for row in rows}
+    except Exception:
+        # Champ non agrégeable : série vide, comme avant
+        values = {}
+    
+    # Périodes sans donnée : 0
+    data = [float(values.get(start) or 0) for start in starts]
+    if operation not in ('sum', 'avg'):
+        data = [int(value) for value in data]
     
     return JsonResponse({
         'labels': labels,
@@ -189,137 +146,91 @@ def chart_data(request):
 
 
 @require_http_methods(["GET"])
+@staff_member_required
 def grid_data(request):
-    """API pour récupérer les données de grille"""
+    """
+    API pour récupérer une page de données de grille (cf. grids.py).
+
+    Paramètres : model et columns, ou grid_id (grille enregistrée, dont les
+    filtres sont appliqués) ; sort ('-champ' pour décroissant), cursor
+    (valeur 'next' de la page précédente) et page_size.
+    """
+    from .grids import GridError, get_grid_page
+
     grid_id = request.GET.get('grid_id')
     model_name = request.GET.get('model')
     columns = request.GET.getlist('columns')
+    filters = {}
+    
+    if grid_id:
+        if not apps.is_installed('admin_custom'):
+            return JsonResponse({'error': 'Saved grids are not available'}, status=400)
+        from .models import DashboardGrid
+        try:
+            grid = DashboardGrid.objects.get(pk=grid_id)
+        except (DashboardGrid.DoesNotExist, ValueError):
+            return JsonResponse({'error': f'Grid "{grid_id}" not found'}, status=404)
+        model_name = model_name or grid.model_name
+        columns = columns or grid.columns
+        filters = grid.filters or {}
     
     if not model_name:
         return JsonResponse({'error': 'Model is required'}, status=400)
     
-    model_class = get_model_class(model_name)
-    if not model_class:
+    # Seulement les modèles proposés aux grilles
+    info = get_registry().get_grid(model_name)
+    if not info:
         return JsonResponse({'error': 'Invalid model'}, status=400)
     
-    # Récupérer les données
-    queryset = model_class.objects.all()
-    
-    # Construire les données
-    data = []
-    for obj in queryset[:100]:  # Limiter à 100 résultats
-        row = {}
-        for col in columns:
-            if hasattr(obj, col):
-                value = getattr(obj, col)
-                # Convertir les objets en string
-                if hasattr(value, '__str__'):
-                    row[col] = str(value)
-                else:
-                    row[col] = value
-            else:
-                row[col] = '-'
-        data.append(row)
-    
-    return JsonResponse({
-        'data': data,
-        'columns': columns
-    })
+    try:
+        page = get_grid_page(
+            info, columns,
+            filters=filters,
+            sort=request.GET.get('sort'),
+            cursor=request.GET.get('cursor'),
+            page_size=request.GET.get('page_size'),
+        )
+    except GridError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    return JsonResponse(page)
 
 
 @require_http_methods(["GET"])
+@staff_member_required
 def stats_data(request):
-    """API pour récupérer les statistiques rapides - utilise l'auto-découverte"""
-    from django.db.models import Sum
-    from django.apps import apps
+    """API pour récupérer les statistiques rapides (compteurs mis en cache, cf. stats.py)"""
     from django.contrib.auth import get_user_model
-    
-    stats = {}
-    total_revenue = 0
-    
-    # Parcourir tous les modèles pour détecter automatiquement ceux avec des données
-    for app_config in apps.get_app_configs():
-        # Ignorer les apps Django internes
-        if app_config.name.startswith('django.contrib'):
-            continue
-        
-        for model in app_config.get_models():
-            if model._meta.abstract or model._meta.proxy:
-                continue
-            
-            # Ignorer les modèles swappés (ex: auth.User remplacé par user.User)
-            if getattr(model._meta, 'swapped', False):
-                continue
-            
-            model_name = model.__name__.lower()
-            
-            try:
-                # Chercher des champs de montant pour calculer les revenus
-                if hasattr(model, 'total_amount'):
-                    count = model.objects.count()
-                    revenue = float(model.objects.aggregate(Sum('total_amount'))['total_amount__sum'] or 0)
-                    stats[model_name] = count
-                    total_revenue += revenue
-                elif hasattr(model, 'amount'):
-                    count = model.objects.count()
-                    revenue = float(model.objects.aggregate(Sum('amount'))['amount__sum'] or 0)
-                    stats[model_name] = count
-                    total_revenue += revenue
-                else:
-                    # Compter simplement le nombre d'objets
-                    count = model.objects.count()
-                    if count > 0:
-                        stats[model_name] = count
-            except Exception:
-                # Ignorer les modèles qui posent problème (table inexistante, etc.)
-                continue
-    
-    # Ajouter le revenu total
-    stats['revenue'] = total_revenue
-    
-    # Garder la compatibilité avec le format attendu par les templates
-    document_model = get_model_class('DocumentGenere')
-    template_model = get_model_class('TemplateDocument')
-    formulaire_model = get_model_class('Formulaire')
-    UserModel = get_user_model()
-    
+    from .stats import get_stats
+
+    stats = get_stats()
+    counts = stats['counts']
     result = {
-        'documents': document_model.objects.count() if document_model else 0,
-        'templates': template_model.objects.count() if template_model else 0,
-        'formulaires': formulaire_model.objects.count() if formulaire_model else 0,
-        'users': UserModel.objects.count(),
-        'revenue': total_revenue,
+        'documents': counts.get('documentgenere', 0),
+        'templates': counts.get('templatedocument', 0),
+        'formulaires': counts.get('formulaire', 0),
+        'users': counts.get(get_user_model().__name__.lower(), 0),
+        'revenue': stats['revenue'],
     }
     
     return JsonResponse(result)
 
 
 @require_http_methods(["GET"])
+@staff_member_required
 def model_fields(request):
-    """API pour récupérer les champs numériques d'un modèle - utilise l'auto-découverte"""
+    """API pour récupérer les champs numériques d'un modèle (registre des modèles)"""
     model_name = request.GET.get('model')
     
     if not model_name:
         return JsonResponse({'error': 'Model name is required'}, status=400)
     
-    model_class = get_model_class(model_name)
-    if not model_class:
+    info = get_registry().get(model_name)
+    if not info:
         return JsonResponse({'error': f'Model "{model_name}" not found'}, status=404)
     
-    # Détecter les champs numériques
-    numeric_fields = []
-    for field in model_class._meta.get_fields():
-        if hasattr(field, 'name'):
-            try:
-                field_obj = model_class._meta.get_field(field.name)
-                if hasattr(field_obj, 'get_internal_type'):
-                    field_type = field_obj.get_internal_type()
-                    if field_type in ['DecimalField', 'FloatField', 'IntegerField', 
-                                     'PositiveIntegerField', 'BigIntegerField', 'SmallIntegerField']:
-                        numeric_fields.append(field.name)
-            except Exception:
-                # Ignorer les champs qui ne peuvent pas être inspectés
-                continue
+    # Champs numériques détectés à la construction du registre
+    numeric_fields = list(info.numeric_fields)
     
     return JsonResponse({
         'model': model_name,
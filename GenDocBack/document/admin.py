@@ -86,9 +86,9 @@ class TypeDocumentAdmin(admin.ModelAdmin):
 # 6. Gestion des Documents Générés (C'est ton HISTORIQUE !)
 @admin.register(DocumentGenere)
 class DocumentGenereAdmin(admin.ModelAdmin):
-    list_display = ('id', 'template', 'format', 'status', 'date_generation')
+    list_display = ('id', 'template', 'format', 'status', 'tentatives', 'date_generation')
     list_filter = ('status', 'format', 'date_generation')
-    readonly_fields = ('date_generation',)
+    readonly_fields = ('date_generation', 'tentatives', 'prochaine_tentative', 'verrou_expire_le', 'derniere_erreur')
 
 # 7. Gestion des Réponses données par les utilisateurs
 @admin.register(ReponseQuestion)
@@ -0,0 +1,255 @@
+"""
+Génération par lot (publipostage) : un template, de nombreuses lignes de réponses.
+
+Le template est lu une seule fois et transmis une seule fois à chaque processus
+du pool de rendu ; les lignes sont rendues en parallèle, puis converties en PDF
+par le pool LibreOffice si nécessaire. Chaque ligne donne son propre
+DocumentGenere, et le résultat est rapporté ligne par ligne.
+
+Les lots trop longs pour être rendus pendant la requête (BATCH_INLINE_MAX_ROWS,
+BATCH_INLINE_MAX_PDF_ROWS) passent par la file d'attente (jobs.py). Les
+documents d'un lot rendu pendant la requête sont créés 'processing' avec un
+verrou, comme s'ils avaient été réclamés par un worker : si la requête meurt,
+le verrou expire et la commande generation_worker les reprend.
+"""
+
+import logging
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+
+from .compiler import load_compiled, read_template_bytes
+from .conf import get_setting
+from .conversion import convert_to_pdf
+from .dedup import document_fingerprint
+from .models import DocumentGenere, Question, ReponseQuestion
+from .rendering import init_render_worker, render_docx, render_with_worker_template
+from .validation import check_values, get_plan
+
+logger = logging.getLogger(__name__)
+
+
+def _validate_rows(questions, lignes, plan):
+    """
+    Associe chaque ligne (clé = Question.variable) aux questions du template.
+    Retourne [(index, reponses, erreurs)] où reponses = [(question, valeur)].
+    """
+    by_variable = {question.variable: question for question in questions}
+
+    validated = []
+    for index, ligne in enumerate(lignes):
+        reponses = []
+        for variable, valeur in ligne.items():
+            question = by_variable.get(variable)
+            if question is None:
+                continue
+            valeur = '' if valeur is None else str(valeur)
+            reponses.append((question, valeur))
+
+        # Une cellule vide compte comme une réponse absente
+        erreurs = check_values(plan, {question.id: valeur for question, valeur in reponses if valeur.strip()})
+        validated.append((index, reponses, erreurs))
+    return validated
+
+
+def must_queue(format, nb_lignes):
+    """Le lot est-il trop long pour être rendu pendant la requête ?"""
+    if format == DocumentGenere.PDF:
+        return nb_lignes > get_setting('BATCH_INLINE_MAX_PDF_ROWS')
+    return nb_lignes > get_setting('BATCH_INLINE_MAX_ROWS')
+
+
+def _create_documents(template, format, user, rows, status):
+    """
+    Crée en base un DocumentGenere (et ses réponses) par ligne valide.
+
+    'pending' : mis en file d'attente. 'processing' : rendu pendant la
+    requête, sous un verrou qui laisse la file le reprendre s'il expire.
+    """
+    questions = {
+        question.id: (question.label, question.variable)
+        for index, reponses, erreurs in rows
+        for question, valeur in reponses
+    }
+    empreintes = [
+        document_fingerprint(
+            template, format,
+            [{'question': question.id, 'valeur': valeur} for question, valeur in reponses],
+            questions=questions,
+        )
+        for index, reponses, erreurs in rows
+    ]
+    now = timezone.now()
+    if status == 'pending':
+        queue_fields = {'prochaine_tentative': now}
+    else:
+        queue_fields = {
+            'prochaine_tentative': now,
+            'tentatives': 1,
+            'verrou_expire_le': now + timedelta(seconds=get_setting('QUEUE_VISIBILITY_TIMEOUT')),
+        }
+    with transaction.atomic():
+        documents = DocumentGenere.objects.bulk_create([
+            DocumentGenere(
+                template=template,
+                format=format,
+                user=user,
+                status=status,
+                empreinte=empreinte,
+                **queue_fields,
+            )
+            for empreinte in empreintes
+        ])
+        ReponseQuestion.objects.bulk_create([
+            ReponseQuestion(document=document, question=question, valeur=valeur)
+            for document, (index, reponses, erreurs) in zip(documents, rows)
+            for question, valeur in reponses
+        ])
+    return documents
+
+
+def _render_all(template_bytes, replacements_list, compiled=None, mp_context=None):
+    """
+    Rend toutes les lignes, en parallèle si possible. Retourne bytes ou exception par ligne.
+
+    mp_context : contexte multiprocessing du pool (celui de la plateforme par défaut).
+    """
+    workers = get_setting('BATCH_WORKERS') or os.cpu_count() or 1
+    workers = min(workers, len(replacements_list))
+
+    if workers <= 1:
+        results = []
+        for replacements in replacements_list:
+            try:
+                if compiled is not None:
+                    results.append(compiled.render(template_bytes, replacements))
+                else:
+                    results.append(render_docx(template_bytes, replacements))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    results = []
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=mp_context,
+            initializer=init_render_worker,
+            initargs=(template_bytes, compiled),
+        ) as executor:
+            futures = [
+                executor.submit(render_with_worker_template, replacements)
+                for replacements in replacements_list
+            ]
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    results.append(e)
+    except Exception as e:
+        # Pool inutilisable (création, envoi du template, processus morts) :
+        # les lignes restantes échouent au lieu de faire échouer la requête.
+        logger.exception("Lot : pool de rendu inutilisable")
+        results.extend([e] * (len(replacements_list) - len(results)))
+    return results
+
+
+def _docx_to_pdf(docx_bytes):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = os.path.join(tmp_dir, 'out.docx')
+        with open(source, 'wb') as f:
+            f.write(docx_bytes)
+        with open(convert_to_pdf(source, tmp_dir), 'rb') as f:
+            return f.read()
+
+
+def _convert_all(rendered):
+    """Convertit en PDF les rendus réussis, autant en parallèle que le pool LibreOffice le permet."""
+    indexes = [i for i, result in enumerate(rendered) if isinstance(result, bytes)]
+    with ThreadPoolExecutor(max_workers=get_setting('PDF_POOL_SIZE')) as executor:
+        futures = {i: executor.submit(_docx_to_pdf, rendered[i]) for i in indexes}
+    converted = list(rendered)
+    for i, future in futures.items():
+        try:
+            converted[i] = future.result()
+        except Exception as e:
+            converted[i] = e
+    return converted
+
+
+def generate_batch(template, format, lignes, user=None, asynchrone=False):
+    """
+    Génère un document par ligne de réponses.
+
+    En mode asynchrone, les documents sont créés et mis en file d'attente
+    pour la commande generation_worker au lieu d'être rendus immédiatement
+    (toujours le cas si must_queue()).
+    Retourne la liste des résultats, un par ligne, dans l'ordre des lignes.
+    """
+    questions = list(Question.objects.filter(formulaire__template=template))
+    validated = _validate_rows(questions, lignes, get_plan(template.id))
+
+    resultats = [None] * len(lignes)
+    valid_rows = []
+    for index, reponses, erreurs in validated:
+        if erreurs:
+            resultats[index] = {'ligne': index + 1, 'document': None, 'status': 'error', 'erreurs': erreurs}
+        else:
+            valid_rows.append((index, reponses, erreurs))
+
+    if not valid_rows:
+        return resultats
+
+    asynchrone = asynchrone or must_queue(format, len(valid_rows))
+    documents = _create_documents(
+        template, format, user, valid_rows,
+        status='pending' if asynchrone else 'processing',
+    )
+
+    if asynchrone:
+        for document, (index, reponses, erreurs) in zip(documents, valid_rows):
+            resultats[index] = {'ligne': index + 1, 'document': document.id, 'status': 'pending', 'erreurs': []}
+        return resultats
+
+    template_bytes = read_template_bytes(template)
+
+    replacements_list = []
+    for index, reponses, erreurs in valid_rows:
+        replacements = {}
+        for question, valeur in reponses:
+            # Même correspondance que la génération unitaire : label et slug
+            replacements[question.label] = valeur
+            replacements[question.variable] = valeur
+        replacements_list.append(replacements)
+
+    try:
+        compiled = load_compiled(template)
+    except Exception:
+        logger.exception("Template %s non compilé, rendu avec python-docx", template.pk)
+        compiled = None
+
+    rendered = _render_all(template_bytes, replacements_list, compiled)
+    if format == DocumentGenere.PDF:
+        rendered = _convert_all(rendered)
+
+    for document, (index, reponses, erreurs), result in zip(documents, valid_rows, rendered):
+        if isinstance(result, Exception):
+            logger.error("Lot : échec de la ligne %s (document %s) : %s", index + 1, document.id, result)
+            document.status = 'error'
+            document.derniere_erreur = str(result)
+            resultats[index] = {'ligne': index + 1, 'document': document.id, 'status': 'error', 'erreurs': [str(result)]}
+        else:
+            document.fichier.save(f"document_{document.id}.{format}", ContentFile(result), save=False)
+            document.status = 'done'
+            document.derniere_erreur = ''
+            resultats[index] = {'ligne': index + 1, 'document': document.id, 'status': 'done', 'erreurs': []}
+
+    for document in documents:
+        document.verrou_expire_le = None
+    DocumentGenere.objects.bulk_update(documents, ['status', 'fichier', 'derniere_erreur', 'verrou_expire_le'])
+    return resultats
@@ -0,0 +1,112 @@
+"""
+Cache des réponses du catalogue (catégories, templates, formulaires).
+
+Les réponses des actions en lecture sont gardées dans le cache Django sous une
+clé contenant un numéro de version du catalogue. Toute modification d'une
+catégorie, d'un template, d'un formulaire, d'une question ou d'un choix
+incrémente ce numéro (voir signals.py) : les anciennes réponses ne sont plus
+jamais lues et expirent d'elles-mêmes.
+
+Les vues staff et publiques sont mises en cache séparément, les templates
+inactifs n'étant visibles que des administrateurs.
+
+Le numéro de version est l'horodatage (en nanosecondes) de la dernière
+modification : il sert aussi d'ETag et de Last-Modified, si bien qu'une
+requête conditionnelle reçoit son 304 sans aucun accès à la base.
+
+Le numéro de version doit être vu par tous les processus : le cache par
+défaut doit être partagé (Redis, REDIS_URL dans settings.py ; avertissement
+document.W001 sinon). Un cache en base ferait une requête par lecture de la
+version, 304 compris.
+"""
+
+import hashlib
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+from .conditional import is_not_modified, make_etag, not_modified, set_validators
+from .conf import get_setting
+
+VERSION_KEY = 'document:catalogue:version'
+RESPONSE_KEY = 'document:catalogue:{version}:{view}:{action}:{scope}:{url}'
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Valeur initiale horodatée : après une purge du cache, on ne retombe
+        # pas sur une version déjà utilisée
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _bump():
+    # Toujours croissant, même si deux modifications tombent dans la même nanoseconde
+    version = max(time.time_ns(), (cache.get(VERSION_KEY) or 0) + 1)
+    cache.set(VERSION_KEY, version, None)
+
+
+def last_modified(version):
+    """Date de la dernière modification du catalogue (secondes)."""
+    return version // 10 ** 9
+
+
+def bump_version():
+    """
+    Invalide toutes les réponses du catalogue. À appeler après une
+    modification qui ne passe pas par save()/delete() (bulk_create, update).
+    """
+    _bump()
+    # Une seconde fois à la validation de la transaction : une réponse
+    # construite entre-temps avec les anciennes données n'est pas gardée
+    transaction.on_commit(_bump)
+
+
+def response_key(view, request, version=None):
+    if version is None:
+        version = get_version()
+    scope = 'staff' if request.user and request.user.is_staff else 'public'
+    url = hashlib.md5(request.build_absolute_uri().encode('utf-8')).hexdigest()
+    return RESPONSE_KEY.format(
+        version=version, view=type(view).__name__, action=view.action, scope=scope, url=url
+    )
+
+
+def cache_response(handler):
+    """Décorateur des actions en lecture d'un viewset du catalogue."""
+    @wraps(handler)
+    def wrapper(self, request, *args, **kwargs):
+        version = get_version()
+        key = response_key(self, request, version)
+        etag = make_etag(key)
+        modified = last_modified(version)
+        if is_not_modified(request, etag, modified):
+            return not_modified(etag, modified)
+
+        data = cache.get(key)
+        if data is not None:
+            return set_validators(Response(data), etag, modified)
+        response = handler(self, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, get_setting('CATALOGUE_CACHE_TIMEOUT'))
+            set_validators(response, etag, modified)
+        return response
+    return wrapper
+
+
+class CatalogueCacheMixin:
+    """Met en cache les réponses de list et retrieve."""
+
+    @cache_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
@@ -0,0 +1,48 @@
+"""
+Vérifications au démarrage (`python manage.py check`).
+"""
+
+import platform
+
+from django.conf import settings
+from django.core.checks import Warning, register
+
+# Caches propres à chaque processus : une invalidation ne serait vue que par
+# le processus qui l'a faite
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+)
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend not in LOCAL_CACHE_BACKENDS:
+        return []
+    return [Warning(
+        "Le cache par défaut est propre à chaque processus.",
+        hint=(
+            "Les versions du catalogue, les plans de validation et les menus de "
+            "l'admin ne seraient invalidés que dans le processus qui a fait la "
+            "modification. Définissez REDIS_URL, ou configurez un cache partagé "
+            "(Redis, Memcached) dans CACHES."
+        ),
+        id='document.W001',
+    )]
+
+
+@register()
+def check_pdf_conversion(app_configs, **kwargs):
+    from .conversion import SUBPROCESS, get_backend
+
+    if platform.system() == 'Windows' or get_backend() != SUBPROCESS:
+        return []
+    return [Warning(
+        "Conversion PDF sans instance LibreOffice à l'écoute.",
+        hint=(
+            "Ni le module uno (python3-uno) ni unoserver ne sont disponibles : "
+            "chaque conversion PDF démarre LibreOffice (plusieurs secondes). "
+            "Installez python3-uno, ou unoserver avec le Python de LibreOffice."
+        ),
+        id='document.W002',
+    )]
@@ -0,0 +1,282 @@
+"""
+Templates DOCX compilés.
+
+Un template est compilé une seule fois (à l'upload ou à l'approbation) :
+les parties XML contenant du texte (word/document.xml, en-têtes, pieds de
+page, notes) sont découpées en morceaux d'XML statiques entrecoupés
+d'emplacements de variables. Générer un document revient alors à échapper
+les valeurs, joindre des chaînes d'octets et recompresser l'archive, sans
+reconstruire le modèle objet python-docx.
+
+L'artefact compilé est un fichier JSON enregistré dans
+TemplateDocument.fichier_compile ; il est invalidé quand le fichier source
+du template change (voir signals.py).
+
+Ce module ne dépend pas des modèles Django (utilisé par le pool de rendu).
+"""
+
+import hashlib
+import io
+import json
+import logging
+import re
+import threading
+import zipfile
+from pathlib import PurePath
+from xml.sax.saxutils import escape
+
+from django.core.files.base import ContentFile
+from lxml import etree
+
+from . import template_cache
+from .rendering import replace_in_runs
+
+logger = logging.getLogger(__name__)
+
+COMPILED_VERSION = 1
+
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+W_P = f'{{{W_NS}}}p'
+W_T = f'{{{W_NS}}}t'
+XML_SPACE = '{http://www.w3.org/XML/1998/namespace}space'
+
+# Parties XML où peuvent se trouver des variables
+TEXT_PARTS = re.compile(r'^word/(document|header\d*|footer\d*|footnotes|endnotes)\.xml$')
+
+# Toute variable {NOM} ou {{NOM}}
+PLACEHOLDER = re.compile(r'\{(\{)?([^{}]+)\}(?(1)\})')
+
+# Marqueurs (zone Unicode à usage privé) insérés à la place des variables
+# avant sérialisation, puis utilisés pour découper l'XML
+SLOT_START, SLOT_END = '\ue000', '\ue001'
+SLOT_MARKER = re.compile(f'{SLOT_START}(\\d+){SLOT_END}')
+
+# Saut de ligne et tabulation dans une valeur : mêmes éléments que python-docx
+LINE_BREAK = b'</w:t><w:br/><w:t xml:space="preserve">'
+TAB = b'</w:t><w:tab/><w:t xml:space="preserve">'
+
+
+def _escape_value(value):
+    data = escape(str(value)).encode('utf-8')
+    if b'\n' in data or b'\t' in data:
+        data = data.replace(b'\r\n', b'\n').replace(b'\n', LINE_BREAK).replace(b'\t', TAB)
+    return data
+
+
+def _compile_part(xml_bytes):
+    """Découpe une partie XML en morceaux statiques et emplacements de variables."""
+    root = etree.fromstring(xml_bytes)
+    slots = []
+
+    for paragraph in root.iter(W_P):
+        # Textes propres au paragraphe (pas ceux d'une zone de texte imbriquée)
+        nodes = [t for t in paragraph.iter(W_T) if next(t.iterancestors(W_P)) is paragraph]
+        texts = [t.text or '' for t in nodes]
+
+        def to_marker(match):
+            slots.append([match.group(2), match.group(0)])
+            return f'{SLOT_START}{len(slots) - 1}{SLOT_END}'
+
+        new_texts = replace_in_runs(texts, PLACEHOLDER, to_marker)
+        if new_texts is None:
+            continue
+        for node, old_text, new_text in zip(nodes, texts, new_texts):
+            if new_text != old_text:
+                node.text = new_text
+                node.set(XML_SPACE, 'preserve')
+
+    if not slots:
+        return None
+
+    xml = etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True).decode('utf-8')
+    pieces = SLOT_MARKER.split(xml)
+    return {
+        # Les morceaux statiques et, entre deux morceaux, l'indice de l'emplacement
+        'chunks': pieces[0::2],
+        'slots': [slots[int(index)] for index in pieces[1::2]],
+    }
+
+
+def compile_docx(template_bytes, source_name=''):
+    """Compile un template DOCX (contenu binaire) en dictionnaire sérialisable en JSON."""
+    parts = {}
+    with zipfile.ZipFile(io.BytesIO(template_bytes)) as archive:
+        for name in archive.namelist():
+            if not TEXT_PARTS.match(name):
+                continue
+            xml_bytes = archive.read(name)
+            if SLOT_START.encode('utf-8') in xml_bytes:
+                raise ValueError(f"{name} contient des caractères réservés à la compilation")
+            part = _compile_part(xml_bytes)
+            if part is not None:
+                parts[name] = part
+    return {
+        'version': COMPILED_VERSION,
+        'source': source_name,
+        'empreinte': hashlib.sha256(template_bytes).hexdigest(),
+        'parts': parts,
+    }
+
+
+class CompiledTemplate:
+    """Template compilé prêt au rendu (immuable, partageable entre requêtes)."""
+
+    def __init__(self, data):
+        self.source = data['source']
+        self.empreinte = data['empreinte']
+        self.parts = {}
+        for name, part in data['parts'].items():
+            chunks = [chunk.encode('utf-8') for chunk in part['chunks']]
+            # (nom de la variable, texte d'origine échappé si la variable est absente)
+            slots = [(slot_name, escape(literal).encode('utf-8')) for slot_name, literal in part['slots']]
+            self.parts[name] = (chunks, slots)
+        # (template source, archive statique, {partie: (date_time, compress_type)})
+        self._static = None
+        self._static_lock = threading.Lock()
+
+    def __getstate__(self):
+        # Envoyé aux processus de rendu (batch.py) : le verrou n'est pas
+        # picklable et l'archive statique est recalculée sur place.
+        state = self.__dict__.copy()
+        del state['_static'], state['_static_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._static = None
+        self._static_lock = threading.Lock()
+
+    @classmethod
+    def from_json(cls, raw):
+        data = json.loads(raw)
+        if data.get('version') != COMPILED_VERSION:
+            raise ValueError("Version de template compilé obsolète")
+        return cls(data)
+
+    def _render_part(self, chunks, slots, replacements):
+        out = [chunks[0]]
+        for (name, literal), chunk in zip(slots, chunks[1:]):
+            value = replacements.get(name)
+            if value is None:
+                value = replacements.get(name.strip())
+            if value is None and literal.startswith(b'{{'):
+                # Libellés extraits avant la prise en charge de {{NOM}} : "{NOM"
+                value = replacements.get('{' + name)
+            out.append(literal if value is None else _escape_value(value))
+            out.append(chunk)
+        return b''.join(out)
+
+    def _static_archive(self, template_bytes):
+        """
+        Archive contenant toutes les parties sans variable, recompressées une
+        seule fois : chaque rendu n'ajoute plus que les parties à variables.
+
+        Retourne aussi, pour chaque partie à variables, la date et la méthode
+        de compression de l'original. Le template compilé est partagé entre
+        les threads (cache des templates) : le calcul est fait sous verrou et
+        le résultat n'est jamais modifié ensuite.
+        """
+        cached = self._static
+        if cached is not None and cached[0] == template_bytes:
+            return cached[1], cached[2]
+
+        with self._static_lock:
+            cached = self._static
+            if cached is not None and cached[0] == template_bytes:
+                return cached[1], cached[2]
+            output = io.BytesIO()
+            infos = {}
+            with zipfile.ZipFile(io.BytesIO(template_bytes)) as source, \
+                    zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as target:
+                for item in source.infolist():
+                    if item.filename in self.parts:
+                        infos[item.filename] = (item.date_time, item.compress_type)
+                    else:
+                        target.writestr(item, source.read(item))
+            self._static = (template_bytes, output.getvalue(), infos)
+        return self._static[1], self._static[2]
+
+    def render(self, template_bytes, replacements):
+        """Retourne le DOCX généré (bytes) à partir du template source et des valeurs."""
+        archive, infos = self._static_archive(template_bytes)
+        output = io.BytesIO(archive)
+        output.seek(0, io.SEEK_END)
+        with zipfile.ZipFile(output, 'a', zipfile.ZIP_DEFLATED) as target:
+            for name, part in self.parts.items():
+                # writestr() renseigne tailles, CRC et position sur le ZipInfo :
+                # un nouveau par écriture, jamais celui d'un autre rendu
+                date_time, compress_type = infos[name]
+                info = zipfile.ZipInfo(name, date_time)
+                info.compress_type = compress_type
+                target.writestr(info, self._render_part(*part, replacements))
+        return output.getvalue()
+
+
+def _load_compiled_file(path):
+    with open(path, 'rb') as f:
+        raw = f.read()
+    compiled = CompiledTemplate.from_json(raw)
+    # Taille estimée : morceaux d'XML, plus l'archive des parties statiques
+    # (de l'ordre de la taille du template) construite au premier rendu
+    return compiled, 2 * len(raw)
+
+
+def is_compilable(template):
+    return bool(template.fichier) and template.fichier.name.lower().endswith('.docx')
+
+
+def read_template_bytes(template):
+    """Contenu du fichier d'un template (depuis le cache des templates si possible)."""
+    try:
+        path = template.fichier.path
+    except NotImplementedError:
+        # Stockage distant : pas de chemin local à mettre en cache
+        template.fichier.open('rb')
+        try:
+            return template.fichier.read()
+        finally:
+            template.fichier.close()
+    return template_cache.read_bytes(path)
+
+
+def compile_template(template, template_bytes=None):
+    """
+    Compile le fichier d'un TemplateDocument et enregistre l'artefact
+    dans fichier_compile. Retourne le CompiledTemplate, ou None si le
+    template n'est pas un DOCX.
+    """
+    if not is_compilable(template):
+        return None
+    if template_bytes is None:
+        template_bytes = read_template_bytes(template)
+
+    data = compile_docx(template_bytes, source_name=template.fichier.name)
+    if template.fichier_compile:
+        template.fichier_compile.delete(save=False)
+    template.fichier_compile.save(
+        f"{PurePath(template.fichier.name).stem}.json",
+        ContentFile(json.dumps(data).encode('utf-8')),
+        save=False
+    )
+    template.empreinte_fichier = data['empreinte']
+    template.save(update_fields=['fichier_compile', 'empreinte_fichier'])
+    logger.info("Template %s compilé (%s parties)", template.pk, len(data['parts']))
+    return CompiledTemplate(data)
+
+
+def load_compiled(template):
+    """
+    Retourne le CompiledTemplate d'un TemplateDocument, en le (re)compilant
+    s'il est absent ou ne correspond plus au fichier source.
+    Retourne None si le template n'est pas un DOCX.
+    """
+    if not is_compilable(template):
+        return None
+    if template.fichier_compile:
+        try:
+            compiled = template_cache.load(template.fichier_compile.path, _load_compiled_file, 'compiled')
+            if compiled.source == template.fichier.name:
+                return compiled
+        except (OSError, ValueError, KeyError):
+            logger.warning("Template compilé illisible pour le template %s, recompilation", template.pk)
+    return compile_template(template)
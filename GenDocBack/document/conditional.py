@@ -0,0 +1,51 @@
+"""
+Requêtes conditionnelles (ETag / Last-Modified).
+
+Les vues calculent un ETag à partir de données déjà connues (version du
+catalogue, quelques colonnes d'une ligne) avant de sérialiser quoi que ce
+soit ; si le client possède déjà cette représentation, elles répondent 304.
+"""
+
+import hashlib
+
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def make_etag(*parts):
+    """ETag fort dérivé des éléments qui déterminent la représentation."""
+    digest = hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return f'"{digest}"'
+
+
+def is_not_modified(request, etag, last_modified=None):
+    """
+    Vrai si la représentation du client est à jour. If-None-Match est
+    prioritaire sur If-Modified-Since (RFC 9110).
+    """
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        # Comparaison faible pour un GET : un proxy peut avoir ajouté W/
+        return '*' in etags or etag in (e.removeprefix('W/') for e in etags)
+
+    if_modified_since = request.headers.get('If-Modified-Since')
+    if if_modified_since and last_modified is not None:
+        since = parse_http_date_safe(if_modified_since)
+        return since is not None and int(last_modified) <= since
+    return False
+
+
+def set_validators(response, etag, last_modified=None):
+    """Ajoute ETag / Last-Modified ; le client doit revalider à chaque utilisation."""
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def not_modified(etag, last_modified=None):
+    return set_validators(Response(status=status.HTTP_304_NOT_MODIFIED), etag, last_modified)
@@ -0,0 +1,56 @@
+"""
+Paramètres de la génération de documents.
+
+Les valeurs sont lues dans le dictionnaire DOCUMENT_GENERATION de settings.py,
+avec des valeurs par défaut raisonnables pour le développement.
+"""
+
+from django.conf import settings
+
+
+DEFAULTS = {
+    # Conversion PDF : pool d'instances LibreOffice headless
+    'LIBREOFFICE_BINARY': 'libreoffice',
+    'PDF_POOL_SIZE': 2,
+    'PDF_POOL_MAX_JOBS': 50,
+    'PDF_POOL_TIMEOUT': 120,
+    'PDF_POOL_PROFILE_DIR': None,
+    'UNOSERVER_BINARY': 'unoserver',
+    'UNOCONVERT_BINARY': 'unoconvert',
+
+    # File d'attente de génération asynchrone
+    'ASYNC': False,
+    'QUEUE_MAX_ATTEMPTS': 3,
+    'QUEUE_RETRY_BACKOFF': 30,
+    'QUEUE_VISIBILITY_TIMEOUT': 600,
+    'QUEUE_POLL_INTERVAL': 2,
+
+    # Génération par lot
+    'BATCH_MAX_ROWS': 5000,
+    'BATCH_WORKERS': None,
+    'BATCH_INLINE_MAX_ROWS': 100,
+    'BATCH_INLINE_MAX_PDF_ROWS': 10,
+
+    # Cache des templates en mémoire (par processus)
+    'TEMPLATE_CACHE_MAX_BYTES': 64 * 1024 * 1024,
+
+    # Plans de validation des réponses (cache Django)
+    'VALIDATION_PLAN_TIMEOUT': 3600,
+
+    # Réponses du catalogue (cache Django, invalidé par version)
+    'CATALOGUE_CACHE_TIMEOUT': 3600,
+
+    # Synchronisation différentielle du catalogue (?since=)
+    'SYNC_TOMBSTONE_RETENTION': 90,
+    'SYNC_CURSOR_MARGIN': 60,
+
+    # Import de templates depuis une archive ZIP
+    'INGESTION_MAX_FILES': 500,
+    'INGESTION_MAX_FILE_BYTES': 20 * 1024 * 1024,
+}
+
+
+def get_setting(name):
+    """Retourne la valeur d'un paramètre DOCUMENT_GENERATION (ou sa valeur par défaut)."""
+    config = getattr(settings, 'DOCUMENT_GENERATION', {})
+    return config.get(name, DEFAULTS[name])
@@ -0,0 +1,341 @@
+"""
+Conversion DOCX -> PDF.
+
+Sous Linux, la conversion passe par un pool d'instances LibreOffice headless
+gardées au chaud : chaque instance possède son propre profil utilisateur,
+une conversion est confiée à une instance libre et l'instance est recyclée
+après un nombre configurable de conversions, après une erreur, ou quand une
+conversion dépasse PDF_POOL_TIMEOUT (le processus est alors tué).
+
+Chaque instance est un processus à l'écoute, selon ce qui est installé :
+
+- pont UNO de LibreOffice (module ``uno``) : un ``soffice`` à l'écoute sur un
+  pipe nommé, piloté directement ;
+- sinon unoserver (``pip install unoserver``, lancé avec le Python de
+  LibreOffice) : un ``unoserver`` par instance, et chaque conversion est
+  envoyée par le client léger ``unoconvert`` ;
+- à défaut, chaque conversion lance ``soffice --convert-to`` avec le profil
+  (déjà initialisé) de l'instance : plusieurs secondes de démarrage par
+  document. Ce mode est signalé au démarrage (check document.W002).
+
+Sous Windows, la conversion utilise Word via docx2pdf.
+"""
+
+import atexit
+import logging
+import os
+import platform
+import queue
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from .conf import get_setting
+
+try:
+    import uno
+    from com.sun.star.beans import PropertyValue
+    from com.sun.star.connection import NoConnectException
+except ImportError:  # LibreOffice installé sans python3-uno
+    uno = None
+
+logger = logging.getLogger(__name__)
+
+UNO, UNOSERVER, SUBPROCESS = 'uno', 'unoserver', 'subprocess'
+
+
+class ConversionError(Exception):
+    """Erreur levée lorsqu'une conversion PDF échoue."""
+
+
+def get_backend():
+    """Mode des instances : UNO, UNOSERVER ou SUBPROCESS (un soffice par conversion)."""
+    if uno is not None:
+        return UNO
+    if shutil.which(get_setting('UNOSERVER_BINARY')) and shutil.which(get_setting('UNOCONVERT_BINARY')):
+        return UNOSERVER
+    return SUBPROCESS
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _uno_property(name, value):
+    prop = PropertyValue()
+    prop.Name = name
+    prop.Value = value
+    return prop
+
+
+class SofficeInstance:
+    """Une instance LibreOffice headless avec son propre profil utilisateur."""
+
+    def __init__(self, index, binary, profile_root, backend=None):
+        self.index = index
+        self.binary = binary
+        self.backend = backend or get_backend()
+        self.profile_dir = os.path.join(profile_root, f'instance_{index}')
+        self.pipe_name = f'gendoc_{os.getpid()}_{index}'
+        self.port = None
+        self.process = None
+        self.desktop = None
+        self.jobs = 0
+
+    @property
+    def profile_url(self):
+        return Path(self.profile_dir).as_uri()
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self, timeout):
+        """Démarre le processus à l'écoute et attend qu'il accepte les connexions."""
+        os.makedirs(self.profile_dir, exist_ok=True)
+        if self.backend == UNOSERVER:
+            self._start_unoserver(timeout)
+        else:
+            self._start_soffice(timeout)
+        self.jobs = 0
+        logger.info("Instance LibreOffice %s démarrée (pid %s)", self.index, self.process.pid)
+
+    def _start_soffice(self, timeout):
+        self.process = subprocess.Popen([
+            self.binary, '--headless', '--invisible', '--nologo', '--nodefault',
+            '--norestore', '--nolockcheck',
+            f'-env:UserInstallation={self.profile_url}',
+            f'--accept=pipe,name={self.pipe_name};urp;StarOffice.ComponentContext',
+        ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext(
+            'com.sun.star.bridge.UnoUrlResolver', local_context
+        )
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                context = resolver.resolve(
+                    f'uno:pipe,name={self.pipe_name};urp;StarOffice.ComponentContext'
+                )
+                break
+            except NoConnectException:
+                if not self.is_alive() or time.monotonic() > deadline:
+                    self.stop()
+                    raise ConversionError(f"Instance LibreOffice {self.index} injoignable")
+                time.sleep(0.1)
+
+        self.desktop = context.ServiceManager.createInstanceWithContext(
+            'com.sun.star.frame.Desktop', context
+        )
+
+    def _start_unoserver(self, timeout):
+        self.port = _free_port()
+        self.process = subprocess.Popen([
+            get_setting('UNOSERVER_BINARY'),
+            '--interface', '127.0.0.1', '--port', str(self.port),
+            '--uno-port', str(_free_port()),
+            '--executable', shutil.which(self.binary) or self.binary,
+            '--user-installation', self.profile_url,
+        ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                socket.create_connection(('127.0.0.1', self.port), timeout=1).close()
+                break
+            except OSError:
+                if not self.is_alive() or time.monotonic() > deadline:
+                    self.stop()
+                    raise ConversionError(f"Instance LibreOffice {self.index} injoignable")
+                time.sleep(0.1)
+
+    def kill(self):
+        """Tue le processus (conversion bloquée) : l'appel en cours échoue aussitôt."""
+        if self.is_alive():
+            self.process.kill()
+
+    def stop(self):
+        """Arrête le processus s'il tourne."""
+        if self.desktop is not None:
+            try:
+                self.desktop.terminate()
+            except Exception:
+                pass
+            self.desktop = None
+        if self.process is not None:
+            if self.backend == UNOSERVER and self.process.poll() is None:
+                self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+            self.process = None
+
+    def recycle(self):
+        """Repart d'un processus et d'un profil neufs."""
+        logger.info("Recyclage de l'instance LibreOffice %s après %s conversions", self.index, self.jobs)
+        self.stop()
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+        self.jobs = 0
+
+    def convert(self, source_path, output_dir, timeout):
+        """
+        Convertit source_path en PDF dans output_dir et retourne le chemin du PDF.
+
+        Lève ConversionError si la conversion dépasse timeout secondes.
+        """
+        pdf_path = os.path.join(output_dir, Path(source_path).stem + '.pdf')
+        if self.backend == SUBPROCESS:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            self._run([
+                self.binary, f'-env:UserInstallation={self.profile_url}',
+                '--headless', '--norestore', '--convert-to', 'pdf',
+                '--outdir', output_dir, source_path,
+            ], timeout)
+        else:
+            if not self.is_alive():
+                self.start(timeout)
+            if self.backend == UNOSERVER:
+                self._run([
+                    get_setting('UNOCONVERT_BINARY'), '--host', '127.0.0.1', '--port', str(self.port),
+                    '--convert-to', 'pdf', os.path.abspath(source_path), os.path.abspath(pdf_path),
+                ], timeout)
+            else:
+                self._convert_uno(source_path, pdf_path, timeout)
+
+        if not os.path.exists(pdf_path):
+            raise ConversionError(f"LibreOffice n'a pas produit {pdf_path}")
+        self.jobs += 1
+        return pdf_path
+
+    def _run(self, command, timeout):
+        try:
+            subprocess.run(command, check=True, timeout=timeout, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        except subprocess.TimeoutExpired:
+            raise ConversionError(f"Conversion interrompue après {timeout} s (instance {self.index})")
+        except subprocess.CalledProcessError as e:
+            stderr = (e.stderr or b'').decode('utf-8', errors='replace').strip()
+            raise ConversionError(
+                f"Échec de la conversion (instance {self.index}, code {e.returncode}) : {stderr}"
+            )
+
+    def _convert_uno(self, source_path, pdf_path, timeout):
+        # Les appels UNO ne s'interrompent pas : le processus est tué au
+        # délai dépassé, ce qui fait échouer l'appel en cours
+        timer = threading.Timer(timeout, self.kill)
+        timer.daemon = True
+        timer.start()
+        try:
+            document = self.desktop.loadComponentFromURL(
+                uno.systemPathToFileUrl(os.path.abspath(source_path)), '_blank', 0,
+                (_uno_property('Hidden', True),)
+            )
+            try:
+                document.storeToURL(
+                    uno.systemPathToFileUrl(os.path.abspath(pdf_path)),
+                    (_uno_property('FilterName', 'writer_pdf_Export'),)
+                )
+            finally:
+                document.close(True)
+        except Exception:
+            if timer.finished.is_set():
+                raise ConversionError(f"Conversion interrompue après {timeout} s (instance {self.index})")
+            raise
+        finally:
+            timer.cancel()
+
+
+class LibreOfficePool:
+    """
+    Pool d'instances LibreOffice headless.
+
+    Les instances sont démarrées à la première conversion qui les utilise,
+    puis réutilisées tant qu'elles n'ont pas atteint max_jobs conversions.
+    Une instance en erreur (processus mort, délai dépassé) est recyclée : la
+    conversion suivante démarre un processus neuf.
+    """
+
+    def __init__(self, size, max_jobs, binary='libreoffice', timeout=120, profile_root=None,
+                 instance_class=SofficeInstance):
+        self.size = size
+        self.max_jobs = max_jobs
+        self.timeout = timeout
+        # Un dossier de profils propre à chaque processus (plusieurs workers gunicorn)
+        self.profile_root = tempfile.mkdtemp(prefix='gendoc_soffice_', dir=profile_root)
+        self._instances = [instance_class(i, binary, self.profile_root) for i in range(size)]
+        self._idle = queue.Queue()
+        for instance in self._instances:
+            self._idle.put(instance)
+
+    def convert(self, source_path, output_dir):
+        """Confie la conversion à une instance libre et retourne le chemin du PDF."""
+        try:
+            instance = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise ConversionError("Aucune instance LibreOffice disponible")
+
+        try:
+            return instance.convert(source_path, output_dir, self.timeout)
+        except Exception:
+            # Une instance en erreur est repartie de zéro à la prochaine utilisation
+            instance.recycle()
+            raise
+        finally:
+            if instance.jobs >= self.max_jobs:
+                instance.recycle()
+            self._idle.put(instance)
+
+    def shutdown(self):
+        for instance in self._instances:
+            instance.stop()
+        shutil.rmtree(self.profile_root, ignore_errors=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Retourne le pool du processus courant, créé à la première utilisation."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = LibreOfficePool(
+                    size=get_setting('PDF_POOL_SIZE'),
+                    max_jobs=get_setting('PDF_POOL_MAX_JOBS'),
+                    binary=get_setting('LIBREOFFICE_BINARY'),
+                    timeout=get_setting('PDF_POOL_TIMEOUT'),
+                    profile_root=get_setting('PDF_POOL_PROFILE_DIR'),
+                )
+                if get_backend() == SUBPROCESS:
+                    logger.warning(
+                        "Ni le module uno ni unoserver ne sont disponibles : "
+                        "chaque conversion PDF démarre LibreOffice"
+                    )
+                atexit.register(_pool.shutdown)
+    return _pool
+
+
+def convert_to_pdf(source_path, output_dir):
+    """Convertit un fichier DOCX en PDF dans output_dir et retourne le chemin du PDF."""
+    if platform.system() == 'Windows':
+        import pythoncom
+        from docx2pdf import convert
+
+        pdf_path = os.path.join(output_dir, Path(source_path).stem + '.pdf')
+        pythoncom.CoInitialize()
+        try:
+            convert(source_path, pdf_path)
+        finally:
+            pythoncom.CoUninitialize()
+        return pdf_path
+
+    return get_pool().convert(source_path, output_dir)
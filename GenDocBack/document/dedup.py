@@ -0,0 +1,89 @@
+"""
+Réutilisation des documents déjà générés.
+
+Chaque document porte une empreinte calculée à partir du contenu du template,
+des réponses normalisées et du format. Une nouvelle demande avec la même
+empreinte qu'un document terminé référence le fichier existant au lieu de le
+régénérer (et de le reconvertir en PDF).
+"""
+
+import hashlib
+import json
+import logging
+
+from .compiler import read_template_bytes
+from .models import DocumentGenere, Question, TemplateDocument
+
+logger = logging.getLogger(__name__)
+
+# À incrémenter quand le rendu change : les anciens fichiers ne sont plus réutilisés
+RENDER_VERSION = 1
+
+
+def template_fingerprint(template):
+    """sha256 du fichier du template (calculé puis conservé s'il manque)."""
+    if not template.empreinte_fichier:
+        template.empreinte_fichier = hashlib.sha256(read_template_bytes(template)).hexdigest()
+        TemplateDocument.objects.filter(pk=template.pk).update(empreinte_fichier=template.empreinte_fichier)
+    return template.empreinte_fichier
+
+
+def normalize_reponses(reponses_data, questions):
+    """
+    Réponses sous une forme canonique : [label, variable, valeur] triés.
+    questions : {id: (label, variable)} ; les réponses sans question sont ignorées.
+    La dernière réponse à une même question l'emporte, comme à la génération.
+    """
+    valeurs = {}
+    for r in reponses_data:
+        question_id = int(r['question'])
+        if question_id in questions:
+            valeurs[question_id] = str(r['valeur']).replace('\r\n', '\n')
+    return sorted([*questions[question_id], valeur] for question_id, valeur in valeurs.items())
+
+
+def document_fingerprint(template, format, reponses_data, questions=None):
+    """Empreinte (sha256) du document qui serait produit par ces réponses."""
+    if questions is None:
+        ids = {int(r['question']) for r in reponses_data}
+        questions = {
+            question_id: (label, variable)
+            for question_id, label, variable in Question.objects.filter(id__in=ids).values_list('id', 'label', 'variable')
+        }
+    payload = json.dumps(
+        [RENDER_VERSION, template_fingerprint(template), format, normalize_reponses(reponses_data, questions)],
+        ensure_ascii=False, separators=(',', ':')
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def find_reusable(empreinte, exclude_pk=None):
+    """Document terminé de même empreinte dont le fichier existe encore, ou None."""
+    if not empreinte:
+        return None
+    candidates = (
+        DocumentGenere.objects
+        .filter(empreinte=empreinte, status='done')
+        .exclude(fichier='').exclude(fichier__isnull=True)
+        .exclude(pk=exclude_pk)
+        .order_by('-date_generation')
+    )
+    for candidate in candidates[:3]:
+        if candidate.fichier.storage.exists(candidate.fichier.name):
+            return candidate
+    return None
+
+
+def reuse_existing(document):
+    """
+    Attache à document le fichier d'un document identique déjà généré.
+    Retourne True si un fichier a été réutilisé (le document est alors 'done').
+    """
+    existing = find_reusable(document.empreinte, exclude_pk=document.pk)
+    if existing is None:
+        return False
+    document.fichier.name = existing.fichier.name
+    document.status = 'done'
+    document.save(update_fields=['fichier', 'status'])
+    logger.info("Document %s : fichier du document %s réutilisé", document.pk, existing.pk)
+    return True
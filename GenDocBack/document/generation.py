@@ -0,0 +1,125 @@
+"""
+Génération des fichiers de documents (DOCX ou PDF) à partir des templates Word.
+
+Utilisé à la fois par l'API (mode synchrone) et par le worker de la file
+d'attente (commande generation_worker).
+"""
+
+import io
+import os
+import re
+import tempfile
+import traceback
+
+from django.core.files import File
+from docx import Document
+
+from .compiler import load_compiled, read_template_bytes
+from .conversion import convert_to_pdf
+from .models import Question
+from .rendering import replace_text_in_docx
+
+
+def produire_fichier(document_obj, reponses_data):
+    """
+    Génère le fichier final (DOCX ou PDF) en remplaçant les variables
+    et l'attache à document_obj.fichier (sans enregistrer le document).
+
+    Lève une exception si la génération échoue.
+    """
+    if not document_obj.template.fichier:
+        raise FileNotFoundError("Aucun fichier template trouve")
+
+    if not os.path.exists(document_obj.template.fichier.path):
+        raise FileNotFoundError("Fichier template introuvable sur le disque")
+
+    # Construction du dictionnaire de remplacement (une seule requête pour les questions)
+    questions = Question.objects.only('id', 'label', 'variable').in_bulk(
+        {r['question'] for r in reponses_data}
+    )
+    replacements = {}
+    for r in reponses_data:
+        question = questions.get(int(r['question']))
+        if question is None:
+            print(f"[WARN] Question ID {r['question']} non trouvee")
+            continue
+        valeur = r['valeur']
+
+        # Utiliser le label original (tel qu'il apparaît dans le fichier)
+        replacements[question.label] = valeur
+        # Aussi ajouter le slug au cas où le template utilise ce format
+        replacements[question.variable] = valeur
+        print(f"[MAP] {{{question.label}}} -> {valeur}")
+
+    # Template compilé (rendu par simple assemblage), sinon python-docx
+    try:
+        compiled = load_compiled(document_obj.template)
+    except Exception as e:
+        print(f"[WARN] Template compile indisponible : {e}")
+        compiled = None
+
+    # Rendu en mémoire
+    if compiled is not None:
+        buffer = io.BytesIO(compiled.render(read_template_bytes(document_obj.template), replacements))
+        print("[OK] Remplacements effectues (template compile)")
+    else:
+        # Ouvrir le document Word template
+        doc = Document(io.BytesIO(read_template_bytes(document_obj.template)))
+        print(f"[OK] Template charge : {document_obj.template.fichier.name}")
+
+        # DEBUG : Afficher toutes les variables trouvées dans le document
+        all_text = "\n".join([p.text for p in doc.paragraphs])
+        variables_in_doc = re.findall(r'\{([^}]+)\}', all_text)
+        print(f"[DEBUG] Variables detectees dans le template : {set(variables_in_doc)}")
+        print(f"[DEBUG] Variables a remplacer : {list(replacements.keys())}")
+
+        # Effectuer les remplacements
+        replace_text_in_docx(doc, replacements)
+        print("[OK] Remplacements effectues")
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        buffer.seek(0)
+
+    ext = 'pdf' if document_obj.format == 'pdf' else 'docx'
+    final_name = f"document_{document_obj.id}.{ext}"
+
+    if document_obj.format != 'pdf':
+        # DOCX : le buffer part directement vers le stockage
+        document_obj.fichier.save(final_name, File(buffer), save=False)
+        print(f"[OK] Fichier final sauvegarde : {final_name}")
+        return
+
+    # Conversion en PDF : seul le convertisseur a besoin de fichiers sur le disque
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        temp_docx = os.path.join(tmp_dir, 'out.docx')
+        with open(temp_docx, 'wb') as f:
+            f.write(buffer.getbuffer())
+
+        print("[INFO] Conversion en PDF...")
+        final_path = convert_to_pdf(temp_docx, tmp_dir)
+        print("[OK] Conversion PDF reussie")
+
+        # Le PDF est transmis au stockage par morceaux, sans être chargé en mémoire
+        with open(final_path, 'rb') as f:
+            document_obj.fichier.save(final_name, File(f), save=False)
+
+        print(f"[OK] Fichier final sauvegarde : {final_name}")
+
+
+def generer_fichier(document_obj, reponses_data):
+    """
+    Génère le fichier du document et met à jour son statut (done / error).
+    Retourne True si la génération a réussi.
+    """
+    try:
+        produire_fichier(document_obj, reponses_data)
+    except Exception as e:
+        print(f"[ERREUR] Erreur generation : {e}")
+        traceback.print_exc()
+        document_obj.status = 'error'
+        document_obj.save()
+        return False
+
+    document_obj.status = 'done'
+    document_obj.save()
+    return True
@@ -0,0 +1,263 @@
+"""
+Import en masse de templates Word depuis une archive ZIP.
+
+Les variables de chaque fichier sont extraites (et le template compilé) en
+parallèle dans des processus séparés ; les templates, formulaires et
+questions sont ensuite créés par bulk_create dans une seule transaction.
+Un fichier illisible n'empêche pas l'import des autres : il est signalé
+dans le rapport.
+
+L'archive peut contenir un manifest.json associant chaque fichier à une
+catégorie (identifiant ou nom) et, éventuellement, à un nom de template :
+
+    {
+        "contrats/cdi.docx": {"categorie": "Contrats", "nom": "Contrat CDI"},
+        "attestation.docx": 3
+    }
+"""
+
+import json
+import logging
+import os
+import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from . import catalogue
+from .compiler import compile_docx
+from .conf import get_setting
+from .models import CategorieTemplate, Formulaire, Question, TemplateDocument
+from .scanner import infer_type, scan_docx
+from .validation import invalidate_plan
+from .variable_index import index_questions, normalize_variable
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+
+
+class IngestionError(Exception):
+    """Archive inutilisable dans son ensemble (format, manifest, taille)."""
+
+
+def analyse_template(data):
+    """Extrait les variables et compile un DOCX (exécuté dans un processus du pool)."""
+    variables = scan_docx(BytesIO(data)).variables
+    try:
+        compiled = compile_docx(data)
+    except ValueError:
+        # Le template sera rendu avec python-docx
+        compiled = None
+    return variables, compiled
+
+
+def _members(archive):
+    """Fichiers .docx de l'archive (hors dossiers et métadonnées macOS)."""
+    max_bytes = get_setting('INGESTION_MAX_FILE_BYTES')
+    members = []
+    for info in archive.infolist():
+        path = PurePosixPath(info.filename)
+        if info.is_dir() or path.suffix.lower() != '.docx':
+            continue
+        if '__MACOSX' in path.parts or path.name.startswith(('.', '~$')):
+            continue
+        members.append((info, info.file_size > max_bytes))
+    if len(members) > get_setting('INGESTION_MAX_FILES'):
+        raise IngestionError(f"L'archive contient plus de {get_setting('INGESTION_MAX_FILES')} templates")
+    return members
+
+
+def _read_manifest(archive):
+    try:
+        raw = archive.read(MANIFEST_NAME)
+    except KeyError:
+        return {}
+    try:
+        manifest = json.loads(raw.decode('utf-8-sig'))
+    except (UnicodeDecodeError, ValueError) as e:
+        raise IngestionError(f"{MANIFEST_NAME} invalide : {e}")
+    if not isinstance(manifest, dict):
+        raise IngestionError(f"{MANIFEST_NAME} doit être un objet JSON {{fichier: catégorie}}")
+    return manifest
+
+
+def _resolve_categorie(entry, categories):
+    """Catégorie d'une entrée du manifest (identifiant, nom ou {'categorie': ...})."""
+    if isinstance(entry, dict):
+        entry = entry.get('categorie')
+    if entry in (None, ''):
+        return None
+    if isinstance(entry, int) or str(entry).isdigit():
+        categorie = categories['ids'].get(int(entry))
+    else:
+        categorie = categories['noms'].get(str(entry).strip().lower())
+    if categorie is None:
+        raise ValueError(f"Catégorie inconnue : {entry}")
+    return categorie
+
+
+def _analyse_all(contents):
+    """Analyse tous les fichiers, en parallèle si possible. Retourne (variables, compilé) ou exception."""
+    workers = get_setting('BATCH_WORKERS') or os.cpu_count() or 1
+    workers = min(workers, len(contents))
+    if workers <= 1:
+        results = []
+        for data in contents:
+            try:
+                results.append(analyse_template(data))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(analyse_template, data) for data in contents]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+
+def ingest_archive(source, categorie=None, actif=False):
+    """
+    Importe les templates .docx d'une archive ZIP (chemin ou fichier ouvert).
+
+    categorie : catégorie par défaut des fichiers absents du manifest.
+    actif : statut des templates créés (False = en attente de validation).
+    Retourne le rapport d'import, un résultat par fichier.
+    """
+    try:
+        archive = zipfile.ZipFile(source)
+    except zipfile.BadZipFile:
+        raise IngestionError("Le fichier n'est pas une archive ZIP valide")
+
+    with archive:
+        manifest = _read_manifest(archive)
+        members = _members(archive)
+        categories = {'ids': {}, 'noms': {}}
+        for item in CategorieTemplate.objects.all():
+            categories['ids'][item.id] = item
+            categories['noms'][item.nom.strip().lower()] = item
+
+        resultats = []
+        candidats = []  # (resultat, info, nom, categorie, contenu)
+        for info, trop_gros in members:
+            entry = manifest.get(info.filename)
+            resultat = {'fichier': info.filename, 'template': None, 'questions': 0, 'erreur': None}
+            resultats.append(resultat)
+            if trop_gros:
+                resultat['erreur'] = "Fichier trop volumineux"
+                continue
+            try:
+                categorie_fichier = _resolve_categorie(entry, categories) or categorie
+                contenu = archive.read(info)
+            except (ValueError, NotImplementedError, zipfile.BadZipFile, zlib.error) as e:
+                resultat['erreur'] = str(e)
+                continue
+            nom = (entry.get('nom') if isinstance(entry, dict) else None) or PurePosixPath(info.filename).stem
+            nom = str(nom)[:TemplateDocument._meta.get_field('nom').max_length]
+            candidats.append((resultat, info, nom, categorie_fichier, contenu))
+
+    analyses = _analyse_all([contenu for *_, contenu in candidats])
+    valides = []
+    for candidat, analyse in zip(candidats, analyses):
+        if isinstance(analyse, Exception):
+            candidat[0]['erreur'] = f"Fichier .docx illisible : {analyse}"
+        else:
+            valides.append((candidat, analyse))
+
+    if valides:
+        _create_templates(valides, actif)
+
+    return {
+        'total': len(resultats),
+        'crees': sum(1 for r in resultats if r['template']),
+        'echecs': sum(1 for r in resultats if r['erreur']),
+        'resultats': resultats,
+    }
+
+
+def _create_templates(valides, actif):
+    """Enregistre les fichiers puis crée templates, formulaires et questions en une transaction."""
+    upload_to = TemplateDocument._meta.get_field('fichier').upload_to
+    compile_to = TemplateDocument._meta.get_field('fichier_compile').upload_to
+    saved = []
+    try:
+        noms_fichiers = []
+        for (resultat, info, nom, categorie, contenu), analyse in valides:
+            name = default_storage.save(
+                os.path.join(upload_to, PurePosixPath(info.filename).name), ContentFile(contenu)
+            )
+            saved.append(name)
+            noms_fichiers.append(name)
+
+        compiles = []
+        for name, ((resultat, info, nom, categorie, contenu), (variables, compiled)) in zip(noms_fichiers, valides):
+            if compiled is None:
+                compiles.append((None, ''))
+                continue
+            compiled['source'] = name
+            compile_name = default_storage.save(
+                os.path.join(compile_to, f"{PurePosixPath(name).stem}.json"),
+                ContentFile(json.dumps(compiled).encode('utf-8'))
+            )
+            saved.append(compile_name)
+            compiles.append((compile_name, compiled['empreinte']))
+
+        with transaction.atomic():
+            templates = TemplateDocument.objects.bulk_create([
+                TemplateDocument(
+                    nom=nom,
+                    categorie=categorie,
+                    fichier=name,
+                    fichier_compile=compile_name,
+                    empreinte_fichier=empreinte,
+                    status=actif,
+                )
+                for name, (compile_name, empreinte), ((resultat, info, nom, categorie, contenu), analyse)
+                in zip(noms_fichiers, compiles, valides)
+            ])
+
+            avec_variables = [
+                (template, variables)
+                for template, (candidat, (variables, compiled)) in zip(templates, valides)
+                if variables
+            ]
+            formulaires = Formulaire.objects.bulk_create([
+                Formulaire(template=template, titre=template.nom)
+                for template, variables in avec_variables
+            ])
+            questions = Question.objects.bulk_create([
+                Question(
+                    formulaire=formulaire,
+                    label=variable.strip()[:255],
+                    variable=normalize_variable(variable)[:100],
+                    type_champ=infer_type(variable),
+                    obligatoire=True,
+                )
+                for formulaire, (template, variables) in zip(formulaires, avec_variables)
+                for variable in variables
+            ])
+            index_questions(questions)
+    except Exception:
+        for name in saved:
+            default_storage.delete(name)
+        raise
+
+    nb_questions = {}
+    for question in questions:
+        nb_questions[question.formulaire.template_id] = nb_questions.get(question.formulaire.template_id, 0) + 1
+    for template, (candidat, analyse) in zip(templates, valides):
+        candidat[0]['template'] = template.id
+        candidat[0]['questions'] = nb_questions.get(template.id, 0)
+        invalidate_plan(template.id)
+    catalogue.bump_version()
+    logger.info("Import ZIP : %s templates, %s questions", len(templates), len(questions))
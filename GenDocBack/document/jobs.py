@@ -0,0 +1,132 @@
+"""
+File d'attente de génération adossée à la base de données.
+
+Un document mis en file reste au statut 'pending' avec une date de prochaine
+tentative. Un worker (commande generation_worker) le réclame en le passant à
+'processing' avec un verrou limité dans le temps : si le worker meurt, le
+verrou expire et le document redevient réclamable. En cas d'échec, le
+document est replanifié avec un délai croissant jusqu'au nombre maximal de
+tentatives, puis passe au statut 'error'.
+
+Aucun broker n'est nécessaire : la réclamation utilise
+select_for_update(skip_locked=True) quand la base le permet, et une mise à
+jour conditionnelle qui garantit qu'un seul worker obtient le document.
+"""
+
+import logging
+import os
+import socket
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .conf import get_setting
+from .dedup import find_reusable
+from .generation import produire_fichier
+from .models import DocumentGenere
+
+logger = logging.getLogger(__name__)
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue_document(document):
+    """Place un document 'pending' dans la file d'attente."""
+    document.status = 'pending'
+    document.prochaine_tentative = timezone.now()
+    document.verrou_expire_le = None
+    document.save(update_fields=['status', 'prochaine_tentative', 'verrou_expire_le'])
+
+
+def claim_next_document(visibility_timeout=None):
+    """
+    Réclame le prochain document à générer et le passe au statut 'processing'.
+    Retourne None si la file est vide.
+    """
+    if visibility_timeout is None:
+        visibility_timeout = get_setting('QUEUE_VISIBILITY_TIMEOUT')
+    now = timezone.now()
+
+    # Un document qui a fait tomber son worker à chaque tentative est abandonné
+    DocumentGenere.objects.filter(
+        status='processing',
+        verrou_expire_le__lt=now,
+        tentatives__gte=get_setting('QUEUE_MAX_ATTEMPTS'),
+    ).update(status='error', verrou_expire_le=None, derniere_erreur="Délai de traitement dépassé")
+
+    candidates = DocumentGenere.objects.filter(
+        Q(status='pending', prochaine_tentative__lte=now)
+        # Documents dont le worker a disparu avant la fin du délai de traitement
+        | Q(status='processing', verrou_expire_le__lt=now)
+    ).order_by('prochaine_tentative', 'id')
+
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        document = candidates.first()
+        if document is None:
+            return None
+
+        claimed = DocumentGenere.objects.filter(
+            pk=document.pk,
+            status=document.status,
+            tentatives=document.tentatives,
+        ).update(
+            status='processing',
+            tentatives=F('tentatives') + 1,
+            verrou_expire_le=now + timedelta(seconds=visibility_timeout),
+        )
+    if not claimed:
+        # Un autre worker a été plus rapide
+        return None
+
+    document.refresh_from_db()
+    return document
+
+
+def run_document_job(document):
+    """
+    Génère le fichier d'un document réclamé.
+    Retourne True si la génération a réussi.
+    """
+    reponses_data = [
+        {'question': question_id, 'valeur': valeur}
+        for question_id, valeur in document.reponses.values_list('question_id', 'valeur')
+    ]
+    # Le document ne nous appartient plus si un autre worker l'a repris
+    # après expiration du verrou (nombre de tentatives différent)
+    owned = DocumentGenere.objects.filter(pk=document.pk, tentatives=document.tentatives)
+
+    # Un document identique a pu être généré depuis la mise en file
+    existing = find_reusable(document.empreinte, exclude_pk=document.pk)
+    if existing is not None:
+        owned.update(status='done', fichier=existing.fichier.name, verrou_expire_le=None, derniere_erreur='')
+        logger.info("Document %s : fichier du document %s réutilisé", document.pk, existing.pk)
+        return True
+
+    try:
+        produire_fichier(document, reponses_data)
+    except Exception as e:
+        logger.exception("Echec de generation du document %s (tentative %s)", document.pk, document.tentatives)
+        if document.tentatives >= get_setting('QUEUE_MAX_ATTEMPTS'):
+            owned.update(status='error', verrou_expire_le=None, derniere_erreur=str(e))
+        else:
+            delay = get_setting('QUEUE_RETRY_BACKOFF') * 2 ** (document.tentatives - 1)
+            owned.update(
+                status='pending',
+                verrou_expire_le=None,
+                prochaine_tentative=timezone.now() + timedelta(seconds=delay),
+                derniere_erreur=str(e),
+            )
+        return False
+
+    owned.update(
+        status='done',
+        fichier=document.fichier.name,
+        verrou_expire_le=None,
+        derniere_erreur='',
+    )
+    logger.info("Document %s genere par %s", document.pk, WORKER_ID)
+    return True
@@ -0,0 +1,65 @@
+"""
+Worker de génération asynchrone des documents.
+
+    python manage.py generation_worker            # tourne en continu
+    python manage.py generation_worker --once     # vide la file puis s'arrête
+
+Plusieurs workers peuvent tourner en parallèle (sur une ou plusieurs machines) :
+chaque document n'est réclamé que par un seul d'entre eux.
+"""
+
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+
+from document.conf import get_setting
+from document.jobs import WORKER_ID, claim_next_document, run_document_job
+
+
+class Command(BaseCommand):
+    help = "Génère en arrière-plan les documents mis en file d'attente (statut 'pending')."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Traite les documents disponibles puis s'arrête"
+        )
+        parser.add_argument(
+            '--max-jobs', type=int, default=0,
+            help="Nombre de documents à traiter avant de s'arrêter (0 = illimité)"
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=None,
+            help="Secondes d'attente quand la file est vide"
+        )
+
+    def handle(self, *args, **options):
+        poll_interval = options['poll_interval'] or get_setting('QUEUE_POLL_INTERVAL')
+        max_jobs = options['max_jobs']
+        self._stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        self.stdout.write(f"Worker {WORKER_ID} démarré")
+        processed = 0
+        while not self._stopping:
+            document = claim_next_document()
+            if document is None:
+                if options['once']:
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            ok = run_document_job(document)
+            processed += 1
+            label = "OK" if ok else "ECHEC"
+            self.stdout.write(f"[{label}] Document {document.pk} (tentative {document.tentatives})")
+            if max_jobs and processed >= max_jobs:
+                break
+
+        self.stdout.write(f"Worker {WORKER_ID} arrêté après {processed} document(s)")
+
+    def _stop(self, signum, frame):
+        # On termine le document en cours avant de s'arrêter
+        self._stopping = True
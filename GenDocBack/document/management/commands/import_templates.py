@@ -0,0 +1,49 @@
+"""
+Import en masse de templates Word depuis une archive ZIP.
+
+    python manage.py import_templates clients.zip
+    python manage.py import_templates clients.zip --categorie 3 --actif
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from document.ingestion import IngestionError, ingest_archive
+from document.models import CategorieTemplate
+
+
+class Command(BaseCommand):
+    help = "Importe les templates .docx d'une archive ZIP (manifest.json optionnel)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('archive', help="Chemin de l'archive ZIP")
+        parser.add_argument(
+            '--categorie', type=int, default=None,
+            help="Identifiant de la catégorie des fichiers absents du manifest"
+        )
+        parser.add_argument(
+            '--actif', action='store_true',
+            help="Active directement les templates (sinon en attente de validation)"
+        )
+
+    def handle(self, *args, **options):
+        categorie = None
+        if options['categorie'] is not None:
+            try:
+                categorie = CategorieTemplate.objects.get(pk=options['categorie'])
+            except CategorieTemplate.DoesNotExist:
+                raise CommandError(f"Catégorie {options['categorie']} introuvable")
+
+        try:
+            rapport = ingest_archive(options['archive'], categorie=categorie, actif=options['actif'])
+        except (IngestionError, OSError) as e:
+            raise CommandError(str(e))
+
+        for resultat in rapport['resultats']:
+            if resultat['erreur']:
+                self.stderr.write(f"[ECHEC] {resultat['fichier']} : {resultat['erreur']}")
+            else:
+                self.stdout.write(
+                    f"[OK] {resultat['fichier']} -> template {resultat['template']} "
+                    f"({resultat['questions']} questions)"
+                )
+        self.stdout.write(f"{rapport['crees']}/{rapport['total']} templates importés, {rapport['echecs']} échec(s)")
@@ -0,0 +1,17 @@
+"""
+Purge des traces de suppression du catalogue plus anciennes que
+DOCUMENT_GENERATION['SYNC_TOMBSTONE_RETENTION'] jours.
+
+    python manage.py purge_suppressions
+"""
+
+from django.core.management.base import BaseCommand
+
+from document.sync import purge_tombstones
+
+
+class Command(BaseCommand):
+    help = "Supprime les traces de suppression expirées (synchronisation différentielle)."
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{purge_tombstones()} trace(s) de suppression purgée(s)")
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.10 on 2026-10-18 12:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('document', '0004_documentgenere_user'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentgenere',
+            name='derniere_erreur',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='documentgenere',
+            name='prochaine_tentative',
+            field=models.DateTimeField(blank=True, help_text='Date à partir de laquelle un worker peut prendre le document', null=True),
+        ),
+        migrations.AddField(
+            model_name='documentgenere',
+            name='tentatives',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='documentgenere',
+            name='verrou_expire_le',
+            field=models.DateTimeField(blank=True, help_text='Fin du délai de traitement accordé au worker en cours', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='documentgenere',
+            index=models.Index(fields=['status', 'prochaine_tentative'], name='docgen_file_attente_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.10 on 2026-10-18 12:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('document', '0005_documentgenere_file_attente'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='templatedocument',
+            name='empreinte_fichier',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='templatedocument',
+            name='fichier_compile',
+            field=models.FileField(blank=True, editable=False, null=True, upload_to='templates/compiles/'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-18 12:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('document', '0006_templatedocument_compile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentgenere',
+            name='empreinte',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.10 on 2026-10-18 12:51
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def remplir_index(apps, schema_editor):
+    """Indexe les questions existantes."""
+    Question = apps.get_model('document', 'Question')
+    VariableTemplate = apps.get_model('document', 'VariableTemplate')
+    questions = Question.objects.values_list('id', 'variable', 'formulaire__template_id').iterator(chunk_size=2000)
+    batch = []
+    for question_id, variable, template_id in questions:
+        batch.append(VariableTemplate(
+            variable=re.sub(r'[^\w]+', '_', variable.strip().lower()).strip('_'),
+            template_id=template_id,
+            question_id=question_id,
+        ))
+        if len(batch) >= 2000:
+            VariableTemplate.objects.bulk_create(batch)
+            batch = []
+    VariableTemplate.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('document', '0007_documentgenere_empreinte'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VariableTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('variable', models.CharField(max_length=100)),
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='index_variable', to='document.question')),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='index_variables', to='document.templatedocument')),
+            ],
+            options={
+                'verbose_name': 'Variable de template',
+                'verbose_name_plural': 'Index des variables',
+                'indexes': [models.Index(fields=['variable', 'template'], name='docvar_variable_template_idx')],
+            },
+        ),
+        migrations.RunPython(remplir_index, migrations.RunPython.noop),
+    ]
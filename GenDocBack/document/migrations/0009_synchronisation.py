@@ -0,0 +1,46 @@
+# Generated by Django 5.2.10 on 2026-10-18 16:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('document', '0008_variabletemplate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='formulaire',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='templatedocument',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.CreateModel(
+            name='Suppression',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modele', models.CharField(choices=[('template', 'Template'), ('formulaire', 'Formulaire'), ('question', 'Question')], max_length=20)),
+                ('objet_id', models.PositiveIntegerField()),
+                ('date_suppression', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Suppression',
+                'verbose_name_plural': 'Suppressions',
+                'indexes': [models.Index(fields=['modele', 'date_suppression'], name='docsup_modele_date_idx')],
+            },
+        ),
+    ]
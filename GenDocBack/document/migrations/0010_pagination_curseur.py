@@ -0,0 +1,23 @@
+# Generated by Django 5.2.10 on 2026-10-18 13:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('document', '0009_synchronisation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='documentgenere',
+            index=models.Index(fields=['date_generation', 'id'], name='docgen_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reponsequestion',
+            index=models.Index(fields=['date_add', 'id'], name='docrep_date_id_idx'),
+        ),
+    ]
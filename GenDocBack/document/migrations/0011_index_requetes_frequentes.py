@@ -0,0 +1,35 @@
+# Generated by Django 5.2.10 on 2026-10-18 13:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('document', '0010_pagination_curseur'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='documentgenere',
+            index=models.Index(fields=['user', 'date_generation', 'id'], name='docgen_user_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(condition=models.Q(('obligatoire', True)), fields=['formulaire'], name='docq_form_oblig_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reponsequestion',
+            index=models.Index(fields=['document', 'date_add', 'id'], name='docrep_doc_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='templatedocument',
+            index=models.Index(condition=models.Q(('status', True)), fields=['date_add'], name='doctpl_actifs_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='templatedocument',
+            index=models.Index(condition=models.Q(('status', True)), fields=['categorie', 'date_add'], name='doctpl_actifs_cat_date_idx'),
+        ),
+    ]
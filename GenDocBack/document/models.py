@@ -34,12 +34,26 @@ class TemplateDocument(models.Model):
     )
     nom = models.CharField(max_length=255)
     fichier = models.FileField(upload_to='templates/')
+    # Template compilé (voir compiler.py), invalidé quand le fichier change
+    fichier_compile = models.FileField(upload_to='templates/compiles/', blank=True, null=True, editable=False)
+    empreinte_fichier = models.CharField(max_length=64, blank=True, editable=False)
     date_add = models.DateTimeField(auto_now_add=True)
+    # Synchronisation différentielle du catalogue (?since=, voir sync.py)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     status = models.BooleanField(default=True)
 
     class Meta:
         verbose_name = 'Template document'
         verbose_name_plural = 'Templates documents'
+        indexes = [
+            # Catalogue public et templates d'une catégorie, du plus récent au plus ancien.
+            # Index partiels : Django écrit le filtre status=True « WHERE status »,
+            # qu'un index (status, date_add) ne sert pas sous SQLite
+            models.Index(fields=['date_add'], condition=models.Q(status=True), name='doctpl_actifs_date_idx'),
+            models.Index(
+                fields=['categorie', 'date_add'], condition=models.Q(status=True), name='doctpl_actifs_cat_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.nom
@@ -53,6 +67,7 @@ class Formulaire(models.Model):
     )
     titre = models.CharField(max_length=255)
     date_add = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         verbose_name = 'Formulaire'
@@ -86,15 +101,45 @@ class Question(models.Model):
         choices=TYPE_CHAMP_CHOICES
     )
     obligatoire = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         verbose_name = 'Question'
         verbose_name_plural = 'Questions'
+        indexes = [
+            # Questions obligatoires d'un formulaire (index partiel, voir TemplateDocument)
+            models.Index(fields=['formulaire'], condition=models.Q(obligatoire=True), name='docq_form_oblig_idx'),
+        ]
 
     def __str__(self):
         return self.label
 
 
+class VariableTemplate(models.Model):
+    """Index inversé : variable normalisée -> templates et questions qui l'utilisent"""
+    variable = models.CharField(max_length=100)
+    template = models.ForeignKey(
+        TemplateDocument,
+        on_delete=models.CASCADE,
+        related_name='index_variables'
+    )
+    question = models.OneToOneField(
+        Question,
+        on_delete=models.CASCADE,
+        related_name='index_variable'
+    )
+
+    class Meta:
+        verbose_name = 'Variable de template'
+        verbose_name_plural = 'Index des variables'
+        indexes = [
+            models.Index(fields=['variable', 'template'], name='docvar_variable_template_idx'),
+        ]
+
+    def __str__(self):
+        return self.variable
+
+
 class ChoixQuestion(models.Model):
     question = models.ForeignKey(
         Question,
@@ -107,6 +152,33 @@ class ChoixQuestion(models.Model):
         return self.valeur
 
 
+class Suppression(models.Model):
+    """Trace d'un objet du catalogue supprimé, pour la synchronisation différentielle"""
+    TEMPLATE = 'template'
+    FORMULAIRE = 'formulaire'
+    QUESTION = 'question'
+
+    MODELE_CHOICES = [
+        (TEMPLATE, 'Template'),
+        (FORMULAIRE, 'Formulaire'),
+        (QUESTION, 'Question'),
+    ]
+
+    modele = models.CharField(max_length=20, choices=MODELE_CHOICES)
+    objet_id = models.PositiveIntegerField()
+    date_suppression = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Suppression'
+        verbose_name_plural = 'Suppressions'
+        indexes = [
+            models.Index(fields=['modele', 'date_suppression'], name='docsup_modele_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.modele} {self.objet_id}"
+
+
 class TypeDocument(models.Model):
     nom = models.CharField(max_length=50)
     extension = models.CharField(max_length=10)
@@ -161,9 +233,33 @@ class DocumentGenere(models.Model):
     )
     date_generation = models.DateTimeField(auto_now_add=True)
 
+    # File d'attente de génération asynchrone (commande generation_worker)
+    tentatives = models.PositiveIntegerField(default=0)
+    prochaine_tentative = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Date à partir de laquelle un worker peut prendre le document"
+    )
+    verrou_expire_le = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Fin du délai de traitement accordé au worker en cours"
+    )
+    derniere_erreur = models.TextField(blank=True)
+
+    # Empreinte du template, des réponses et du format (voir dedup.py)
+    empreinte = models.CharField(max_length=64, blank=True, db_index=True)
+
     class Meta:
         verbose_name = 'Document généré'
         verbose_name_plural = 'Documents générés'
+        indexes = [
+            models.Index(fields=['status', 'prochaine_tentative'], name='docgen_file_attente_idx'),
+            # Pagination par curseur (voir pagination.py)
+            models.Index(fields=['date_generation', 'id'], name='docgen_date_id_idx'),
+            # Historique d'un utilisateur
+            models.Index(fields=['user', 'date_generation', 'id'], name='docgen_user_date_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.template.nom} ({self.format})"
@@ -186,6 +282,11 @@ class ReponseQuestion(models.Model):
     class Meta:
         verbose_name = 'Réponse question'
         verbose_name_plural = 'Réponses questions'
+        indexes = [
+            models.Index(fields=['date_add', 'id'], name='docrep_date_id_idx'),
+            # Réponses d'un document, dans l'ordre de la pagination
+            models.Index(fields=['document', 'date_add', 'id'], name='docrep_doc_date_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.question.label} : {self.valeur}"
\ No newline at end of file
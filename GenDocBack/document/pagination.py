@@ -0,0 +1,156 @@
+"""
+Pagination par curseur (keyset) des documents générés et des réponses.
+
+Chaque page est lue par une condition sur le couple (date, id) du dernier
+élément de la page précédente, servie par un index composite : le coût d'une
+page ne dépend ni de sa position ni de la taille de la table, contrairement à
+PageNumberPagination (COUNT(*) puis OFFSET). L'id départage les éléments de
+même date, ce que ne fait pas CursorPagination de DRF (décalage sur un seul
+champ).
+
+Le nombre total d'éléments n'est pas calculé, sauf avec ?count=1.
+"""
+
+import base64
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    # Champ date puis id, dans le même sens ('-' = du plus récent au plus ancien)
+    ordering = ('-date_generation', '-id')
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = "Curseur invalide"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.count = queryset.count() if self._count_requested(request) else None
+
+        encoded = request.query_params.get(self.cursor_query_param)
+        position, reverse = self.decode_cursor(encoded) if encoded else (None, False)
+
+        descending = self.ordering[0].startswith('-')
+        # Page précédente : on parcourt dans l'autre sens puis on retourne la page
+        if reverse:
+            descending = not descending
+        date_field, id_field = (field.lstrip('-') for field in self.ordering)
+        prefix = '-' if descending else ''
+        queryset = queryset.order_by(f'{prefix}{date_field}', f'{prefix}{id_field}')
+        if position is not None:
+            date_value, id_value = position
+            lookup = 'lt' if descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{date_field}__{lookup}': date_value})
+                | Q(**{date_field: date_value, f'{id_field}__{lookup}': id_value})
+            )
+
+        page = list(queryset[:self.page_size + 1])
+        has_more = len(page) > self.page_size
+        page = page[:self.page_size]
+        if reverse:
+            page.reverse()
+
+        self.next_position = self.previous_position = None
+        if page:
+            # En avant, il y a une page précédente dès qu'on est parti d'un curseur ;
+            # en arrière, il y a toujours la page suivante dont on vient
+            if reverse or has_more:
+                self.next_position = self._position(page[-1])
+            if (reverse and has_more) or (not reverse and encoded):
+                self.previous_position = self._position(page[0])
+        return page
+
+    def _position(self, item):
+        date_field, id_field = (field.lstrip('-') for field in self.ordering)
+        return getattr(item, date_field), getattr(item, id_field)
+
+    def _count_requested(self, request):
+        return request.query_params.get(self.count_query_param, '').lower() in ('1', 'true', 'yes')
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def encode_cursor(self, position, reverse):
+        date_value, id_value = position
+        raw = f'{date_value.isoformat()}|{id_value}|{int(reverse)}'
+        return base64.urlsafe_b64encode(raw.encode('ascii')).decode('ascii')
+
+    def decode_cursor(self, encoded):
+        try:
+            raw = base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii')
+            date_text, id_text, reverse = raw.split('|')
+            date_value = parse_datetime(date_text)
+            id_value = int(id_text)
+        except (ValueError, UnicodeError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+        if date_value is None:
+            raise NotFound(self.invalid_cursor_message)
+        return (date_value, id_value), reverse == '1'
+
+    def _link(self, position, reverse):
+        if position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(position, reverse))
+
+    def get_next_link(self):
+        return self._link(self.next_position, False)
+
+    def get_previous_link(self):
+        return self._link(self.previous_position, True)
+
+    def get_paginated_response(self, data):
+        payload = {'next': self.get_next_link(), 'previous': self.get_previous_link()}
+        if self.count is not None:
+            payload['count'] = self.count
+        payload['results'] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'count': {'type': 'integer', 'description': "Présent avec ?count=1"},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param, 'required': False, 'in': 'query',
+                'description': "Curseur de la page (liens next / previous)", 'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param, 'required': False, 'in': 'query',
+                'description': f"Taille de la page (max {self.max_page_size})", 'schema': {'type': 'integer'},
+            },
+            {
+                'name': self.count_query_param, 'required': False, 'in': 'query',
+                'description': "Ajoute le nombre total d'éléments (requête COUNT)", 'schema': {'type': 'boolean'},
+            },
+        ]
+
+
+class ReponseKeysetPagination(KeysetPagination):
+    ordering = ('date_add', 'id')
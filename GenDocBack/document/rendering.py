@@ -0,0 +1,128 @@
+"""
+Rendu des documents Word (remplacement des variables).
+
+Ce module ne dépend pas des modèles Django : il est utilisé dans les
+processus du pool de rendu de la génération par lot.
+"""
+
+import io
+import re
+
+from docx import Document
+
+
+def compile_placeholder_pattern(variables):
+    """
+    Compile une seule expression régulière reconnaissant {VAR} et {{VAR}}
+    pour toutes les variables. Les noms les plus longs sont essayés en premier.
+    Le groupe 2 contient le nom de la variable.
+    """
+    names = sorted({str(v) for v in variables if str(v)}, key=len, reverse=True)
+    alternation = '|'.join(re.escape(name) for name in names)
+    # (?(1)\}) : accolade fermante supplémentaire seulement si la variable en a deux à gauche
+    return re.compile(r'\{(\{)?(' + alternation + r')\}(?(1)\})')
+
+
+def replace_in_runs(texts, pattern, replace):
+    """
+    Remplace les variables dans une suite de runs en une seule passe.
+
+    texts est la liste des textes des runs d'un paragraphe ; une variable peut
+    être répartie sur plusieurs runs. La valeur (replace(match)) est écrite dans
+    le run où commence la variable et le reste de la variable est retiré des
+    runs suivants : la mise en forme de chaque run est conservée.
+    Retourne la nouvelle liste de textes, ou None s'il n'y a rien à remplacer.
+    """
+    full_text = ''.join(texts)
+    if '{' not in full_text:
+        return None
+    matches = list(pattern.finditer(full_text))
+    if not matches:
+        return None
+
+    new_texts = []
+    i = 0
+    run_end = 0
+    for text in texts:
+        run_start, run_end = run_end, run_end + len(text)
+        parts = []
+        cursor = run_start
+        while i < len(matches) and matches[i].start() < run_end:
+            match = matches[i]
+            if match.start() >= run_start:
+                parts.append(full_text[cursor:match.start()])
+                parts.append(replace(match))
+            if match.end() > run_end:
+                # La variable continue dans le run suivant
+                cursor = run_end
+                break
+            cursor = match.end()
+            i += 1
+        parts.append(full_text[cursor:run_end])
+        new_texts.append(''.join(parts))
+    return new_texts
+
+
+def _iter_paragraphs(container):
+    """Parcourt les paragraphes d'un conteneur, tableaux (imbriqués) compris."""
+    yield from container.paragraphs
+    for table in container.tables:
+        seen = set()
+        for row in table.rows:
+            for cell in row.cells:
+                # Une cellule fusionnée est renvoyée une fois par colonne couverte.
+                # Garder l'élément lui-même : l'id() d'un élément lxml libéré
+                # peut être réutilisé par la cellule suivante
+                if cell._tc in seen:
+                    continue
+                seen.add(cell._tc)
+                yield from _iter_paragraphs(cell)
+
+
+def replace_text_in_docx(doc, replacements):
+    """
+    Remplace les variables {VAR} et {{VAR}} dans le document Word
+    (paragraphes et tableaux) en conservant la mise en forme des runs.
+    """
+    if not replacements:
+        return
+    pattern = compile_placeholder_pattern(replacements)
+
+    def replace(match):
+        return str(replacements[match.group(2)])
+
+    for paragraph in _iter_paragraphs(doc):
+        runs = paragraph.runs
+        new_texts = replace_in_runs([run.text for run in runs], pattern, replace)
+        if new_texts is None:
+            continue
+        for run, new_text in zip(runs, new_texts):
+            if run.text != new_text:
+                run.text = new_text
+
+
+def render_docx(template_bytes, replacements):
+    """Rend un template DOCX (contenu binaire) et retourne le DOCX généré."""
+    doc = Document(io.BytesIO(template_bytes))
+    replace_text_in_docx(doc, replacements)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+# Template partagé par les processus du pool de rendu (voir batch.py) :
+# il est transmis une seule fois à chaque processus, pas à chaque ligne.
+_worker_template = None
+_worker_compiled = None
+
+
+def init_render_worker(template_bytes, compiled=None):
+    global _worker_template, _worker_compiled
+    _worker_template = template_bytes
+    _worker_compiled = compiled
+
+
+def render_with_worker_template(replacements):
+    if _worker_compiled is not None:
+        return _worker_compiled.render(_worker_template, replacements)
+    return render_docx(_worker_template, replacements)
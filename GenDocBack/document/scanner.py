@@ -0,0 +1,98 @@
+"""
+Détection des variables {NOM} / {{NOM}} d'un template DOCX.
+
+Les parties XML contenant du texte (corps, en-têtes, pieds de page, notes ; les
+zones de texte sont incluses puisqu'elles font partie de ces parties) sont lues
+en flux directement depuis l'archive, sans construire le modèle python-docx :
+la mémoire reste constante quelle que soit la taille du document. Les textes
+des runs d'un paragraphe sont réassemblés avant la recherche, si bien qu'une
+variable découpée sur plusieurs runs par Word est retrouvée.
+"""
+
+import re
+import zipfile
+
+from lxml import etree
+
+from .compiler import PLACEHOLDER, TEXT_PARTS, W_P, W_T
+
+
+class ScanResult:
+    """Variables trouvées (ordre d'apparition) et leurs emplacements."""
+
+    def __init__(self):
+        self.variables = []
+        # variable -> [(partie, numéro de paragraphe dans la partie)]
+        self.locations = {}
+
+    def add(self, variable, part, paragraph):
+        if variable not in self.locations:
+            self.variables.append(variable)
+            self.locations[variable] = []
+        self.locations[variable].append((part, paragraph))
+
+
+def _part_order(name):
+    # Le corps du document d'abord, puis en-têtes, pieds de page et notes
+    return (name != 'word/document.xml', name)
+
+
+def _scan_part(stream, part, result):
+    stack = []       # textes des paragraphes ouverts (zones de texte imbriquées)
+    paragraph = 0
+    for event, elem in etree.iterparse(stream, events=('start', 'end'), tag=(W_P, W_T)):
+        if elem.tag == W_P:
+            if event == 'start':
+                stack.append([])
+                continue
+            texts = stack.pop()
+            paragraph += 1
+            for match in PLACEHOLDER.finditer(''.join(texts)):
+                variable = match.group(2).strip()
+                if variable:
+                    result.add(variable, part, paragraph)
+            # Le paragraphe est traité : on libère la mémoire
+            elem.clear(keep_tail=True)
+            if not stack:
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+        elif event == 'end' and stack:
+            stack[-1].append(elem.text or '')
+
+
+def scan_docx(source):
+    """
+    Retourne le ScanResult d'un DOCX (chemin ou fichier ouvert en binaire).
+    """
+    result = ScanResult()
+    with zipfile.ZipFile(source) as archive:
+        parts = sorted((name for name in archive.namelist() if TEXT_PARTS.match(name)), key=_part_order)
+        for name in parts:
+            with archive.open(name) as stream:
+                _scan_part(stream, name, result)
+    return result
+
+
+# Mots entiers (jamais des sous-chaînes : « Hôtel », « Page », « Lieu de naissance »
+# restent du texte). Téléphones et numéros ne sont pas des nombres : 06.12.34.56.78,
+# A-2024-17.
+EMAIL_WORDS = frozenset({'email', 'mail', 'courriel'})
+DATE_WORDS = frozenset({'date'})
+NUMBER_WORDS = frozenset({
+    'montant', 'prix', 'total', 'nombre', 'quantite', 'quantité',
+    'age', 'âge', 'salaire', 'taux', 'pourcentage',
+})
+WORD = re.compile(r'[^\W_]+')
+
+
+def infer_type(variable):
+    """Déduit le type de champ à partir des mots du nom de la variable"""
+    words = set(WORD.findall(variable.lower()))
+    if words & EMAIL_WORDS:
+        return 'email'
+    if words & DATE_WORDS:
+        return 'date'
+    if words & NUMBER_WORDS:
+        return 'number'
+    # Par défaut : texte (nom, prenom, adresse, ville, etc.)
+    return 'text'
@@ -3,7 +3,14 @@ Serializers pour l'API Documents.
 Gère la sérialisation des modèles DocumentGenere et TemplateDocument.
 """
 
+import csv
+import io
+import zipfile
+
+from django.db import transaction
 from rest_framework import serializers
+from .conf import get_setting
+from .validation import check_values, get_plan
 from .models import (
     CategorieTemplate, TemplateDocument, Formulaire,
     Question, TypeDocument, DocumentGenere, ReponseQuestion
@@ -20,6 +27,9 @@ class CategorieTemplateSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
     def get_templates_count(self, obj):
+        # Annoté par CategorieTemplateViewSet.queryset (évite un COUNT par catégorie)
+        if hasattr(obj, 'templates_count'):
+            return obj.templates_count
         return obj.templates.filter(status=True).count()
 
 
@@ -78,6 +88,24 @@ class TemplateDocumentCreateSerializer(serializers.ModelSerializer):
         return value
 
 
+class TemplateArchiveSerializer(serializers.Serializer):
+    """Serializer pour l'import de templates depuis une archive ZIP"""
+    archive = serializers.FileField(help_text="Archive ZIP de fichiers .docx (manifest.json optionnel)")
+    categorie = serializers.PrimaryKeyRelatedField(
+        queryset=CategorieTemplate.objects.all(),
+        required=False,
+        allow_null=True,
+        help_text="Catégorie des fichiers absents du manifest"
+    )
+    actif = serializers.BooleanField(default=False)
+
+    def validate_archive(self, value):
+        if not zipfile.is_zipfile(value):
+            raise serializers.ValidationError("Le fichier doit être une archive ZIP")
+        value.seek(0)
+        return value
+
+
 class TemplateDocumentDetailSerializer(serializers.ModelSerializer):
     """Serializer détaillé pour un template avec ses formulaires"""
     categorie_details = CategorieTemplateSerializer(source='categorie', read_only=True)
@@ -155,31 +183,28 @@ class DocumentGenereCreateSerializer(serializers.ModelSerializer):
         return value
 
     def validate(self, data):
-        """Validation globale incluant les questions obligatoires"""
+        """Validation globale incluant les questions obligatoires et le type des réponses"""
         template = data.get('template')
         reponses = data.get('reponses', [])
 
-        formulaires = template.formulaires.all()
-        if not formulaires.exists():
+        plan = get_plan(template.id)
+        if not plan['formulaires']:
             raise serializers.ValidationError(
                 "Ce template n'a pas de formulaire associé"
             )
 
-        # On récupère les IDs des questions répondues
-        # On gère le cas où 'question' est un ID (int) ou un dict (si nested)
-        reponse_ids = []
+        valeurs = {}
         for r in reponses:
-             # Si c'est juste l'ID qui arrive
-            reponse_ids.append(r['question'])
-
-        for formulaire in formulaires:
-            questions_obligatoires = formulaire.questions.filter(obligatoire=True)
-            
-            for question in questions_obligatoires:
-                if question.id not in reponse_ids:
-                    raise serializers.ValidationError(
-                        f"La question '{question.label}' est obligatoire"
-                    )
+            try:
+                valeurs[int(r['question'])] = r['valeur']
+            except (TypeError, ValueError):
+                raise serializers.ValidationError(
+                    f"Identifiant de question invalide : {r['question']}"
+                )
+
+        erreurs = check_values(plan, valeurs)
+        if erreurs:
+            raise serializers.ValidationError(erreurs)
 
         return data
 
@@ -192,23 +217,69 @@ class DocumentGenereCreateSerializer(serializers.ModelSerializer):
         if user and user.is_authenticated:
             validated_data['user'] = user
 
-        document = DocumentGenere.objects.create(
-            template=validated_data['template'],
-            format=validated_data['format'],
-            status='pending',
-            user=validated_data.get('user')
-        )
-
-        for reponse_data in reponses_data:
-            ReponseQuestion.objects.create(
-                document=document,
-                question_id=reponse_data['question'],
-                valeur=reponse_data['valeur']
+        with transaction.atomic():
+            document = DocumentGenere.objects.create(
+                template=validated_data['template'],
+                format=validated_data['format'],
+                status='pending',
+                user=validated_data.get('user')
             )
 
+            ReponseQuestion.objects.bulk_create([
+                ReponseQuestion(
+                    document=document,
+                    question_id=reponse_data['question'],
+                    valeur=reponse_data['valeur']
+                )
+                for reponse_data in reponses_data
+            ])
+
         return document
 
 
+class DocumentBatchSerializer(serializers.Serializer):
+    """Serializer pour la génération par lot (un template, plusieurs lignes de réponses)"""
+    template = serializers.PrimaryKeyRelatedField(queryset=TemplateDocument.objects.all())
+    format = serializers.ChoiceField(choices=DocumentGenere.FORMAT_CHOICES)
+    lignes = serializers.ListField(
+        child=serializers.DictField(),
+        required=False,
+        help_text="Lignes de réponses indexées par Question.variable: [{'nom': 'Dupont', ...}, ...]"
+    )
+    fichier = serializers.FileField(
+        required=False,
+        write_only=True,
+        help_text="Fichier CSV (une colonne par Question.variable) à la place de 'lignes'"
+    )
+
+    def validate_fichier(self, value):
+        """Lit le CSV (séparateur ',' ';' ou tabulation) en lignes de réponses"""
+        try:
+            content = value.read().decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise serializers.ValidationError("Le fichier CSV doit être encodé en UTF-8")
+        try:
+            dialect = csv.Sniffer().sniff(content.split('\n', 1)[0], delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+        return [
+            {key.strip(): val for key, val in row.items() if key}
+            for row in csv.DictReader(io.StringIO(content), dialect=dialect)
+        ]
+
+    def validate(self, data):
+        lignes = data.pop('fichier', None) or data.get('lignes')
+        if not lignes:
+            raise serializers.ValidationError("Fournissez 'lignes' (JSON) ou 'fichier' (CSV) non vide")
+        max_rows = get_setting('BATCH_MAX_ROWS')
+        if len(lignes) > max_rows:
+            raise serializers.ValidationError(f"Un lot est limité à {max_rows} lignes")
+        if not get_plan(data['template'].id)['formulaires']:
+            raise serializers.ValidationError("Ce template n'a pas de formulaire associé")
+        data['lignes'] = lignes
+        return data
+
+
 class TypeDocumentSerializer(serializers.ModelSerializer):
     """Serializer pour les types de documents"""
 
@@ -3,12 +3,12 @@ Service de génération de documents.
 Gère la création synchrone des fichiers Word à partir des templates.
 """
 
+import io
 import os
-import tempfile
 from pathlib import Path
 from django.utils import timezone
 from django.core.files.base import ContentFile
-from .models import Document
+from . import template_cache
 from templates.models import TemplateVersion
 
 
@@ -65,23 +65,16 @@ class DocumentService:
             raise ImportError("Installez 'python-docx' ou 'docxtpl' pour générer des fichiers DOCX")
         
         try:
-            # Charge le template
-            doc = DocxTemplate(template_path)
+            # Charge le template (contenu gardé en cache entre les requêtes)
+            doc = DocxTemplate(io.BytesIO(template_cache.read_bytes(template_path)))
             
             # Injecte les données
             doc.render(input_data)
             
-            # Crée un fichier temporaire
-            with tempfile.NamedTemporaryFile(suffix='.docx', delete=False) as tmp:
-                doc.save(tmp.name)
-                tmp_path = tmp.name
-            
-            # Lit le contenu du fichier généré
-            with open(tmp_path, 'rb') as f:
-                file_content = f.read()
-            
-            # Nettoie le fichier temporaire
-            os.unlink(tmp_path)
+            # Rendu en mémoire, sans fichier temporaire
+            buffer = io.BytesIO()
+            doc.save(buffer)
+            file_content = buffer.getvalue()
             
             # Génère un nom de fichier
             filename = DocumentService._generate_filename(input_data, '.docx')
@@ -102,8 +95,8 @@ class DocumentService:
             raise ImportError("Installez 'openpyxl' pour générer des fichiers XLSX")
         
         try:
-            # Charge le template
-            workbook = load_workbook(template_path)
+            # Charge le template (contenu gardé en cache entre les requêtes)
+            workbook = load_workbook(io.BytesIO(template_cache.read_bytes(template_path)))
             
             # Injecte les données dans les cellules
             for sheet in workbook.sheetnames:
@@ -115,17 +108,10 @@ class DocumentService:
                             for key, value in input_data.items():
                                 cell.value = str(cell.value).replace(f"{{{{{key}}}}}", str(value))
             
-            # Crée un fichier temporaire
-            with tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False) as tmp:
-                workbook.save(tmp.name)
-                tmp_path = tmp.name
-            
-            # Lit le contenu du fichier généré
-            with open(tmp_path, 'rb') as f:
-                file_content = f.read()
-            
-            # Nettoie le fichier temporaire
-            os.unlink(tmp_path)
+            # Rendu en mémoire, sans fichier temporaire
+            buffer = io.BytesIO()
+            workbook.save(buffer)
+            file_content = buffer.getvalue()
             
             # Génère un nom de fichier
             filename = DocumentService._generate_filename(input_data, '.xlsx')
@@ -0,0 +1,108 @@
+"""
+Signaux de l'application document.
+"""
+
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import catalogue
+from .models import CategorieTemplate, ChoixQuestion, Formulaire, Question, Suppression, TemplateDocument
+from .sync import record_deletion
+from .validation import invalidate_plan
+from .variable_index import index_question
+
+
+@receiver(pre_save, sender=TemplateDocument)
+def invalider_template_compile(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Supprime le template compilé quand le fichier source du template change."""
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and 'fichier' not in update_fields:
+        return
+
+    ancien_fichier = sender.objects.filter(pk=instance.pk).values_list('fichier', flat=True).first()
+    if ancien_fichier == instance.fichier.name:
+        return
+
+    if instance.fichier_compile:
+        instance.fichier_compile.delete(save=False)
+    instance.fichier_compile = None
+    instance.empreinte_fichier = ''
+
+
+@receiver([post_save, post_delete], sender=Formulaire)
+def invalider_plan_formulaire(sender, instance, **kwargs):
+    invalidate_plan(instance.template_id)
+
+
+@receiver(post_save, sender=Question)
+def indexer_question(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_question(instance)
+
+
+@receiver([post_save, post_delete], sender=Question)
+def invalider_plan_question(sender, instance, **kwargs):
+    # Lors d'une suppression en cascade le formulaire peut déjà avoir disparu :
+    # son propre signal invalide alors le plan
+    template_id = Formulaire.objects.filter(pk=instance.formulaire_id).values_list('template_id', flat=True).first()
+    if template_id is not None:
+        invalidate_plan(template_id)
+
+
+@receiver([post_save, post_delete], sender=ChoixQuestion)
+def invalider_plan_choix(sender, instance, **kwargs):
+    template_id = Question.objects.filter(pk=instance.question_id).values_list('formulaire__template_id', flat=True).first()
+    if template_id is not None:
+        invalidate_plan(template_id)
+
+
+@receiver([post_save, post_delete], sender=CategorieTemplate)
+@receiver([post_save, post_delete], sender=TemplateDocument)
+@receiver([post_save, post_delete], sender=Formulaire)
+@receiver([post_save, post_delete], sender=Question)
+@receiver([post_save, post_delete], sender=ChoixQuestion)
+def invalider_catalogue(sender, raw=False, **kwargs):
+    if not raw:
+        catalogue.bump_version()
+
+
+@receiver(post_delete, sender=TemplateDocument)
+def tracer_suppression_template(sender, instance, **kwargs):
+    record_deletion(Suppression.TEMPLATE, instance.pk)
+
+
+@receiver(post_delete, sender=Formulaire)
+def tracer_suppression_formulaire(sender, instance, **kwargs):
+    record_deletion(Suppression.FORMULAIRE, instance.pk)
+
+
+@receiver(post_delete, sender=Question)
+def tracer_suppression_question(sender, instance, **kwargs):
+    record_deletion(Suppression.QUESTION, instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Question)
+def dater_formulaire(sender, instance, raw=False, **kwargs):
+    """Le formulaire sérialisé contient ses questions : il change avec elles."""
+    if not raw:
+        Formulaire.objects.filter(pk=instance.formulaire_id).update(updated_at=timezone.now())
+
+
+@receiver([post_save, post_delete], sender=ChoixQuestion)
+def dater_question(sender, instance, raw=False, **kwargs):
+    """Les choix sont sérialisés avec leur question (et son formulaire)."""
+    if raw:
+        return
+    now = timezone.now()
+    Question.objects.filter(pk=instance.question_id).update(updated_at=now)
+    Formulaire.objects.filter(questions=instance.question_id).update(updated_at=now)
+
+
+@receiver(post_save, sender=CategorieTemplate)
+@receiver(pre_delete, sender=CategorieTemplate)
+def dater_templates(sender, instance, raw=False, **kwargs):
+    """La liste des templates affiche le nom de la catégorie."""
+    if not raw and instance.pk is not None:
+        TemplateDocument.objects.filter(categorie=instance.pk).update(updated_at=timezone.now())
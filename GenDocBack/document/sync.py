@@ -0,0 +1,106 @@
+"""
+Synchronisation différentielle du catalogue.
+
+Les listes des templates, formulaires et questions acceptent ?since=<curseur> :
+elles ne renvoient alors que les objets créés ou modifiés depuis (colonne
+updated_at) et les identifiants des objets supprimés (table Suppression,
+alimentée par les signaux post_delete), avec le curseur à utiliser la fois
+suivante :
+
+    {"curseur": "1792252800123456", "modifies": [...], "supprimes": [12, 15]}
+
+Un client sans copie locale commence avec ?since=0. Le curseur est l'instant
+du début de la requête (microsecondes depuis l'epoch), reculé de
+SYNC_CURSOR_MARGIN secondes : updated_at et date_suppression sont fixés avant
+le commit, et une transaction encore en cours pendant la lecture devient
+visible plus tard avec une date antérieure au début de la requête. Les
+synchronisations se chevauchent donc : les objets modifiés pendant la marge
+sont renvoyés à la synchronisation suivante, et le client remplace ses
+copies par identifiant (un identifiant supprimé déjà absent est ignoré).
+Les suppressions ne
+sont gardées que SYNC_TOMBSTONE_RETENTION jours : un curseur plus ancien
+reçoit une réponse 410 et le client repart de ?since=0.
+"""
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .conf import get_setting
+from .models import Suppression
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def make_cursor(moment):
+    return str(int(moment.timestamp() * 1_000_000))
+
+
+def parse_cursor(value):
+    """Instant correspondant à un curseur, ou None s'il est invalide."""
+    try:
+        microseconds = int(value)
+    except (TypeError, ValueError):
+        return None
+    if microseconds < 0:
+        return None
+    try:
+        return EPOCH + timedelta(microseconds=microseconds)
+    except OverflowError:
+        return None
+
+
+def retention_limit():
+    return timezone.now() - timedelta(days=get_setting('SYNC_TOMBSTONE_RETENTION'))
+
+
+def record_deletion(modele, objet_id):
+    Suppression.objects.create(modele=modele, objet_id=objet_id)
+
+
+def purge_tombstones():
+    """Supprime les traces plus anciennes que la durée de rétention. Retourne leur nombre."""
+    deleted, _ = Suppression.objects.filter(date_suppression__lt=retention_limit()).delete()
+    return deleted
+
+
+class DeltaSyncMixin:
+    """Ajoute ?since=<curseur> à l'action list d'un viewset du catalogue."""
+
+    # Valeur de Suppression.modele pour les objets du viewset
+    sync_modele = None
+
+    def list(self, request, *args, **kwargs):
+        if 'since' not in request.query_params:
+            return super().list(request, *args, **kwargs)
+
+        since = parse_cursor(request.query_params['since'])
+        if since is None:
+            return Response({"error": "Curseur 'since' invalide"}, status=status.HTTP_400_BAD_REQUEST)
+        complet = since == EPOCH
+        if not complet and since < retention_limit():
+            return Response(
+                {"error": "Curseur trop ancien, resynchronisez avec since=0"},
+                status=status.HTTP_410_GONE
+            )
+
+        # Pris avant les lectures et reculé de la marge : une modification
+        # concurrente, ou commitée après la lecture, sera revue, pas perdue
+        curseur = make_cursor(timezone.now() - timedelta(seconds=get_setting('SYNC_CURSOR_MARGIN')))
+        modifies = self.filter_queryset(self.get_queryset()).filter(updated_at__gt=since)
+        return Response({
+            'curseur': curseur,
+            'modifies': self.get_serializer(modifies, many=True).data,
+            'supprimes': [] if complet else self.get_deleted_ids(since),
+        })
+
+    def get_deleted_ids(self, since):
+        return list(
+            Suppression.objects
+            .filter(modele=self.sync_modele, date_suppression__gt=since)
+            .order_by('objet_id')
+            .values_list('objet_id', flat=True)
+            .distinct()
+        )
@@ -0,0 +1,132 @@
+"""
+Cache LRU en mémoire des templates, propre à chaque processus.
+
+Les mêmes quelques templates représentent l'essentiel du trafic : leur contenu
+et leur forme compilée sont gardés en mémoire au lieu d'être relus (et
+décompressés) à chaque génération. Une entrée est identifiée par le chemin du
+fichier, sa date de modification et sa taille : un fichier remplacé sur le
+disque n'est jamais servi depuis le cache.
+
+Les valeurs mises en cache ne doivent pas être modifiées par les appelants
+(bytes, templates compilés) : elles sont partagées sans copie.
+
+La génération des documents utilise la forme compilée (compiler.py), qui est
+déjà l'objet prêt au rendu. Les templates docxtpl et openpyxl
+(services.DocumentService) restent en cache sous forme d'octets : le rendu
+modifie l'objet chargé, il faudrait donc en donner une copie à chaque appel,
+et une copie profonde d'un Document python-docx coûte autant que sa lecture.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+from .conf import get_setting
+
+
+class TemplateCache:
+    """Cache LRU borné en octets, sûr entre threads."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # clé -> (valeur, taille)
+        self._keys_by_file = {}        # (espace, chemin) -> clé courante
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path, loader, namespace='bytes'):
+        """
+        Retourne loader(path) depuis le cache, ou l'exécute et met en cache
+        son résultat. loader retourne un couple (valeur, taille en octets).
+        """
+        stat = os.stat(path)
+        key = (namespace, path, stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        value, size = loader(path)
+        if size > self.max_bytes:
+            return value
+
+        with self._lock:
+            # Une ancienne version du même fichier n'est plus utile
+            old_key = self._keys_by_file.get((namespace, path))
+            if old_key is not None and old_key != key:
+                self._remove(old_key)
+            if key not in self._entries:
+                self._entries[key] = (value, size)
+                self._keys_by_file[(namespace, path)] = key
+                self._size += size
+            while self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        return value
+
+    def _remove(self, key):
+        value, size = self._entries.pop(key)
+        self._size -= size
+        namespace, path = key[0], key[1]
+        if self._keys_by_file.get((namespace, path)) == key:
+            del self._keys_by_file[(namespace, path)]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_file.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'size_bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / total, 4) if total else None,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Retourne le cache du processus (créé au premier appel)."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TemplateCache(get_setting('TEMPLATE_CACHE_MAX_BYTES'))
+    return _cache
+
+
+def _read_file(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    return data, len(data)
+
+
+def read_bytes(path):
+    """Contenu d'un fichier template, depuis le cache si possible."""
+    if not get_setting('TEMPLATE_CACHE_MAX_BYTES'):
+        return _read_file(path)[0]
+    return get_cache().get(path, _read_file)
+
+
+def load(path, loader, namespace):
+    """Résultat de loader(path) -> (valeur, taille), depuis le cache si possible."""
+    if not get_setting('TEMPLATE_CACHE_MAX_BYTES'):
+        return loader(path)[0]
+    return get_cache().get(path, loader, namespace)
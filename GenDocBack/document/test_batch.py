@@ -0,0 +1,222 @@
+"""
+Tests de la génération par lot (batch.py, POST /documents/batch/).
+"""
+
+import io
+import multiprocessing
+import shutil
+import tempfile
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from unittest.mock import Mock, patch
+
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from docx import Document as DocxDocument
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from . import batch
+from .compiler import CompiledTemplate, compile_docx
+from .jobs import claim_next_document
+from .models import DocumentGenere, Formulaire, Question, TemplateDocument
+from .serializers import DocumentBatchSerializer
+from .testing import LOCAL_CACHES
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix='gendoc_tests_')
+BATCH_URL = '/api/documents/documents/batch/'
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, CACHES=LOCAL_CACHES, DOCUMENT_GENERATION={'BATCH_WORKERS': 1})
+class BatchTestCase(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        docx = DocxDocument()
+        docx.add_paragraph("Nom : {nom}")
+        docx.add_paragraph("Ville : {ville}")
+        buffer = io.BytesIO()
+        docx.save(buffer)
+        self.template = TemplateDocument.objects.create(
+            nom='Courrier', fichier=ContentFile(buffer.getvalue(), name='courrier.docx')
+        )
+        formulaire = Formulaire.objects.create(template=self.template, titre='Courrier')
+        Question.objects.create(formulaire=formulaire, label='nom', variable='nom', type_champ='text')
+        Question.objects.create(
+            formulaire=formulaire, label='ville', variable='ville', type_champ='text', obligatoire=False
+        )
+
+    def _post(self, data, query='', format='json'):
+        return self.client.post(BATCH_URL + query, data, format=format)
+
+    def _paragraphs(self, document):
+        with document.fichier.open('rb') as f:
+            return [p.text for p in DocxDocument(f).paragraphs]
+
+    # Lecture des lignes
+
+    def test_csv_parsing(self):
+        for separator in (',', ';', '\t'):
+            with self.subTest(separator=repr(separator)):
+                content = '\ufeff' + separator.join(['nom', 'ville ']) + '\n'
+                content += separator.join(['Dupont', 'Lyon']) + '\n' + separator.join(['Martin', '']) + '\n'
+                serializer = DocumentBatchSerializer(data={
+                    'template': self.template.id, 'format': 'docx',
+                    'fichier': SimpleUploadedFile('lot.csv', content.encode('utf-8')),
+                })
+                self.assertTrue(serializer.is_valid(), serializer.errors)
+                self.assertEqual(serializer.validated_data['lignes'], [
+                    {'nom': 'Dupont', 'ville': 'Lyon'}, {'nom': 'Martin', 'ville': ''},
+                ])
+
+    def test_csv_must_be_utf8(self):
+        serializer = DocumentBatchSerializer(data={
+            'template': self.template.id, 'format': 'docx',
+            'fichier': SimpleUploadedFile('lot.csv', 'nom\nHélène\n'.encode('latin-1')),
+        })
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('fichier', serializer.errors)
+
+    def test_json_rows_required_and_limited(self):
+        response = self._post({'template': self.template.id, 'format': 'docx', 'lignes': []})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        with self.settings(DOCUMENT_GENERATION={'BATCH_MAX_ROWS': 2}):
+            response = self._post({'template': self.template.id, 'format': 'docx', 'lignes': [{'nom': 'x'}] * 3})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    # Rendu pendant la requête
+
+    def test_inline_batch_with_row_errors(self):
+        response = self._post({'template': self.template.id, 'format': 'docx', 'lignes': [
+            {'nom': 'Dupont', 'ville': 'Lyon'},
+            {'ville': 'Paris'},
+            {'nom': 'Martin', 'inconnue': 'ignorée'},
+        ]})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data['reussis'], response.data['echecs']), (2, 1))
+
+        resultats = response.data['resultats']
+        self.assertEqual([r['ligne'] for r in resultats], [1, 2, 3])
+        self.assertEqual([r['status'] for r in resultats], ['done', 'error', 'done'])
+        self.assertIsNone(resultats[1]['document'])
+        self.assertEqual(resultats[1]['erreurs'], ["La question 'nom' est obligatoire"])
+
+        document = DocumentGenere.objects.get(pk=resultats[0]['document'])
+        self.assertIsNone(document.verrou_expire_le)
+        self.assertEqual(self._paragraphs(document), ['Nom : Dupont', 'Ville : Lyon'])
+        self.assertEqual(DocumentGenere.objects.count(), 2)
+
+    def test_all_rows_invalid(self):
+        response = self._post({'template': self.template.id, 'format': 'docx', 'lignes': [{'ville': 'Paris'}]})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(DocumentGenere.objects.exists())
+
+    def test_render_error_reported_per_row(self):
+        def render_all(template_bytes, replacements_list, compiled=None):
+            return [b'PK', RuntimeError('rendu impossible')]
+
+        with patch.object(batch, '_render_all', side_effect=render_all):
+            response = self._post({'template': self.template.id, 'format': 'docx',
+                                   'lignes': [{'nom': 'Dupont'}, {'nom': 'Martin'}]})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([r['status'] for r in response.data['resultats']], ['done', 'error'])
+        document = DocumentGenere.objects.get(pk=response.data['resultats'][1]['document'])
+        self.assertEqual((document.status, document.derniere_erreur), ('error', 'rendu impossible'))
+        self.assertIsNone(document.verrou_expire_le)
+
+    def test_render_pool_failure_reported_per_row(self):
+        executor = Mock()
+        executor.__enter__ = Mock(return_value=executor)
+        executor.__exit__ = Mock(return_value=False)
+        executor.submit.side_effect = BrokenProcessPool('processus de rendu arrêté')
+        for error, pool in (('pool indisponible', Mock(side_effect=OSError('pool indisponible'))),
+                            ('processus de rendu arrêté', Mock(return_value=executor))):
+            with self.subTest(error=error):
+                with self.settings(DOCUMENT_GENERATION={'BATCH_WORKERS': 2}), \
+                        patch.object(batch, 'ProcessPoolExecutor', pool):
+                    response = self._post({'template': self.template.id, 'format': 'docx',
+                                           'lignes': [{'nom': 'Dupont'}, {'nom': 'Martin'}]})
+                # Aucune ligne réussie : 400, mais chaque ligne a son document en erreur
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertEqual(response.data['echecs'], 2)
+                for resultat in response.data['resultats']:
+                    document = DocumentGenere.objects.get(pk=resultat['document'])
+                    self.assertEqual((document.status, document.derniere_erreur), ('error', error))
+                    self.assertIsNone(document.verrou_expire_le)
+
+    def test_interrupted_request_recovered_by_queue(self):
+        def render_all(*args, **kwargs):
+            # Pendant le rendu : documents verrouillés comme par un worker
+            for document in DocumentGenere.objects.all():
+                self.assertEqual(document.status, 'processing')
+                self.assertEqual(document.tentatives, 1)
+                self.assertGreater(document.verrou_expire_le, timezone.now())
+            raise SystemExit('processus arrêté')
+
+        with patch.object(batch, '_render_all', side_effect=render_all), self.assertRaises(SystemExit):
+            batch.generate_batch(self.template, 'docx', [{'nom': 'Dupont'}])
+        document = DocumentGenere.objects.get()
+        self.assertIsNone(claim_next_document())
+
+        plus_tard = timezone.now() + timedelta(seconds=601)
+        with patch('document.jobs.timezone.now', return_value=plus_tard):
+            repris = claim_next_document()
+        self.assertEqual(repris.pk, document.pk)
+        self.assertEqual(repris.tentatives, 2)
+
+    # File d'attente
+
+    def test_async_requested(self):
+        response = self._post({'template': self.template.id, 'format': 'docx', 'lignes': [{'nom': 'Dupont'}]},
+                              query='?async=1')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        document = DocumentGenere.objects.get(pk=response.data['resultats'][0]['document'])
+        self.assertEqual(document.status, 'pending')
+        self.assertIsNotNone(document.prochaine_tentative)
+        self.assertIsNone(document.verrou_expire_le)
+        self.assertFalse(document.fichier)
+        self.assertEqual(claim_next_document().pk, document.pk)
+
+    def test_large_batches_queued(self):
+        lignes = [{'nom': f'Client {i}'} for i in range(3)]
+        with self.settings(DOCUMENT_GENERATION={'BATCH_WORKERS': 1, 'BATCH_INLINE_MAX_ROWS': 2}), \
+                patch.object(batch, '_render_all') as render_all:
+            response = self._post({'template': self.template.id, 'format': 'docx', 'lignes': lignes})
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        render_all.assert_not_called()
+        self.assertEqual(set(DocumentGenere.objects.values_list('status', flat=True)), {'pending'})
+
+    def test_must_queue(self):
+        self.assertFalse(batch.must_queue('docx', 100))
+        self.assertTrue(batch.must_queue('docx', 101))
+        self.assertFalse(batch.must_queue('pdf', 10))
+        self.assertTrue(batch.must_queue('pdf', 11))
+
+
+@override_settings(DOCUMENT_GENERATION={'BATCH_WORKERS': 2})
+class RenderAllTestCase(SimpleTestCase):
+
+    def test_spawned_workers(self):
+        # Contexte par défaut sous Windows et macOS : tout passe par pickle
+        docx = DocxDocument()
+        docx.add_paragraph("Nom : {NOM}")
+        buffer = io.BytesIO()
+        docx.save(buffer)
+        template_bytes = buffer.getvalue()
+        compiled = CompiledTemplate(compile_docx(template_bytes, 'courrier.docx'))
+
+        results = batch._render_all(
+            template_bytes, [{'NOM': 'Dupont'}, {'NOM': 'Martin'}], compiled,
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+        self.assertEqual(
+            [DocxDocument(io.BytesIO(content)).paragraphs[0].text for content in results],
+            ['Nom : Dupont', 'Nom : Martin'],
+        )
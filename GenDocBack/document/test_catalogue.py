@@ -0,0 +1,117 @@
+"""
+Tests du cache des réponses du catalogue.
+"""
+
+from django.core.cache import cache, caches
+from django.core.checks import run_checks
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from user.models import User
+
+from . import catalogue
+from .models import CategorieTemplate, ChoixQuestion, Formulaire, Question, TemplateDocument
+from .testing import LOCAL_CACHES
+
+SHARED_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost:6379'},
+}
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class CatalogueCacheTestCase(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.categorie = CategorieTemplate.objects.create(nom='Contrats')
+        self.template = TemplateDocument.objects.create(
+            nom='Contrat', categorie=self.categorie, fichier='templates/test.docx', status=True
+        )
+        self.brouillon = TemplateDocument.objects.create(
+            nom='Brouillon', categorie=self.categorie, fichier='templates/test.docx', status=False
+        )
+        self.formulaire = Formulaire.objects.create(template=self.template, titre='Contrat')
+        self.question = Question.objects.create(
+            formulaire=self.formulaire, label='Type', variable='type', type_champ='select'
+        )
+
+    def test_cached_response_served_without_queries(self):
+        url = f'/api/documents/templates/{self.template.id}/'
+        first = self.client.get(url)
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.data, second.data)
+
+    def test_nested_change_invalidates(self):
+        url = f'/api/documents/templates/{self.template.id}/'
+        self.client.get(url)
+        ChoixQuestion.objects.create(question=self.question, valeur='CDI')
+        response = self.client.get(url)
+        self.assertEqual(response.data['formulaires'][0]['questions'][0]['options'], ['CDI'])
+
+    def test_delete_invalidates(self):
+        self.client.get('/api/documents/categories/')
+        self.template.delete()
+        response = self.client.get('/api/documents/categories/')
+        self.assertEqual(response.data['results'][0]['templates_count'], 0)
+
+    def test_staff_and_public_views_separated(self):
+        url = '/api/documents/templates/'
+        public = self.client.get(url)
+        self.assertEqual(public.data['count'], 1)
+
+        admin = User.objects.create_superuser(email='admin@example.com', password='secret')
+        self.client.force_authenticate(admin)
+        staff = self.client.get(url)
+        self.assertEqual(staff.data['count'], 2)
+
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(url).data['count'], 1)
+
+    def test_errors_not_cached(self):
+        url = '/api/documents/templates/999999/'
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+    def test_version_recreated_after_cache_clear(self):
+        version = catalogue.get_version()
+        cache.clear()
+        self.assertNotEqual(catalogue.get_version(), version)
+        catalogue.bump_version()
+        self.assertIsNotNone(cache.get(catalogue.VERSION_KEY))
+
+
+class SharedCatalogueCacheTestCase(TestCase):
+    """Avec le cache partagé de settings.py (base de données)."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.categorie = CategorieTemplate.objects.create(nom='Contrats')
+        self.template = TemplateDocument.objects.create(
+            nom='Contrat', categorie=self.categorie, fichier='templates/test.docx', status=True
+        )
+
+    def test_save_invalidates_cached_list(self):
+        url = '/api/documents/templates/'
+        self.assertEqual(self.client.get(url).data['results'][0]['nom'], 'Contrat')
+        self.template.nom = 'Contrat de travail'
+        self.template.save()
+        self.assertEqual(self.client.get(url).data['results'][0]['nom'], 'Contrat de travail')
+
+    def test_version_shared_between_processes(self):
+        # Une autre connexion au cache voit la même version qu'un autre worker
+        autre_worker = caches.create_connection('default')
+        catalogue.bump_version()
+        self.assertEqual(autre_worker.get(catalogue.VERSION_KEY), catalogue.get_version())
+
+    @override_settings(CACHES=SHARED_CACHES)
+    def test_no_warning_for_shared_cache(self):
+        self.assertNotIn('document.W001', [message.id for message in run_checks()])
+
+    @override_settings(CACHES=LOCAL_CACHES)
+    def test_warning_for_local_cache(self):
+        self.assertIn('document.W001', [message.id for message in run_checks()])
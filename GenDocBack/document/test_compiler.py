@@ -0,0 +1,95 @@
+"""
+Tests des templates DOCX compilés (compiler.py).
+"""
+
+import io
+import pickle
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from docx import Document as DocxDocument
+
+from .compiler import CompiledTemplate, compile_docx
+
+
+def make_template():
+    docx = DocxDocument()
+    docx.add_paragraph("Nom : {NOM}")
+    docx.add_paragraph("Ville : {{VILLE}}")
+    docx.sections[0].header.paragraphs[0].text = "Réf. {REF}"
+    buffer = io.BytesIO()
+    docx.save(buffer)
+    return buffer.getvalue()
+
+
+def texts(content):
+    docx = DocxDocument(io.BytesIO(content))
+    return [p.text for p in docx.paragraphs], docx.sections[0].header.paragraphs[0].text
+
+
+class CompiledTemplateTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.template_bytes = make_template()
+        self.compiled = CompiledTemplate(compile_docx(self.template_bytes, 'template.docx'))
+
+    def test_render(self):
+        content = self.compiled.render(self.template_bytes, {'NOM': 'Dupont & fils', 'VILLE': 'Lyon', 'REF': 'A1'})
+        paragraphs, header = texts(content)
+        self.assertEqual(paragraphs, ['Nom : Dupont & fils', 'Ville : Lyon'])
+        self.assertEqual(header, 'Réf. A1')
+
+    def test_parts_keep_source_metadata(self):
+        content = self.compiled.render(self.template_bytes, {'NOM': 'X'})
+        with zipfile.ZipFile(io.BytesIO(self.template_bytes)) as source, \
+                zipfile.ZipFile(io.BytesIO(content)) as output:
+            self.assertIsNone(output.testzip())
+            for name in self.compiled.parts:
+                self.assertEqual(output.getinfo(name).date_time, source.getinfo(name).date_time)
+                self.assertEqual(output.getinfo(name).compress_type, source.getinfo(name).compress_type)
+
+    def test_concurrent_renders(self):
+        # Le même CompiledTemplate est partagé par tous les threads (cache des templates)
+        barrier = threading.Barrier(8)
+
+        def render(i):
+            if i < 8:
+                barrier.wait()
+            values = {'NOM': f'Client {i}', 'VILLE': f'Ville {i}' * (i % 5 + 1), 'REF': str(i)}
+            return i, values, self.compiled.render(self.template_bytes, values)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(render, range(64)))
+
+        for i, values, content in results:
+            with self.subTest(i=i):
+                paragraphs, header = texts(content)
+                self.assertEqual(paragraphs, [f"Nom : {values['NOM']}", f"Ville : {values['VILLE']}"])
+                self.assertEqual(header, f'Réf. {i}')
+
+    def test_static_archive_built_once(self):
+        calls = []
+        original = zipfile.ZipFile.writestr
+
+        def writestr(archive, zinfo, data, *args, **kwargs):
+            calls.append(zinfo if isinstance(zinfo, str) else zinfo.filename)
+            return original(archive, zinfo, data, *args, **kwargs)
+
+        with patch.object(zipfile.ZipFile, 'writestr', writestr):
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                list(executor.map(lambda i: self.compiled.render(self.template_bytes, {}), range(8)))
+        # Chaque partie statique n'est recompressée qu'une fois
+        static = [name for name in calls if name not in self.compiled.parts]
+        self.assertEqual(len(static), len(set(static)))
+
+
+    def test_pickle(self):
+        # Envoyé tel quel aux processus de rendu (batch.py)
+        self.compiled.render(self.template_bytes, {})
+        copie = pickle.loads(pickle.dumps(self.compiled))
+        self.assertIsNone(copie._static)
+        content = copie.render(self.template_bytes, {'NOM': 'Dupont', 'VILLE': 'Lyon', 'REF': 'A1'})
+        self.assertEqual(texts(content), (['Nom : Dupont', 'Ville : Lyon'], 'Réf. A1'))
@@ -0,0 +1,124 @@
+"""
+Tests des requêtes conditionnelles (ETag / Last-Modified).
+"""
+
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.permissions import BasePermission
+from rest_framework.test import APIClient
+
+from user.models import User
+
+from .models import CategorieTemplate, DocumentGenere, TemplateDocument
+from .testing import LOCAL_CACHES
+
+
+class CatalogueConditionalTestCase(TestCase):
+    """Avec le cache configuré dans settings.py : un 304 ne doit faire aucune requête."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.categorie = CategorieTemplate.objects.create(nom='Contrats')
+        self.template = TemplateDocument.objects.create(
+            nom='Contrat', categorie=self.categorie, fichier='templates/test.docx', status=True
+        )
+
+    def test_not_modified_without_queries(self):
+        url = '/api/documents/categories/'
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertFalse(response.content)
+
+    def test_if_modified_since(self):
+        url = f'/api/documents/templates/{self.template.id}/'
+        last_modified = self.client.get(url)['Last-Modified']
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_change_gives_new_etag(self):
+        url = f'/api/documents/templates/{self.template.id}/'
+        etag = self.client.get(url)['ETag']
+        self.template.nom = 'Contrat de travail'
+        self.template.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['nom'], 'Contrat de travail')
+
+    def test_etag_depends_on_url(self):
+        etag = self.client.get('/api/documents/templates/')['ETag']
+        response = self.client.get(f'/api/documents/templates/{self.template.id}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class ProprietaireSeulement(BasePermission):
+    def has_object_permission(self, request, view, obj):
+        return obj.user_id == request.user.pk
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class DocumentConditionalTestCase(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        template = TemplateDocument.objects.create(nom='Contrat', fichier='templates/test.docx', status=True)
+        self.document = DocumentGenere.objects.create(template=template, format='docx')
+
+    def test_statut(self):
+        url = f'/api/documents/documents/{self.document.id}/statut/'
+        etag = self.client.get(url)['ETag']
+
+        # Une seule requête légère, sans sérialisation
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.document.status = 'done'
+        self.document.fichier = 'documents_generes/document_1.docx'
+        self.document.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'done')
+
+    def test_retrieve(self):
+        url = f'/api/documents/documents/{self.document.id}/'
+        response = self.client.get(url)
+        self.assertEqual(response.data['id'], self.document.id)
+        etag = response['ETag']
+        self.assertNotEqual(etag, self.client.get(f'{url}statut/')['ETag'])
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_unknown_document(self):
+        response = self.client.get('/api/documents/documents/999999/', HTTP_IF_NONE_MATCH='"x"')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_object_permissions_checked_before_304(self):
+        proprietaire = User.objects.create_user(email='proprio@example.com', password='secret')
+        self.document.user = proprietaire
+        self.document.save()
+        url = f'/api/documents/documents/{self.document.id}/statut/'
+        self.client.force_authenticate(proprietaire)
+        etag = self.client.get(url)['ETag']
+
+        with patch('document.viewset.DocumentGenereViewSet.permission_classes', [ProprietaireSeulement]):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+            autre = User.objects.create_user(email='autre@example.com', password='secret')
+            self.client.force_authenticate(autre)
+            for detail_url in (url, f'/api/documents/documents/{self.document.id}/'):
+                response = self.client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,177 @@
+"""
+Tests du pool de conversion PDF (conversion.py), avec des instances factices.
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from unittest.mock import Mock, patch
+
+from django.test import SimpleTestCase
+
+from . import conversion
+from .conversion import ConversionError, LibreOfficePool, SofficeInstance
+
+
+class FakeInstance:
+    """Instance sans LibreOffice : « démarre » un processus numéroté à la première conversion."""
+
+    processes = 0
+
+    def __init__(self, index, binary, profile_root):
+        self.index = index
+        self.jobs = 0
+        self.process = None
+        self.recycled = 0
+        # Exception à lever à la prochaine conversion, ou Event à attendre
+        self.fail_next = None
+        self.gate = None
+
+    def convert(self, source_path, output_dir, timeout):
+        if self.process is None:
+            FakeInstance.processes += 1
+            self.process = FakeInstance.processes
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.fail_next is not None:
+            error, self.fail_next = self.fail_next, None
+            # Processus mort ou tué au délai dépassé
+            self.process = None
+            raise error
+        self.jobs += 1
+        return os.path.join(output_dir, f'{self.process}.pdf')
+
+    def recycle(self):
+        self.recycled += 1
+        self.process = None
+        self.jobs = 0
+
+    def stop(self):
+        self.process = None
+
+
+class LibreOfficePoolTestCase(SimpleTestCase):
+
+    def _pool(self, size=2, max_jobs=50, timeout=5):
+        pool = LibreOfficePool(size=size, max_jobs=max_jobs, timeout=timeout, instance_class=FakeInstance)
+        self.addCleanup(pool.shutdown)
+        return pool
+
+    def test_checkout_distinct_instances(self):
+        pool = self._pool(size=2, timeout=0.2)
+        gate = threading.Event()
+        for instance in pool._instances:
+            instance.gate = gate
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(pool.convert('a.docx', '/tmp'))) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        # Les deux instances sont occupées : pas de troisième conversion
+        deadline = time.monotonic() + 5
+        while pool._idle.qsize() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        with self.assertRaisesMessage(ConversionError, "Aucune instance LibreOffice disponible"):
+            pool.convert('b.docx', '/tmp')
+
+        gate.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(set(results)), 2)
+        self.assertEqual(pool._idle.qsize(), 2)
+        self.assertTrue(pool.convert('c.docx', '/tmp').endswith('.pdf'))
+
+    def test_instance_reused(self):
+        pool = self._pool(size=1)
+        chemins = {pool.convert(f'{i}.docx', '/tmp') for i in range(5)}
+        self.assertEqual(len(chemins), 1)
+        self.assertEqual(pool._instances[0].jobs, 5)
+
+    def test_recycle_after_max_jobs(self):
+        pool = self._pool(size=1, max_jobs=3)
+        instance = pool._instances[0]
+        chemins = [pool.convert(f'{i}.docx', '/tmp') for i in range(4)]
+        self.assertEqual(instance.recycled, 1)
+        # Trois conversions par le premier processus, la quatrième par un neuf
+        self.assertEqual(len(set(chemins[:3])), 1)
+        self.assertNotEqual(chemins[3], chemins[0])
+        self.assertEqual(instance.jobs, 1)
+
+    def test_crash_replacement(self):
+        pool = self._pool(size=1)
+        instance = pool._instances[0]
+        avant = pool.convert('a.docx', '/tmp')
+
+        instance.fail_next = RuntimeError('soffice a planté')
+        with self.assertRaisesMessage(RuntimeError, 'soffice a planté'):
+            pool.convert('b.docx', '/tmp')
+        self.assertEqual(instance.recycled, 1)
+        # L'instance est rendue au pool et repart d'un processus neuf
+        self.assertEqual(pool._idle.qsize(), 1)
+        self.assertNotEqual(pool.convert('c.docx', '/tmp'), avant)
+
+    def test_timeout_recycles(self):
+        pool = self._pool(size=1)
+        instance = pool._instances[0]
+        instance.fail_next = ConversionError('Conversion interrompue après 5 s (instance 0)')
+        with self.assertRaises(ConversionError):
+            pool.convert('a.docx', '/tmp')
+        self.assertEqual(instance.recycled, 1)
+        self.assertTrue(pool.convert('b.docx', '/tmp').endswith('.pdf'))
+
+
+class SofficeInstanceTimeoutTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp(prefix='gendoc_tests_')
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+
+    def test_subprocess_timeout(self):
+        binary = os.path.join(self.tmp_dir, 'soffice')
+        with open(binary, 'w') as f:
+            f.write('#!/bin/sh\nsleep 10\n')
+        os.chmod(binary, 0o755)
+        instance = SofficeInstance(0, binary, self.tmp_dir, backend=conversion.SUBPROCESS)
+
+        debut = time.monotonic()
+        with self.assertRaisesMessage(ConversionError, 'Conversion interrompue'):
+            instance.convert(os.path.join(self.tmp_dir, 'a.docx'), self.tmp_dir, timeout=0.3)
+        self.assertLess(time.monotonic() - debut, 5)
+
+    def test_subprocess_failure(self):
+        binary = os.path.join(self.tmp_dir, 'soffice')
+        with open(binary, 'w') as f:
+            f.write('#!/bin/sh\necho "Error: source file could not be loaded" >&2\nexit 1\n')
+        os.chmod(binary, 0o755)
+        instance = SofficeInstance(0, binary, self.tmp_dir, backend=conversion.SUBPROCESS)
+
+        with self.assertRaisesMessage(ConversionError, 'code 1) : Error: source file could not be loaded'):
+            instance.convert(os.path.join(self.tmp_dir, 'a.docx'), self.tmp_dir, timeout=5)
+
+    def test_uno_call_interrupted_by_killing_process(self):
+        instance = SofficeInstance(0, 'soffice', self.tmp_dir, backend=conversion.UNO)
+        instance.process = subprocess.Popen(['sleep', '30'])
+        self.addCleanup(instance.stop)
+
+        def load(*args):
+            # Un appel UNO bloqué jusqu'à la mort du processus
+            instance.process.wait(10)
+            raise RuntimeError('pont UNO fermé')
+
+        instance.desktop = Mock(loadComponentFromURL=Mock(side_effect=load), terminate=Mock())
+        with patch.object(conversion, 'uno', Mock()), patch.object(conversion, '_uno_property'):
+            with self.assertRaisesMessage(ConversionError, 'Conversion interrompue'):
+                instance.convert(os.path.join(self.tmp_dir, 'a.docx'), self.tmp_dir, timeout=0.3)
+        self.assertFalse(instance.is_alive())
+
+    def test_backend_detection(self):
+        with patch.object(conversion, 'uno', Mock()):
+            self.assertEqual(conversion.get_backend(), conversion.UNO)
+        with patch.object(conversion, 'uno', None):
+            with patch.object(conversion.shutil, 'which', return_value='/usr/bin/unoserver'):
+                self.assertEqual(conversion.get_backend(), conversion.UNOSERVER)
+            with patch.object(conversion.shutil, 'which', return_value=None):
+                self.assertEqual(conversion.get_backend(), conversion.SUBPROCESS)
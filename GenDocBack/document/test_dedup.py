@@ -0,0 +1,121 @@
+"""
+Tests de la réutilisation des documents déjà générés (dedup.py).
+"""
+
+import io
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from docx import Document as DocxDocument
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from . import dedup
+from .dedup import document_fingerprint, find_reusable
+from .models import DocumentGenere, Formulaire, Question, TemplateDocument
+from .testing import LOCAL_CACHES
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix='gendoc_tests_')
+
+
+def docx_bytes(*paragraphs):
+    docx = DocxDocument()
+    for text in paragraphs:
+        docx.add_paragraph(text)
+    buffer = io.BytesIO()
+    docx.save(buffer)
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, CACHES=LOCAL_CACHES)
+class DocumentReuseTestCase(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.template = TemplateDocument.objects.create(
+            nom='Courrier', fichier=ContentFile(docx_bytes('{nom}, {ville}'), name='courrier.docx')
+        )
+        formulaire = Formulaire.objects.create(template=self.template, titre='Courrier')
+        self.nom = Question.objects.create(formulaire=formulaire, label='nom', variable='nom', type_champ='text')
+        self.ville = Question.objects.create(formulaire=formulaire, label='ville', variable='ville', type_champ='text')
+
+    def _post(self, reponses, format='docx'):
+        response = self.client.post('/api/documents/documents/', {
+            'template': self.template.id,
+            'format': format,
+            'reponses': [{'question': question.id, 'valeur': valeur} for question, valeur in reponses],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return DocumentGenere.objects.get(pk=response.data['id'])
+
+    def test_same_answers_in_other_order_reused(self):
+        premier = self._post([(self.nom, 'Dupont'), (self.ville, 'Lyon')])
+        with patch('document.generation.produire_fichier') as produire:
+            second = self._post([(self.ville, 'Lyon'), (self.nom, 'Dupont')])
+        produire.assert_not_called()
+        self.assertEqual(second.empreinte, premier.empreinte)
+        self.assertEqual(second.fichier.name, premier.fichier.name)
+        self.assertEqual(second.status, 'done')
+
+    def test_different_answers_or_format_not_reused(self):
+        premier = self._post([(self.nom, 'Dupont'), (self.ville, 'Lyon')])
+        autre = self._post([(self.nom, 'Dupont'), (self.ville, 'Paris')])
+        self.assertNotEqual(autre.fichier.name, premier.fichier.name)
+        reponses = [{'question': self.nom.id, 'valeur': 'Dupont'}, {'question': self.ville.id, 'valeur': 'Lyon'}]
+        self.assertNotEqual(
+            document_fingerprint(self.template, 'pdf', reponses),
+            document_fingerprint(self.template, 'docx', reponses),
+        )
+
+    def test_line_endings_normalized(self):
+        self.assertEqual(
+            document_fingerprint(self.template, 'docx', [{'question': self.nom.id, 'valeur': 'a\r\nb'}]),
+            document_fingerprint(self.template, 'docx', [{'question': str(self.nom.id), 'valeur': 'a\nb'}]),
+        )
+
+    def test_template_change_prevents_reuse(self):
+        premier = self._post([(self.nom, 'Dupont'), (self.ville, 'Lyon')])
+        self.template.refresh_from_db()
+        self.template.fichier = ContentFile(docx_bytes('Madame, Monsieur {nom}, {ville}'), name='courrier_v2.docx')
+        self.template.save()
+
+        second = self._post([(self.nom, 'Dupont'), (self.ville, 'Lyon')])
+        self.assertNotEqual(second.empreinte, premier.empreinte)
+        self.assertNotEqual(second.fichier.name, premier.fichier.name)
+        with second.fichier.open('rb') as f:
+            self.assertEqual(DocxDocument(f).paragraphs[0].text, 'Madame, Monsieur Dupont, Lyon')
+
+    def test_render_version_bump_prevents_reuse(self):
+        premier = self._post([(self.nom, 'Dupont'), (self.ville, 'Lyon')])
+        with patch.object(dedup, 'RENDER_VERSION', dedup.RENDER_VERSION + 1):
+            second = self._post([(self.nom, 'Dupont'), (self.ville, 'Lyon')])
+        self.assertNotEqual(second.empreinte, premier.empreinte)
+        self.assertNotEqual(second.fichier.name, premier.fichier.name)
+
+    def test_deleting_one_document_keeps_shared_file(self):
+        premier = self._post([(self.nom, 'Dupont'), (self.ville, 'Lyon')])
+        second = self._post([(self.nom, 'Dupont'), (self.ville, 'Lyon')])
+        chemin = premier.fichier.path
+
+        premier.delete()
+        self.assertTrue(os.path.exists(chemin))
+        second.refresh_from_db()
+        self.assertTrue(second.fichier.storage.exists(second.fichier.name))
+        # Le document restant sert encore de source de réutilisation
+        self.assertEqual(find_reusable(second.empreinte).pk, second.pk)
+
+    def test_missing_file_not_reused(self):
+        premier = self._post([(self.nom, 'Dupont'), (self.ville, 'Lyon')])
+        premier.fichier.storage.delete(premier.fichier.name)
+        self.assertIsNone(find_reusable(premier.empreinte))
+        second = self._post([(self.nom, 'Dupont'), (self.ville, 'Lyon')])
+        self.assertTrue(second.fichier.storage.exists(second.fichier.name))
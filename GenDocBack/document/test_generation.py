@@ -0,0 +1,123 @@
+"""
+Tests de la production des fichiers de documents (generation.py).
+"""
+
+import io
+import os
+import shutil
+import tempfile
+from contextlib import ExitStack
+from unittest.mock import patch
+
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from docx import Document as DocxDocument
+
+from . import generation
+from .generation import produire_fichier
+from .models import DocumentGenere, Formulaire, Question, TemplateDocument
+from .testing import LOCAL_CACHES
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix='gendoc_tests_')
+
+TEMPFILE_FUNCTIONS = ('mkstemp', 'mkdtemp', 'NamedTemporaryFile', 'TemporaryFile', 'TemporaryDirectory')
+
+
+def media_files():
+    return sorted(
+        os.path.relpath(os.path.join(root, name), MEDIA_ROOT)
+        for root, dirs, files in os.walk(MEDIA_ROOT)
+        for name in files
+    )
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, CACHES=LOCAL_CACHES)
+class ProduireFichierTestCase(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        docx = DocxDocument()
+        docx.add_paragraph('Nom : {nom}')
+        docx.add_table(rows=1, cols=1).cell(0, 0).text = 'Ville : {{ville}}'
+        buffer = io.BytesIO()
+        docx.save(buffer)
+        self.template = TemplateDocument.objects.create(
+            nom='Courrier', fichier=ContentFile(buffer.getvalue(), name='courrier.docx')
+        )
+        formulaire = Formulaire.objects.create(template=self.template, titre='Courrier')
+        self.nom = Question.objects.create(formulaire=formulaire, label='nom', variable='nom', type_champ='text')
+        self.ville = Question.objects.create(formulaire=formulaire, label='ville', variable='ville', type_champ='text')
+        self.reponses = [
+            {'question': self.nom.id, 'valeur': 'Dupont & fils'},
+            {'question': self.ville.id, 'valeur': 'Lyon'},
+        ]
+
+    def _document(self, format='docx'):
+        return DocumentGenere.objects.create(template=self.template, format=format)
+
+    def _no_tempfile(self):
+        """Toute création de fichier temporaire fait échouer le test."""
+        stack = ExitStack()
+        for name in TEMPFILE_FUNCTIONS:
+            stack.enter_context(patch.object(
+                tempfile, name, side_effect=AssertionError(f'tempfile.{name} appelé')
+            ))
+        return stack
+
+    def _assert_valid_docx(self, document):
+        with document.fichier.open('rb') as f:
+            docx = DocxDocument(f)
+        self.assertEqual(docx.paragraphs[0].text, 'Nom : Dupont & fils')
+        self.assertEqual(docx.tables[0].cell(0, 0).text, 'Ville : Lyon')
+
+    def test_compiled_docx_in_memory(self):
+        document = self._document()
+        with self._no_tempfile():
+            produire_fichier(document, self.reponses)
+        self.assertEqual(document.fichier.name, f'documents_generes/document_{document.pk}.docx')
+        self._assert_valid_docx(document)
+        # Rien d'autre sur le disque que le template, sa forme compilée et le document
+        self.assertEqual(media_files(), [
+            f'documents_generes/document_{document.pk}.docx',
+            'templates/compiles/courrier.json',
+            'templates/courrier.docx',
+        ])
+
+    def test_python_docx_fallback_in_memory(self):
+        document = self._document()
+        with self._no_tempfile(), patch.object(generation, 'load_compiled', side_effect=ValueError('illisible')):
+            produire_fichier(document, self.reponses)
+        self._assert_valid_docx(document)
+        self.assertEqual(media_files(), [
+            f'documents_generes/document_{document.pk}.docx',
+            'templates/courrier.docx',
+        ])
+
+    def test_pdf_temporary_directory_removed(self):
+        dossiers = []
+
+        def convert(source_path, output_dir):
+            dossiers.append(output_dir)
+            # Le convertisseur reçoit le DOCX rendu
+            self.assertEqual(DocxDocument(source_path).paragraphs[0].text, 'Nom : Dupont & fils')
+            pdf_path = os.path.join(output_dir, 'out.pdf')
+            with open(pdf_path, 'wb') as f:
+                f.write(b'%PDF-1.4')
+            return pdf_path
+
+        document = self._document('pdf')
+        with patch.object(generation, 'convert_to_pdf', side_effect=convert):
+            produire_fichier(document, self.reponses)
+        with document.fichier.open('rb') as f:
+            self.assertEqual(f.read(), b'%PDF-1.4')
+        self.assertFalse(os.path.exists(dossiers[0]))
+
+    def test_missing_template_file(self):
+        os.remove(self.template.fichier.path)
+        with self.assertRaises(FileNotFoundError):
+            produire_fichier(self._document(), self.reponses)
@@ -0,0 +1,92 @@
+"""
+Tests de l'import de templates depuis une archive ZIP.
+"""
+
+import io
+import json
+import shutil
+import tempfile
+import zipfile
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from docx import Document as DocxDocument
+from rest_framework.test import APIClient
+
+from .models import CategorieTemplate, TemplateDocument, Question, VariableTemplate
+
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix='gendoc_tests_')
+
+
+def docx_bytes(*paragraphes):
+    docx = DocxDocument()
+    for texte in paragraphes:
+        docx.add_paragraph(texte)
+    buffer = io.BytesIO()
+    docx.save(buffer)
+    return buffer.getvalue()
+
+
+def make_archive(fichiers):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for nom, contenu in fichiers.items():
+            archive.writestr(nom, contenu)
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, DOCUMENT_GENERATION={'BATCH_WORKERS': 1})
+class TemplateIngestionTestCase(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.admin = get_user_model().objects.create_superuser(email='admin@example.com', password='admin123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.contrats = CategorieTemplate.objects.create(nom='Contrats')
+
+    def _import(self, archive, **data):
+        upload = SimpleUploadedFile('templates.zip', archive, content_type='application/zip')
+        return self.client.post('/api/documents/templates/importer/', {'archive': upload, **data}, format='multipart')
+
+    def test_import_with_manifest(self):
+        archive = make_archive({
+            'contrats/cdi.docx': docx_bytes('Entre {Nom} et {Entreprise}', 'Le {date_debut}'),
+            'attestation.docx': docx_bytes('{Nom} atteste'),
+            'casse.docx': b'pas un docx',
+            'notes.txt': b'ignore',
+            'manifest.json': json.dumps({'contrats/cdi.docx': {'categorie': 'contrats', 'nom': 'Contrat CDI'}}),
+        })
+        response = self._import(archive)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['total'], response.data['crees'], response.data['echecs']), (3, 2, 1))
+        cdi = TemplateDocument.objects.get(nom='Contrat CDI')
+        self.assertEqual(cdi.categorie, self.contrats)
+        self.assertFalse(cdi.status)
+        self.assertTrue(cdi.fichier_compile)
+        self.assertEqual(
+            list(Question.objects.filter(formulaire__template=cdi).order_by('id').values_list('variable', 'type_champ')),
+            [('nom', 'text'), ('entreprise', 'text'), ('date_debut', 'date')]
+        )
+        self.assertEqual(VariableTemplate.objects.filter(variable='nom').count(), 2)
+        erreur = next(r for r in response.data['resultats'] if r['fichier'] == 'casse.docx')
+        self.assertIsNone(erreur['template'])
+
+    def test_unknown_categorie_and_admin_only(self):
+        archive = make_archive({
+            'a.docx': docx_bytes('{x}'),
+            'manifest.json': json.dumps({'a.docx': 'Inconnue'}),
+        })
+        response = self._import(archive)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(TemplateDocument.objects.count(), 0)
+
+        self.client.force_authenticate(None)
+        self.assertIn(self._import(archive).status_code, (401, 403))
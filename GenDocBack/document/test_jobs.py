@@ -0,0 +1,147 @@
+"""
+Tests de la file d'attente de génération (jobs.py).
+"""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.db.models.query import QuerySet
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from . import jobs
+from .jobs import claim_next_document, enqueue_document, run_document_job
+from .models import DocumentGenere, TemplateDocument
+
+QUEUE_SETTINGS = {'QUEUE_MAX_ATTEMPTS': 3, 'QUEUE_RETRY_BACKOFF': 30, 'QUEUE_VISIBILITY_TIMEOUT': 600}
+
+
+def produit(document, reponses_data):
+    """produire_fichier réussi : le fichier est enregistré sur le document."""
+    document.fichier.name = f'documents_generes/document_{document.pk}.docx'
+
+
+@override_settings(DOCUMENT_GENERATION=QUEUE_SETTINGS)
+class GenerationQueueTestCase(TestCase):
+
+    def setUp(self):
+        self.template = TemplateDocument.objects.create(nom='Contrat', fichier='templates/test.docx')
+        self.now = timezone.now()
+
+    def _enqueue(self):
+        with self._at(0):
+            document = DocumentGenere.objects.create(template=self.template, format='docx')
+            enqueue_document(document)
+        return document
+
+    def _at(self, seconds):
+        """Horloge de jobs.py avancée de `seconds` secondes."""
+        return patch.object(jobs.timezone, 'now', return_value=self.now + timedelta(seconds=seconds))
+
+    def _claim(self, seconds=0):
+        with self._at(seconds):
+            return claim_next_document()
+
+    def _run(self, document, side_effect, seconds=0):
+        with self._at(seconds), patch.object(jobs, 'produire_fichier', side_effect=side_effect) as produire:
+            result = run_document_job(document)
+        return result, produire
+
+    def test_claim_in_order(self):
+        premier = self._enqueue()
+        second = self._enqueue()
+        DocumentGenere.objects.filter(pk=second.pk).update(prochaine_tentative=self.now - timedelta(seconds=10))
+
+        document = self._claim()
+        self.assertEqual(document.pk, second.pk)
+        self.assertEqual((document.status, document.tentatives), ('processing', 1))
+        self.assertEqual(document.verrou_expire_le, self.now + timedelta(seconds=600))
+        self.assertEqual(self._claim().pk, premier.pk)
+        self.assertIsNone(self._claim())
+
+    def test_future_attempt_not_claimed(self):
+        self._enqueue()
+        DocumentGenere.objects.update(prochaine_tentative=self.now + timedelta(seconds=30))
+        self.assertIsNone(self._claim())
+        self.assertIsNotNone(self._claim(31))
+
+    def test_conditional_update_race_guard(self):
+        document = self._enqueue()
+        perime = DocumentGenere.objects.get(pk=document.pk)
+        # Un autre worker réclame le document entre la lecture et la mise à jour
+        DocumentGenere.objects.filter(pk=document.pk).update(status='processing', tentatives=1)
+
+        with patch.object(QuerySet, 'first', autospec=True, return_value=perime):
+            self.assertIsNone(self._claim())
+        document.refresh_from_db()
+        self.assertEqual(document.tentatives, 1)
+
+    def test_success(self):
+        document = self._enqueue()
+        claimed = self._claim()
+        result, produire = self._run(claimed, produit)
+        self.assertTrue(result)
+        produire.assert_called_once()
+        document.refresh_from_db()
+        self.assertEqual(document.status, 'done')
+        self.assertEqual(document.fichier.name, f'documents_generes/document_{document.pk}.docx')
+        self.assertIsNone(document.verrou_expire_le)
+
+    def test_exponential_backoff_then_success(self):
+        document = self._enqueue()
+
+        # 1er échec : +30 s, 2e échec : +60 s
+        for attempt, (delay, start) in enumerate([(30, 0), (60, 31)], start=1):
+            claimed = self._claim(start)
+            self.assertEqual(claimed.tentatives, attempt)
+            with self.assertLogs('document.jobs', 'ERROR'):
+                self.assertFalse(self._run(claimed, RuntimeError('LibreOffice indisponible'), seconds=start)[0])
+            document.refresh_from_db()
+            self.assertEqual(document.status, 'pending')
+            self.assertEqual(document.derniere_erreur, 'LibreOffice indisponible')
+            self.assertEqual(document.prochaine_tentative, self.now + timedelta(seconds=start + delay))
+            self.assertIsNone(self._claim(start + delay - 1))
+
+        claimed = self._claim(91)
+        self.assertTrue(self._run(claimed, produit, seconds=91)[0])
+        document.refresh_from_db()
+        self.assertEqual((document.status, document.tentatives, document.derniere_erreur), ('done', 3, ''))
+
+    def test_max_attempts_cutoff(self):
+        document = self._enqueue()
+        for start in (0, 31, 92):
+            claimed = self._claim(start)
+            with self.assertLogs('document.jobs', 'ERROR'):
+                self._run(claimed, RuntimeError('échec'), seconds=start)
+        document.refresh_from_db()
+        self.assertEqual((document.status, document.tentatives), ('error', 3))
+        self.assertIsNone(self._claim(10_000))
+
+    def test_lock_expiry_recovery(self):
+        document = self._enqueue()
+        premier_worker = self._claim()
+        # Verrou encore valide : personne d'autre ne le prend
+        self.assertIsNone(self._claim(599))
+
+        repris = self._claim(601)
+        self.assertEqual((repris.pk, repris.tentatives), (document.pk, 2))
+
+        # Le premier worker se réveille : il n'est plus propriétaire, son résultat est ignoré
+        with self.assertLogs('document.jobs', 'ERROR'):
+            self._run(premier_worker, RuntimeError('trop tard'), seconds=602)
+        document.refresh_from_db()
+        self.assertEqual((document.status, document.tentatives, document.derniere_erreur), ('processing', 2, ''))
+
+        self.assertTrue(self._run(repris, produit, seconds=603)[0])
+        document.refresh_from_db()
+        self.assertEqual(document.status, 'done')
+
+    def test_crashed_worker_cutoff(self):
+        document = self._enqueue()
+        # Le worker meurt à chaque tentative sans rien enregistrer
+        for start in (0, 601, 1202):
+            self.assertEqual(self._claim(start).pk, document.pk)
+        self.assertIsNone(self._claim(1803))
+        document.refresh_from_db()
+        self.assertEqual(document.status, 'error')
+        self.assertEqual(document.derniere_erreur, "Délai de traitement dépassé")
@@ -0,0 +1,72 @@
+"""
+Tests de la pagination par curseur des documents générés.
+"""
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from user.models import User
+
+from .models import DocumentGenere, TemplateDocument
+from .testing import LOCAL_CACHES
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class KeysetPaginationTestCase(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_superuser(email='user@example.com', password='secret')
+        template = TemplateDocument.objects.create(nom='Contrat', fichier='templates/test.docx')
+        DocumentGenere.objects.bulk_create([
+            DocumentGenere(template=template, format='docx', user=self.user) for _ in range(7)
+        ])
+        # Même date pour tous : l'id doit départager
+        DocumentGenere.objects.update(date_generation=timezone.now())
+        self.ids = list(DocumentGenere.objects.order_by('-id').values_list('id', flat=True))
+
+    def _walk(self, url):
+        ids = []
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append(response.data)
+            ids.extend(d['id'] for d in response.data['results'])
+            url = response.data['next']
+        return ids, pages
+
+    def test_list_pages_cover_everything_once(self):
+        ids, pages = self._walk('/api/documents/documents/?page_size=3')
+        self.assertEqual(ids, self.ids)
+        self.assertEqual([len(p['results']) for p in pages], [3, 3, 1])
+        self.assertNotIn('count', pages[0])
+        self.assertIsNone(pages[0]['previous'])
+
+    def test_previous_link(self):
+        first = self.client.get('/api/documents/documents/?page_size=3').data
+        second = self.client.get(first['next']).data
+        back = self.client.get(second['previous']).data
+        self.assertEqual(back['results'], first['results'])
+        self.assertIsNone(back['previous'])
+
+    def test_count_on_demand(self):
+        response = self.client.get('/api/documents/documents/?page_size=3&count=1')
+        self.assertEqual(response.data['count'], 7)
+
+    def test_no_count_query(self):
+        self.client.get('/api/documents/documents/?page_size=3')
+        with self.assertNumQueries(1):
+            self.client.get('/api/documents/documents/?page_size=3')
+
+    def test_history(self):
+        self.client.force_authenticate(self.user)
+        ids, pages = self._walk('/api/documents/documents/history/?page_size=5')
+        self.assertEqual(ids, self.ids)
+        self.assertEqual(len(pages), 2)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/documents/documents/?cursor=nimportequoi')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
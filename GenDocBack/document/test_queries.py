@@ -0,0 +1,191 @@
+"""
+Tests de non-régression sur le nombre de requêtes SQL.
+Le coût d'une génération ne doit pas dépendre de la taille du formulaire.
+"""
+
+import io
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from docx import Document as DocxDocument
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from .models import (
+    CategorieTemplate, TemplateDocument, Formulaire, Question, ChoixQuestion, DocumentGenere
+)
+from .testing import LOCAL_CACHES
+from .validation import invalidate_plan
+
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix='gendoc_tests_')
+
+
+def make_template(nb_questions):
+    """Crée un template DOCX avec nb_questions variables, son formulaire et ses questions."""
+    docx = DocxDocument()
+    for i in range(nb_questions):
+        docx.add_paragraph(f"Champ {i} : {{champ_{i}}}")
+    buffer = io.BytesIO()
+    docx.save(buffer)
+
+    template = TemplateDocument.objects.create(
+        nom=f"Template {nb_questions}",
+        fichier=ContentFile(buffer.getvalue(), name='template.docx')
+    )
+    formulaire = Formulaire.objects.create(template=template, titre=template.nom)
+    questions = Question.objects.bulk_create([
+        Question(formulaire=formulaire, label=f"champ_{i}", variable=f"champ_{i}", type_champ='text')
+        for i in range(nb_questions)
+    ])
+    # bulk_create ne déclenche pas les signaux d'invalidation
+    invalidate_plan(template.id)
+    return template, questions
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, CACHES=LOCAL_CACHES)
+class DocumentGenereCreateQueriesTestCase(TestCase):
+    """POST /documents/ : nombre de requêtes constant."""
+
+    # Requêtes attendues pour une génération synchrone (template déjà compilé)
+    EXPECTED_QUERIES = 11
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def _post(self, template, questions, valeur):
+        return self.client.post('/api/documents/documents/', {
+            'template': template.id,
+            'format': 'docx',
+            'reponses': [{'question': q.id, 'valeur': f"{valeur} {q.id}"} for q in questions],
+        }, format='json')
+
+    def _count_queries(self, nb_questions):
+        template, questions = make_template(nb_questions)
+        # Première génération : compilation du template
+        self.assertEqual(self._post(template, questions, 'a').status_code, status.HTTP_201_CREATED)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self._post(template, questions, 'b')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(DocumentGenere.objects.get(pk=response.data['id']).status, 'done')
+        return len(ctx.captured_queries)
+
+    def test_query_count_independent_of_form_size(self):
+        small = self._count_queries(2)
+        large = self._count_queries(50)
+        self.assertEqual(small, large)
+        self.assertEqual(large, self.EXPECTED_QUERIES)
+
+    def test_reponses_created_in_bulk(self):
+        template, questions = make_template(20)
+        response = self._post(template, questions, 'a')
+        document = DocumentGenere.objects.get(pk=response.data['id'])
+        self.assertEqual(document.reponses.count(), 20)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class CatalogueListQueriesTestCase(TestCase):
+    """Les listes du catalogue gardent un nombre de requêtes constant."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def _add_templates(self, nombre):
+        for _ in range(nombre):
+            index = CategorieTemplate.objects.count()
+            categorie = CategorieTemplate.objects.create(nom=f'Catégorie {index}')
+            for status_template in (True, True, False):
+                template = TemplateDocument.objects.create(
+                    nom=f'Template {index}', categorie=categorie,
+                    fichier='templates/test.docx', status=status_template
+                )
+                formulaire = Formulaire.objects.create(template=template, titre=template.nom)
+                Question.objects.create(formulaire=formulaire, label='Nom', variable='nom', type_champ='text')
+
+    def _assert_constant(self, url):
+        self._add_templates(2)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(url)
+        self._add_templates(10)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+        return response
+
+    def test_categories_list(self):
+        response = self._assert_constant('/api/documents/categories/')
+        self.assertEqual({c['templates_count'] for c in response.data['results']}, {2})
+
+    def test_templates_list(self):
+        response = self._assert_constant('/api/documents/templates/')
+        self.assertTrue(all(t['categorie_nom'] for t in response.data['results']))
+
+    def test_category_templates(self):
+        self._add_templates(1)
+        categorie = CategorieTemplate.objects.get()
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/documents/categories/{categorie.id}/templates/')
+        self.assertEqual(len(response.data), 2)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class TemplateDetailQueriesTestCase(TestCase):
+    """GET /templates/{id}/ : formulaires, questions et choix en un nombre fixe de requêtes."""
+
+    # template, catégorie, formulaires, questions, choix
+    EXPECTED_QUERIES = 5
+
+    def setUp(self):
+        self.client = APIClient()
+        categorie = CategorieTemplate.objects.create(nom='Contrats')
+        self.template = TemplateDocument.objects.create(
+            nom='Contrat', categorie=categorie, fichier='templates/test.docx', status=True
+        )
+
+    def _add_formulaire(self, nb_questions):
+        formulaire = Formulaire.objects.create(template=self.template, titre='Formulaire')
+        questions = Question.objects.bulk_create([
+            Question(formulaire=formulaire, label=f'Choix {i}', variable=f'choix_{i}', type_champ='select')
+            for i in range(nb_questions)
+        ])
+        ChoixQuestion.objects.bulk_create([
+            ChoixQuestion(question=question, valeur=f'valeur {j}')
+            for question in questions
+            for j in range(3)
+        ])
+
+    def test_detail(self):
+        self._add_formulaire(2)
+        self._add_formulaire(20)
+        with self.assertNumQueries(self.EXPECTED_QUERIES):
+            response = self.client.get(f'/api/documents/templates/{self.template.id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['categorie_details']['templates_count'], 1)
+        formulaires = response.data['formulaires']
+        self.assertEqual([len(f['questions']) for f in formulaires], [2, 20])
+        self.assertEqual(len(formulaires[1]['questions'][0]['options']), 3)
+
+    def test_formulaires(self):
+        self._add_formulaire(10)
+        with self.assertNumQueries(self.EXPECTED_QUERIES):
+            response = self.client.get(f'/api/documents/templates/{self.template.id}/formulaires/')
+        self.assertEqual(len(response.data[0]['questions']), 10)
+
+    def test_formulaire_list(self):
+        self._add_formulaire(5)
+        self._add_formulaire(5)
+        # pagination, formulaires (avec leur template), questions, choix
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/documents/formulaires/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
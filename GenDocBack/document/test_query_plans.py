@@ -0,0 +1,97 @@
+"""
+Non-régression des plans d'exécution des requêtes fréquentes.
+
+Chaque requête est passée à EXPLAIN sur une base peuplée : le test échoue si
+elle parcourt toute la table ou doit trier ses résultats au lieu de suivre
+un index.
+"""
+
+import re
+
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from user.models import User
+
+from .models import CategorieTemplate, DocumentGenere, Formulaire, Question, ReponseQuestion, TemplateDocument
+
+
+class QueryPlanTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='user@example.com', password='secret')
+        autre = User.objects.create_user(email='autre@example.com', password='secret')
+        categories = CategorieTemplate.objects.bulk_create([
+            CategorieTemplate(nom=f'Catégorie {i}') for i in range(10)
+        ])
+        templates = TemplateDocument.objects.bulk_create([
+            TemplateDocument(
+                nom=f'Template {i}', categorie=categories[i % 10],
+                fichier='templates/test.docx', status=i % 3 != 0
+            )
+            for i in range(300)
+        ])
+        formulaires = Formulaire.objects.bulk_create([
+            Formulaire(template=template, titre=template.nom) for template in templates
+        ])
+        questions = Question.objects.bulk_create([
+            Question(
+                formulaire=formulaire, label=f'Question {j}', variable=f'q{j}',
+                type_champ='text', obligatoire=j % 2 == 0
+            )
+            for formulaire in formulaires
+            for j in range(5)
+        ])
+        documents = DocumentGenere.objects.bulk_create([
+            DocumentGenere(template=templates[i % 300], format='docx', user=(cls.user, autre, None)[i % 3])
+            for i in range(1500)
+        ])
+        ReponseQuestion.objects.bulk_create([
+            ReponseQuestion(document=document, question=questions[j], valeur='valeur')
+            for document in documents
+            for j in range(4)
+        ])
+        cls.categorie = categories[0]
+        cls.formulaire = formulaires[0]
+        cls.document = documents[0]
+
+    def assertUsesIndex(self, queryset):
+        """Échoue si le plan contient un parcours complet de table ou un tri."""
+        plan = queryset.explain()
+        if connection.vendor == 'sqlite':
+            # Un parcours d'index dans l'ordre demandé ("SCAN t USING INDEX") est accepté
+            full_scan = re.compile(rf'\bSCAN {queryset.model._meta.db_table}$', re.MULTILINE)
+            self.assertIsNone(full_scan.search(plan), f"Parcours complet de table :\n{plan}")
+            self.assertNotIn('TEMP B-TREE', plan, f"Tri sans index :\n{plan}")
+        elif connection.vendor == 'postgresql':
+            self.assertNotIn('Seq Scan', plan, plan)
+            self.assertNotIn('Sort', plan, plan)
+        return plan
+
+    def test_user_history(self):
+        self.assertUsesIndex(
+            DocumentGenere.objects.filter(user=self.user).order_by('-date_generation', '-id')[:20]
+        )
+
+    def test_documents_page(self):
+        self.assertUsesIndex(DocumentGenere.objects.filter(
+            date_generation__lte=timezone.now()
+        ).order_by('-date_generation', '-id')[:20])
+
+    def test_public_templates(self):
+        self.assertUsesIndex(TemplateDocument.objects.filter(status=True).order_by('-date_add')[:20])
+
+    def test_category_templates(self):
+        self.assertUsesIndex(
+            TemplateDocument.objects.filter(categorie=self.categorie, status=True).order_by('-date_add')
+        )
+
+    def test_document_reponses(self):
+        self.assertUsesIndex(ReponseQuestion.objects.filter(document=self.document).order_by('date_add', 'id'))
+
+    def test_required_questions(self):
+        plan = self.assertUsesIndex(Question.objects.filter(formulaire=self.formulaire, obligatoire=True))
+        if connection.vendor == 'sqlite':
+            self.assertIn('docq_form_oblig_idx', plan)
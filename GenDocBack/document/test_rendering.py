@@ -0,0 +1,96 @@
+"""
+Tests du remplacement des variables dans les documents Word (rendering.py).
+"""
+
+import io
+
+from django.test import SimpleTestCase
+from docx import Document as DocxDocument
+
+from .rendering import (
+    _iter_paragraphs, compile_placeholder_pattern, render_docx, replace_in_runs, replace_text_in_docx,
+)
+
+
+class ReplaceInRunsTestCase(SimpleTestCase):
+
+    def _replace(self, texts, replacements):
+        pattern = compile_placeholder_pattern(replacements)
+        return replace_in_runs(texts, pattern, lambda match: replacements[match.group(2)])
+
+    def test_nothing_to_replace(self):
+        self.assertIsNone(self._replace(['Pas de variable'], {'NOM': 'x'}))
+        self.assertIsNone(self._replace(['{AUTRE}'], {'NOM': 'x'}))
+
+    def test_single_and_double_braces(self):
+        self.assertEqual(self._replace(['{NOM} et {{NOM}}'], {'NOM': 'Dupont'}), ['Dupont et Dupont'])
+        # Accolades dépareillées : pas une variable
+        self.assertEqual(self._replace(['{{NOM} / {NOM}}'], {'NOM': 'x'}), ['{x / x}'])
+
+    def test_longest_name_first(self):
+        self.assertEqual(
+            self._replace(['{NOM_COMPLET} ({NOM})'], {'NOM': 'Dupont', 'NOM_COMPLET': 'Jean Dupont'}),
+            ['Jean Dupont (Dupont)'],
+        )
+
+    def test_placeholder_split_across_runs(self):
+        # "Bonjour {{NOM}} !" découpé par Word en quatre runs
+        texts = ['Bonjour {', '{NO', 'M}}', ' !']
+        self.assertEqual(self._replace(texts, {'NOM': 'Dupont'}), ['Bonjour Dupont', '', '', ' !'])
+
+    def test_several_placeholders_in_one_run(self):
+        texts = ['{A}-{', 'B}-{C}']
+        self.assertEqual(self._replace(texts, {'A': '1', 'B': '2', 'C': '3'}), ['1-2', '-3'])
+
+
+class ReplaceTextInDocxTestCase(SimpleTestCase):
+
+    def test_split_placeholder_keeps_run_formatting(self):
+        doc = DocxDocument()
+        paragraph = doc.add_paragraph()
+        paragraph.add_run('Client : ')
+        gras = paragraph.add_run('{{NO')
+        gras.bold = True
+        italique = paragraph.add_run('M}}')
+        italique.italic = True
+        paragraph.add_run(', fin')
+
+        replace_text_in_docx(doc, {'NOM': 'Dupont'})
+        runs = paragraph.runs
+        self.assertEqual(paragraph.text, 'Client : Dupont, fin')
+        # La valeur prend la mise en forme du run où commence la variable
+        self.assertEqual((runs[1].text, runs[1].bold), ('Dupont', True))
+        self.assertEqual((runs[2].text, runs[2].italic), ('', True))
+        self.assertEqual(runs[3].text, ', fin')
+
+    def test_nested_tables(self):
+        doc = DocxDocument()
+        doc.add_paragraph('{TITRE}')
+        table = doc.add_table(rows=2, cols=2)
+        table.cell(0, 0).text = '{A}'
+        table.cell(1, 1).text = 'Total {{B}}'
+        imbriquee = table.cell(0, 1).add_table(rows=1, cols=1)
+        imbriquee.cell(0, 0).text = 'Imbriqué {C}'
+
+        replace_text_in_docx(doc, {'TITRE': 'Devis', 'A': '1', 'B': '2', 'C': '3'})
+        self.assertEqual(doc.paragraphs[0].text, 'Devis')
+        self.assertEqual(table.cell(0, 0).text, '1')
+        self.assertEqual(table.cell(1, 1).text, 'Total 2')
+        self.assertEqual(imbriquee.cell(0, 0).text, 'Imbriqué 3')
+
+    def test_merged_cells_visited_once(self):
+        doc = DocxDocument()
+        table = doc.add_table(rows=1, cols=3)
+        fusion = table.cell(0, 0).merge(table.cell(0, 2))
+        fusion.text = '{A}'
+        paragraphs = list(_iter_paragraphs(doc))
+        self.assertEqual(len([p for p in paragraphs if p.text == '{A}']), 1)
+
+    def test_render_docx(self):
+        doc = DocxDocument()
+        doc.add_paragraph('Nom : {NOM}')
+        buffer = io.BytesIO()
+        doc.save(buffer)
+
+        content = render_docx(buffer.getvalue(), {'NOM': 'Dupont & fils'})
+        self.assertEqual(DocxDocument(io.BytesIO(content)).paragraphs[0].text, 'Nom : Dupont & fils')
@@ -0,0 +1,63 @@
+"""
+Tests de la détection des variables des templates DOCX.
+"""
+
+import io
+
+from django.test import SimpleTestCase
+from docx import Document as DocxDocument
+
+from .scanner import infer_type, scan_docx
+
+
+def docx_bytes(build):
+    docx = DocxDocument()
+    build(docx)
+    buffer = io.BytesIO()
+    docx.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+class ScanDocxTestCase(SimpleTestCase):
+
+    def test_split_runs_and_double_braces(self):
+        def build(docx):
+            paragraph = docx.add_paragraph()
+            paragraph.add_run('Bonjour {No').bold = True
+            paragraph.add_run('m}, né à {{ Ville }}')
+        result = scan_docx(docx_bytes(build))
+        self.assertEqual(result.variables, ['Nom', 'Ville'])
+
+    def test_tables_headers_and_locations(self):
+        def build(docx):
+            docx.add_paragraph('{Nom}')
+            table = docx.add_table(rows=1, cols=1)
+            table.cell(0, 0).text = 'Signé le {date_signature}'
+            docx.sections[0].footer.paragraphs[0].text = 'Réf. {reference} - {Nom}'
+        result = scan_docx(docx_bytes(build))
+        self.assertEqual(result.variables, ['Nom', 'date_signature', 'reference'])
+        self.assertEqual(result.locations['Nom'], [('word/document.xml', 1), ('word/footer1.xml', 1)])
+        self.assertEqual(result.locations['date_signature'], [('word/document.xml', 2)])
+
+
+class InferTypeTestCase(SimpleTestCase):
+
+    def test_whole_words(self):
+        for variable, type_champ in (
+            ('Date de naissance', 'date'),
+            ('date_naissance', 'date'),
+            ('Lieu de naissance', 'text'),
+            ('Âge', 'number'),
+            ('age_client', 'number'),
+            ('Page de garde', 'text'),
+            ('Hôtel', 'text'),
+            ('Téléphone', 'text'),
+            ('Numéro de dossier', 'text'),
+            ('Montant TTC', 'number'),
+            ('E-mail', 'email'),
+            ('adresse_email', 'email'),
+            ('Nom', 'text'),
+        ):
+            with self.subTest(variable=variable):
+                self.assertEqual(infer_type(variable), type_champ)
@@ -0,0 +1,144 @@
+"""
+Tests de la synchronisation différentielle du catalogue (?since=).
+"""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from .models import CategorieTemplate, ChoixQuestion, Formulaire, Question, Suppression, TemplateDocument
+from .sync import make_cursor, purge_tombstones
+
+
+# Sans marge : deltas exacts (le chevauchement est testé par SyncCursorMarginTestCase)
+@override_settings(DOCUMENT_GENERATION={'SYNC_CURSOR_MARGIN': 0})
+class DeltaSyncTestCase(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.categorie = CategorieTemplate.objects.create(nom='Contrats')
+        self.template = TemplateDocument.objects.create(
+            nom='Contrat', categorie=self.categorie, fichier='templates/test.docx', status=True
+        )
+        self.autre = TemplateDocument.objects.create(
+            nom='Attestation', categorie=self.categorie, fichier='templates/test.docx', status=True
+        )
+        self.formulaire = Formulaire.objects.create(template=self.template, titre='Contrat')
+        self.question = Question.objects.create(
+            formulaire=self.formulaire, label='Type', variable='type', type_champ='select'
+        )
+
+    def _sync(self, url, curseur):
+        response = self.client.get(url, {'since': curseur})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_full_then_delta(self):
+        data = self._sync('/api/documents/templates/', '0')
+        self.assertEqual({t['id'] for t in data['modifies']}, {self.template.id, self.autre.id})
+        self.assertEqual(data['supprimes'], [])
+
+        data = self._sync('/api/documents/templates/', data['curseur'])
+        self.assertEqual(data['modifies'], [])
+
+        self.template.nom = 'Contrat de travail'
+        self.template.save()
+        autre_id = self.autre.id
+        self.autre.delete()
+        data = self._sync('/api/documents/templates/', data['curseur'])
+        self.assertEqual([t['nom'] for t in data['modifies']], ['Contrat de travail'])
+        self.assertEqual(data['supprimes'], [autre_id])
+
+    def test_deactivated_template_deleted_for_public(self):
+        curseur = self._sync('/api/documents/templates/', '0')['curseur']
+        self.autre.status = False
+        self.autre.save()
+        data = self._sync('/api/documents/templates/', curseur)
+        self.assertEqual(data['modifies'], [])
+        self.assertEqual(data['supprimes'], [self.autre.id])
+
+    def test_choice_change_touches_question_and_formulaire(self):
+        curseur_questions = self._sync('/api/documents/questions/', '0')['curseur']
+        curseur_formulaires = self._sync('/api/documents/formulaires/', '0')['curseur']
+        ChoixQuestion.objects.create(question=self.question, valeur='CDI')
+
+        data = self._sync('/api/documents/questions/', curseur_questions)
+        self.assertEqual(data['modifies'][0]['options'], ['CDI'])
+        data = self._sync('/api/documents/formulaires/', curseur_formulaires)
+        self.assertEqual(data['modifies'][0]['questions'][0]['options'], ['CDI'])
+
+    def test_cascade_records_tombstones(self):
+        curseur = self._sync('/api/documents/questions/', '0')['curseur']
+        self.template.delete()
+        self.assertEqual(self._sync('/api/documents/questions/', curseur)['supprimes'], [self.question.id])
+        self.assertEqual(self._sync('/api/documents/formulaires/', curseur)['supprimes'], [self.formulaire.id])
+
+    def test_invalid_and_expired_cursors(self):
+        response = self.client.get('/api/documents/templates/', {'since': 'hier'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        ancien = make_cursor(timezone.now() - timedelta(days=365))
+        response = self.client.get('/api/documents/templates/', {'since': ancien})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+    def test_purge(self):
+        self.autre.delete()
+        Suppression.objects.update(date_suppression=timezone.now() - timedelta(days=365))
+        question_id = self.question.id
+        self.question.delete()
+        self.assertEqual(purge_tombstones(), 1)
+        self.assertEqual(Suppression.objects.get().objet_id, question_id)
+
+
+class SyncCursorMarginTestCase(TestCase):
+    """Curseur reculé de SYNC_CURSOR_MARGIN : les commits tardifs ne sont pas manqués."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.template = TemplateDocument.objects.create(nom='Contrat', fichier='templates/test.docx', status=True)
+
+    def _sync(self, curseur):
+        response = self.client.get('/api/documents/templates/', {'since': curseur})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def _late_commit(self, instant):
+        """Objet et suppression datés de instant, visibles seulement après la synchronisation."""
+        tardif = TemplateDocument.objects.create(nom='Tardif', fichier='templates/test.docx', status=True)
+        TemplateDocument.objects.filter(pk=tardif.pk).update(updated_at=instant)
+        Suppression.objects.create(modele=Suppression.TEMPLATE, objet_id=9999)
+        Suppression.objects.filter(objet_id=9999).update(date_suppression=instant)
+        return tardif
+
+    def test_late_commit_seen_next_time(self):
+        avant = timezone.now()
+        curseur = self._sync('0')['curseur']
+        # Écrit avant la lecture précédente, commité après
+        tardif = self._late_commit(avant - timedelta(seconds=5))
+
+        data = self._sync(curseur)
+        self.assertIn(tardif.id, [t['id'] for t in data['modifies']])
+        self.assertEqual(data['supprimes'], [9999])
+
+    def test_without_margin_late_commit_missed(self):
+        avant = timezone.now()
+        with self.settings(DOCUMENT_GENERATION={'SYNC_CURSOR_MARGIN': 0}):
+            curseur = self._sync('0')['curseur']
+            self._late_commit(avant - timedelta(seconds=5))
+            data = self._sync(curseur)
+        self.assertEqual((data['modifies'], data['supprimes']), ([], []))
+
+    def test_overlap_resends_recent_objects(self):
+        data = self._sync('0')
+        self.assertEqual([t['id'] for t in data['modifies']], [self.template.id])
+        # Modifié pendant la marge : renvoyé, le client le remplace par identifiant
+        data = self._sync(data['curseur'])
+        self.assertEqual([t['id'] for t in data['modifies']], [self.template.id])
+
+        plus_tard = timezone.now() + timedelta(seconds=61)
+        with patch('document.sync.timezone.now', return_value=plus_tard):
+            curseur = self._sync(data['curseur'])['curseur']
+        self.assertEqual(self._sync(curseur)['modifies'], [])
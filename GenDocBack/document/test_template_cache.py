@@ -0,0 +1,118 @@
+"""
+Tests du cache LRU des templates (template_cache.py).
+"""
+
+import os
+import shutil
+import tempfile
+from unittest.mock import Mock, patch
+
+from django.test import SimpleTestCase, override_settings
+
+from . import template_cache
+from .template_cache import TemplateCache
+
+
+class TemplateCacheTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp(prefix='gendoc_tests_')
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+        self.cache = TemplateCache(max_bytes=30)
+        self.loader = Mock(side_effect=lambda path: (f'valeur de {os.path.basename(path)}', 10))
+
+    def _file(self, name, content=b'contenu'):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def _cached(self):
+        return [key[1] for key in self.cache._entries]
+
+    def test_hit_and_miss(self):
+        path = self._file('a.docx')
+        self.assertEqual(self.cache.get(path, self.loader), 'valeur de a.docx')
+        self.assertEqual(self.cache.get(path, self.loader), 'valeur de a.docx')
+        self.loader.assert_called_once_with(path)
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['hit_ratio']), (1, 1, 0.5))
+        self.assertEqual((stats['entries'], stats['size_bytes']), (1, 10))
+
+    def test_lru_order(self):
+        a, b, c, d = (self._file(f'{name}.docx') for name in 'abcd')
+        for path in (a, b, c):
+            self.cache.get(path, self.loader)
+        # a redevient le plus récent : b est le moins récemment utilisé
+        self.cache.get(a, self.loader)
+        self.cache.get(d, self.loader)
+        self.assertEqual(self._cached(), [c, a, d])
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+
+        self.cache.get(b, self.loader)
+        self.assertEqual(self._cached(), [a, d, b])
+        self.assertEqual(self.cache.stats()['evictions'], 2)
+
+    def test_byte_limit(self):
+        for i in range(10):
+            self.cache.get(self._file(f'{i}.docx'), self.loader)
+            self.assertLessEqual(self.cache.stats()['size_bytes'], 30)
+        self.assertEqual(self.cache.stats()['entries'], 3)
+        self.assertEqual(self.cache.stats()['evictions'], 7)
+
+    def test_value_larger_than_limit_not_cached(self):
+        path = self._file('gros.docx')
+        loader = Mock(return_value=('gros', 31))
+        self.cache.get(path, loader)
+        self.cache.get(path, loader)
+        self.assertEqual(loader.call_count, 2)
+        self.assertEqual(self.cache.stats()['entries'], 0)
+        self.assertEqual(self.cache.stats()['misses'], 2)
+
+    def test_invalidated_on_mtime_change(self):
+        path = self._file('a.docx')
+        self.cache.get(path, self.loader)
+        stat = os.stat(path)
+        # Même taille, date différente
+        self._file('a.docx')
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        self.cache.get(path, self.loader)
+        self.assertEqual(self.loader.call_count, 2)
+        # L'ancienne version est retirée, pas seulement poussée vers la sortie
+        self.assertEqual(self.cache.stats()['entries'], 1)
+        self.assertEqual(self.cache.stats()['size_bytes'], 10)
+
+    def test_invalidated_on_size_change(self):
+        path = self._file('a.docx')
+        self.cache.get(path, self.loader)
+        stat = os.stat(path)
+        self._file('a.docx', b'contenu plus long')
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.cache.get(path, self.loader)
+        self.assertEqual(self.loader.call_count, 2)
+        self.assertEqual(self.cache.stats()['entries'], 1)
+
+    def test_namespaces_kept_apart(self):
+        path = self._file('a.docx')
+        self.cache.get(path, self.loader, 'bytes')
+        self.cache.get(path, Mock(return_value=('compilé', 10)), 'compiled')
+        self.assertEqual(self.cache.get(path, self.loader, 'bytes'), 'valeur de a.docx')
+        self.assertEqual(self.cache.stats()['entries'], 2)
+
+    def test_read_bytes(self):
+        path = self._file('a.docx', b'PK docx')
+        cache = TemplateCache(max_bytes=1024)
+        with self.settings(DOCUMENT_GENERATION={'TEMPLATE_CACHE_MAX_BYTES': 1024}), \
+                patch.object(template_cache, '_cache', cache):
+            self.assertEqual(template_cache.read_bytes(path), b'PK docx')
+            self.assertEqual(template_cache.read_bytes(path), b'PK docx')
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    @override_settings(DOCUMENT_GENERATION={'TEMPLATE_CACHE_MAX_BYTES': 0})
+    def test_disabled(self):
+        path = self._file('a.docx', b'PK docx')
+        loader = Mock(return_value=('valeur', 10))
+        self.assertEqual(template_cache.load(path, loader, 'compiled'), 'valeur')
+        self.assertEqual(template_cache.load(path, loader, 'compiled'), 'valeur')
+        self.assertEqual(loader.call_count, 2)
+        self.assertEqual(template_cache.read_bytes(path), b'PK docx')
@@ -0,0 +1,132 @@
+"""
+Tests de la validation des réponses (plan de validation mis en cache).
+"""
+
+from django.core.cache import cache, caches
+from django.test import TestCase, override_settings
+
+from .models import TemplateDocument, Formulaire, Question, ChoixQuestion
+from .serializers import DocumentGenereCreateSerializer
+from .scanner import infer_type
+from .testing import LOCAL_CACHES
+from .validation import PLAN_CACHE_KEY, get_plan
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class ValidationPlanTestCase(TestCase):
+    """Validation de DocumentGenereCreateSerializer."""
+
+    def setUp(self):
+        cache.clear()
+        self.template = TemplateDocument.objects.create(nom='Contrat', fichier='templates/contrat.docx')
+        formulaire = Formulaire.objects.create(template=self.template, titre='Contrat')
+        self.nom = Question.objects.create(formulaire=formulaire, label='Nom', variable='nom', type_champ='text')
+        self.date = Question.objects.create(
+            formulaire=formulaire, label='Date', variable='date', type_champ='date', obligatoire=False
+        )
+        self.email = Question.objects.create(
+            formulaire=formulaire, label='Email', variable='email', type_champ='email', obligatoire=False
+        )
+        self.montant = Question.objects.create(
+            formulaire=formulaire, label='Montant', variable='montant', type_champ='number', obligatoire=False
+        )
+        self.civilite = Question.objects.create(
+            formulaire=formulaire, label='Civilité', variable='civilite', type_champ='select', obligatoire=False
+        )
+        for valeur in ('M.', 'Mme'):
+            ChoixQuestion.objects.create(question=self.civilite, valeur=valeur)
+
+    def _errors(self, reponses):
+        serializer = DocumentGenereCreateSerializer(data={
+            'template': self.template.id,
+            'format': 'docx',
+            'reponses': [{'question': q.id, 'valeur': v} for q, v in reponses],
+        })
+        if serializer.is_valid():
+            return []
+        return serializer.errors['non_field_errors']
+
+    def test_valid_reponses(self):
+        self.assertEqual(self._errors([
+            (self.nom, 'Dupont'), (self.date, '31/12/2024'), (self.email, 'a@b.fr'),
+            (self.montant, '1 250,50'), (self.civilite, 'Mme'),
+        ]), [])
+
+    def test_required_question(self):
+        self.assertEqual(self._errors([(self.date, '2024-01-01')]), ["La question 'Nom' est obligatoire"])
+
+    def test_typed_values(self):
+        errors = self._errors([
+            (self.nom, 'Dupont'), (self.date, '31/02/2024'), (self.email, 'pas-un-email'),
+            (self.montant, 'douze'), (self.civilite, 'Dr'),
+        ])
+        self.assertEqual(len(errors), 4)
+
+    def test_inferred_types_accept_text_labels(self):
+        # Questions créées à l'upload : type déduit du libellé
+        formulaire = self.nom.formulaire
+        reponses = [(self.nom, 'Dupont')]
+        for label, valeur in (
+            ('Lieu de naissance', 'Lyon'), ('Hôtel', 'Hôtel de la Gare'), ('Page de garde', 'Sommaire'),
+            ('Téléphone', '06.12.34.56.78'), ('Numéro de dossier', 'A-2024-17'),
+        ):
+            question = Question.objects.create(
+                formulaire=formulaire, label=label, variable=label.lower(), type_champ=infer_type(label),
+                obligatoire=False,
+            )
+            reponses.append((question, valeur))
+        self.assertEqual(self._errors(reponses), [])
+
+    def test_unknown_question(self):
+        autre = TemplateDocument.objects.create(nom='Autre', fichier='templates/autre.docx')
+        question = Question.objects.create(
+            formulaire=Formulaire.objects.create(template=autre, titre='Autre'),
+            label='X', variable='x', type_champ='text'
+        )
+        errors = self._errors([(self.nom, 'Dupont'), (question, 'x')])
+        self.assertEqual(errors, [f"Questions inconnues pour ce template : {question.id}"])
+
+    def test_plan_cached_then_invalidated(self):
+        get_plan(self.template.id)
+        with self.assertNumQueries(0):
+            get_plan(self.template.id)
+
+        ChoixQuestion.objects.create(question=self.civilite, valeur='Dr')
+        self.assertEqual(self._errors([(self.nom, 'Dupont'), (self.civilite, 'Dr')]), [])
+
+        self.nom.obligatoire = False
+        self.nom.save()
+        self.assertEqual(self._errors([(self.date, '2024-01-01')]), [])
+
+
+class SharedValidationPlanTestCase(TestCase):
+    """Avec le cache partagé de settings.py (base de données)."""
+
+    def setUp(self):
+        cache.clear()
+        self.template = TemplateDocument.objects.create(nom='Contrat', fichier='templates/contrat.docx')
+        self.formulaire = Formulaire.objects.create(template=self.template, titre='Contrat')
+        Question.objects.create(formulaire=self.formulaire, label='Nom', variable='nom', type_champ='text')
+
+    def test_invalidation_seen_by_other_processes(self):
+        autre_worker = caches.create_connection('default')
+        key = PLAN_CACHE_KEY.format(self.template.id)
+        get_plan(self.template.id)
+        self.assertIsNotNone(autre_worker.get(key))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Question.objects.create(
+                formulaire=self.formulaire, label='Date', variable='date', type_champ='date'
+            )
+        self.assertIsNone(autre_worker.get(key))
+        self.assertEqual(len(get_plan(self.template.id)['obligatoires']), 2)
+
+    def test_plan_rebuilt_during_transaction_dropped_at_commit(self):
+        key = PLAN_CACHE_KEY.format(self.template.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            Question.objects.create(
+                formulaire=self.formulaire, label='Date', variable='date', type_champ='date'
+            )
+            # Plan reconstruit par une requête concurrente avant le commit
+            cache.set(key, {'questions': {}, 'obligatoires': {}, 'formulaires': True})
+        self.assertIsNone(cache.get(key))
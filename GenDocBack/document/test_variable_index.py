@@ -0,0 +1,46 @@
+"""
+Tests de l'index inversé des variables.
+"""
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from .models import TemplateDocument, Formulaire, Question, VariableTemplate
+
+
+def make_template(nom, variables, status=True):
+    template = TemplateDocument.objects.create(nom=nom, fichier=f'templates/{nom}.docx', status=status)
+    formulaire = Formulaire.objects.create(template=template, titre=nom)
+    for variable in variables:
+        Question.objects.create(formulaire=formulaire, label=variable, variable=variable, type_champ='text')
+    return template
+
+
+class VariableIndexTestCase(TestCase):
+
+    def setUp(self):
+        self.contrat = make_template('contrat', ['nom', 'prenom', 'date_naissance', 'salaire'])
+        self.attestation = make_template('attestation', ['nom', 'prenom'])
+        self.facture = make_template('facture', ['montant'])
+        self.brouillon = make_template('brouillon', ['nom', 'prenom'], status=False)
+        self.client = APIClient()
+
+    def test_index_follows_questions(self):
+        question = Question.objects.get(formulaire__template=self.facture, variable='montant')
+        question.variable = 'Montant TTC'
+        question.save()
+        self.assertEqual(VariableTemplate.objects.get(question=question).variable, 'montant_ttc')
+        question.delete()
+        self.assertFalse(VariableTemplate.objects.filter(template=self.facture).exists())
+
+    def test_couverture_ranking(self):
+        response = self.client.get('/api/documents/templates/couverture/', {'variables': 'Nom,prenom,date naissance'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(r['nom'], r['variables_couvertes'], r['variables_template']) for r in response.data],
+            [('contrat', 3, 4), ('attestation', 2, 2)]
+        )
+
+    def test_couverture_requires_variables(self):
+        response = self.client.get('/api/documents/templates/couverture/')
+        self.assertEqual(response.status_code, 400)
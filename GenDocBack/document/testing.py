@@ -0,0 +1,10 @@
+"""
+Outils communs aux tests.
+"""
+
+# Cache en mémoire fixé pour les tests qui comptent les requêtes SQL de
+# l'application ou jouent sur l'expiration des entrées, quel que soit le cache
+# configuré (REDIS_URL).
+LOCAL_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+}
@@ -0,0 +1,147 @@
+"""
+Validation des réponses d'un document à partir d'un plan mis en cache.
+
+Le plan d'un template (questions obligatoires, type de chaque question, choix
+autorisés des listes déroulantes) est construit en quelques requêtes puis
+gardé dans le cache Django, partagé entre les processus (CACHES dans
+settings.py) ; il est invalidé par les signaux sur Formulaire, Question et
+ChoixQuestion (voir signals.py). Les réponses sont ensuite
+vérifiées par opérations d'ensembles et validateurs précompilés, sans requête.
+"""
+
+import re
+from datetime import date
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.core.validators import validate_email
+
+from .conf import get_setting
+from .models import ChoixQuestion, Formulaire, Question
+
+PLAN_CACHE_KEY = 'document:validation_plan:{}'
+
+DATE_ISO = re.compile(r'^(\d{4})-(\d{1,2})-(\d{1,2})$')
+DATE_FR = re.compile(r'^(\d{1,2})/(\d{1,2})/(\d{4})$')
+# Séparateurs de milliers acceptés : espace, espace insécable, espace fine insécable
+NUMBER = re.compile(r'^[+-]?\d[\d \u00a0\u202f]*(?:[.,]\d+)?$')
+
+
+def _valid_date(valeur):
+    match = DATE_ISO.match(valeur)
+    if match:
+        year, month, day = match.groups()
+    else:
+        match = DATE_FR.match(valeur)
+        if not match:
+            return False
+        day, month, year = match.groups()
+    try:
+        date(int(year), int(month), int(day))
+    except ValueError:
+        return False
+    return True
+
+
+def _valid_number(valeur):
+    return NUMBER.match(valeur) is not None
+
+
+def _valid_email(valeur):
+    try:
+        validate_email(valeur)
+    except ValidationError:
+        return False
+    return True
+
+
+# type_champ -> (validateur, message)
+VALIDATORS = {
+    'date': (_valid_date, "doit être une date (AAAA-MM-JJ ou JJ/MM/AAAA)"),
+    'number': (_valid_number, "doit être un nombre"),
+    'email': (_valid_email, "doit être une adresse email valide"),
+}
+
+
+def build_plan(template_id):
+    """Construit le plan de validation d'un template (3 requêtes)."""
+    questions = {}
+    obligatoires = {}
+    for question_id, label, type_champ, obligatoire in (
+        Question.objects.filter(formulaire__template_id=template_id)
+        .order_by('id')
+        .values_list('id', 'label', 'type_champ', 'obligatoire')
+    ):
+        questions[question_id] = (label, type_champ, None)
+        if obligatoire:
+            obligatoires[question_id] = label
+
+    choix = {}
+    for question_id, valeur in ChoixQuestion.objects.filter(
+        question__formulaire__template_id=template_id,
+        question__type_champ='select',
+    ).values_list('question_id', 'valeur'):
+        choix.setdefault(question_id, set()).add(valeur)
+    for question_id, valeurs in choix.items():
+        label, type_champ, _ = questions[question_id]
+        questions[question_id] = (label, type_champ, frozenset(valeurs))
+
+    return {
+        'formulaires': Formulaire.objects.filter(template_id=template_id).exists(),
+        'questions': questions,
+        'obligatoires': obligatoires,
+    }
+
+
+def get_plan(template_id):
+    """Plan de validation d'un template, depuis le cache si possible."""
+    key = PLAN_CACHE_KEY.format(template_id)
+    plan = cache.get(key)
+    if plan is None:
+        plan = build_plan(template_id)
+        cache.set(key, plan, get_setting('VALIDATION_PLAN_TIMEOUT'))
+    return plan
+
+
+def invalidate_plan(template_id):
+    """À appeler après une modification des questions qui ne passe pas par save()."""
+    key = PLAN_CACHE_KEY.format(template_id)
+    cache.delete(key)
+    # Une seconde fois à la validation de la transaction : un plan reconstruit
+    # entre-temps avec les anciennes questions n'est pas gardé
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def check_values(plan, valeurs):
+    """
+    Vérifie les valeurs {question_id: valeur} au regard du plan.
+    Retourne la liste des erreurs (vide si tout est valide).
+    """
+    erreurs = []
+    questions = plan['questions']
+
+    inconnues = valeurs.keys() - questions.keys()
+    if inconnues:
+        erreurs.append(
+            "Questions inconnues pour ce template : "
+            + ", ".join(str(question_id) for question_id in sorted(inconnues))
+        )
+
+    for question_id in sorted(plan['obligatoires'].keys() - valeurs.keys()):
+        erreurs.append(f"La question '{plan['obligatoires'][question_id]}' est obligatoire")
+
+    for question_id in sorted(valeurs.keys() & questions.keys()):
+        valeur = str(valeurs[question_id]).strip()
+        if not valeur:
+            continue
+        label, type_champ, choix = questions[question_id]
+        if choix is not None:
+            if valeur not in choix:
+                erreurs.append(f"La question '{label}' n'accepte que : {', '.join(sorted(choix))}")
+            continue
+        validator = VALIDATORS.get(type_champ)
+        if validator is not None and not validator[0](valeur):
+            erreurs.append(f"La question '{label}' {validator[1]}")
+
+    return erreurs
@@ -0,0 +1,71 @@
+"""
+Index inversé des variables du catalogue.
+
+Chaque question est indexée par sa variable normalisée (slug) avec son
+template : « quels templates utilisent date_naissance ? » ou « quels templates
+peuvent être préremplis avec ces réponses ? » deviennent une requête sur un
+index au lieu d'un parcours de toutes les questions.
+"""
+
+import re
+
+from django.db.models import Count, Q
+
+from .models import Question, VariableTemplate
+
+
+def normalize_variable(variable):
+    """Slug d'une variable : minuscules, caractères non alphanumériques remplacés par '_'."""
+    return re.sub(r'[^\w]+', '_', variable.strip().lower()).strip('_')
+
+
+def index_questions(questions):
+    """
+    Indexe des questions qui viennent d'être créées par bulk_create (qui ne
+    déclenche pas les signaux). Leur formulaire doit être chargé.
+    """
+    VariableTemplate.objects.bulk_create([
+        VariableTemplate(
+            variable=normalize_variable(question.variable),
+            template_id=question.formulaire.template_id,
+            question=question,
+        )
+        for question in questions
+    ])
+
+
+def index_question(question):
+    """Indexe (ou réindexe) une question après son enregistrement."""
+    template_id = Question.objects.filter(pk=question.pk).values_list('formulaire__template_id', flat=True).first()
+    VariableTemplate.objects.update_or_create(
+        question=question,
+        defaults={'variable': normalize_variable(question.variable), 'template_id': template_id},
+    )
+
+
+def rank_templates(variables, queryset=None):
+    """
+    Templates classés par couverture d'un ensemble de variables, en une requête.
+
+    Retourne une liste de dicts {template_id, template__nom, couvertes, total} : couvertes est le
+    nombre de variables demandées que le template utilise, total le nombre de
+    variables distinctes du template.
+    """
+    slugs = {normalize_variable(variable) for variable in variables} - {''}
+    if not slugs:
+        return []
+
+    candidats = VariableTemplate.objects.filter(variable__in=slugs).values('template_id')
+    if queryset is not None:
+        candidats = candidats.filter(template__in=queryset)
+
+    return list(
+        VariableTemplate.objects
+        .filter(template_id__in=candidats)
+        .values('template_id', 'template__nom')
+        .annotate(
+            total=Count('variable', distinct=True),
+            couvertes=Count('variable', filter=Q(variable__in=slugs), distinct=True),
+        )
+        .order_by('-couvertes', 'total', 'template_id')
+    )
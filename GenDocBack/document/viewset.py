@@ -1,3 +1,4 @@
+import logging
 import re
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
@@ -7,7 +8,7 @@ from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
 from django.core.files.base import ContentFile
 from django.db import models
-import subprocess
+from django.db.models import Count, Prefetch, Q, prefetch_related_objects
 import os
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas # Exemple avec ReportLab
@@ -15,29 +16,64 @@ from django.core.files.base import ContentFile
 import io
 from django.http import FileResponse
 import tempfile
-from docx import Document
-from docx2pdf import convert
-import platform
-import pythoncom
+from . import template_cache
+from .batch import generate_batch
+from . import catalogue
+from .catalogue import CatalogueCacheMixin, cache_response
+from .conditional import is_not_modified, make_etag, not_modified, set_validators
+from .compiler import compile_template
+from .conf import get_setting
+from .dedup import document_fingerprint, reuse_existing
+from .generation import generer_fichier
+from .ingestion import IngestionError, ingest_archive
+from .jobs import enqueue_document
+from .pagination import KeysetPagination, ReponseKeysetPagination
+from .scanner import infer_type, scan_docx
+from .sync import DeltaSyncMixin
+from .variable_index import normalize_variable, rank_templates
 from .models import (
-    CategorieTemplate, TemplateDocument, Formulaire,
-    Question, TypeDocument, DocumentGenere, ReponseQuestion
+    CategorieTemplate, TemplateDocument, Formulaire, Question, ChoixQuestion,
+    Suppression, TypeDocument, DocumentGenere, ReponseQuestion
 )
 from .serializers import (
     CategorieTemplateSerializer, TemplateDocumentListSerializer,
     TemplateDocumentCreateSerializer, TemplateDocumentDetailSerializer,
     FormulaireSerializer, QuestionSerializer, TypeDocumentSerializer,
     DocumentGenereListSerializer, DocumentGenereDetailSerializer,
-    DocumentGenereCreateSerializer, ReponseQuestionSerializer
+    DocumentGenereCreateSerializer, ReponseQuestionSerializer,
+    DocumentBatchSerializer, TemplateArchiveSerializer
 )
 
+logger = logging.getLogger(__name__)
 
-class CategorieTemplateViewSet(viewsets.GenericViewSet,
+
+def formulaires_prefetch():
+    """Formulaires ordonnés avec leurs questions et les choix des questions"""
+    return Prefetch(
+        'formulaires',
+        queryset=Formulaire.objects.order_by('id').prefetch_related(questions_prefetch())
+    )
+
+
+def questions_prefetch():
+    """Questions ordonnées avec leurs choix"""
+    return Prefetch(
+        'questions',
+        queryset=Question.objects.order_by('id').prefetch_related(
+            Prefetch('choix', queryset=ChoixQuestion.objects.order_by('id'))
+        )
+    )
+
+
+class CategorieTemplateViewSet(CatalogueCacheMixin,
+                               viewsets.GenericViewSet,
                                viewsets.mixins.ListModelMixin,
                                viewsets.mixins.RetrieveModelMixin,
                                viewsets.mixins.CreateModelMixin):
 
-    queryset = CategorieTemplate.objects.all()
+    queryset = CategorieTemplate.objects.annotate(
+        templates_count=Count('templates', filter=Q(templates__status=True))
+    )
     serializer_class = CategorieTemplateSerializer
     authentication_classes = []
     permission_classes = [AllowAny]
@@ -47,22 +83,24 @@ class CategorieTemplateViewSet(viewsets.GenericViewSet,
     ordering = ['nom']
 
     @action(detail=True, methods=['get'])
+    @cache_response
     def templates(self, request, pk=None):
         """Récupération de tous les templates d'une catégorie"""
         categorie = self.get_object()
-        templates = categorie.templates.filter(status=True)
+        templates = categorie.templates.filter(status=True).select_related('categorie')
         serializer = TemplateDocumentListSerializer(templates, many=True)
         return Response(serializer.data)
 
 
-class TemplateDocumentViewSet(viewsets.GenericViewSet,
+class TemplateDocumentViewSet(CatalogueCacheMixin,
+                              DeltaSyncMixin,
+                              viewsets.GenericViewSet,
                               viewsets.mixins.ListModelMixin,
                               viewsets.mixins.RetrieveModelMixin,
                               viewsets.mixins.CreateModelMixin):
 
-    queryset = TemplateDocument.objects.select_related('categorie').prefetch_related(
-        'formulaires__questions'
-    )
+    queryset = TemplateDocument.objects.select_related('categorie')
+    sync_modele = Suppression.TEMPLATE
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['categorie', 'status']
     permission_classes = [AllowAny]
@@ -73,10 +111,30 @@ class TemplateDocumentViewSet(viewsets.GenericViewSet,
     def get_queryset(self):
         """Surcharge pour filtrer les templates inactifs pour les non-admins"""
         queryset = super().get_queryset()
+        if self.action in ('retrieve', 'formulaires'):
+            queryset = self._detail_queryset(queryset)
         if self.request.user and self.request.user.is_staff:
             return queryset
         return queryset.filter(status=True)
 
+    def get_deleted_ids(self, since):
+        """Pour les non-admins, un template désactivé disparaît comme s'il était supprimé"""
+        supprimes = super().get_deleted_ids(since)
+        if self.request.user and self.request.user.is_staff:
+            return supprimes
+        desactives = TemplateDocument.objects.filter(status=False, updated_at__gt=since).values_list('id', flat=True)
+        return sorted(set(supprimes).union(desactives))
+
+    def _detail_queryset(self, queryset):
+        """
+        Lecture détaillée en un nombre fixe de requêtes : template, catégorie
+        (avec son nombre de templates), formulaires, questions et choix.
+        """
+        return queryset.select_related(None).prefetch_related(
+            Prefetch('categorie', queryset=CategorieTemplateViewSet.queryset),
+            formulaires_prefetch(),
+        )
+
     def get_serializer_class(self):
         """Utilisation des différents serializers selon l'action"""
         if self.action == 'retrieve':
@@ -91,6 +149,8 @@ class TemplateDocumentViewSet(viewsets.GenericViewSet,
         template = self.get_object()
         template.status = True
         template.save()
+        if not template.fichier_compile:
+            self._compile_template(template)
         return Response({'status': 'Template activé avec succès'})
 
     def perform_create(self, serializer):
@@ -98,6 +158,14 @@ class TemplateDocumentViewSet(viewsets.GenericViewSet,
         # Le template est créé avec status=False (en attente de validation)
         template = serializer.save(status=False)
         self._extract_and_create_questions(template)
+        self._compile_template(template)
+
+    def _compile_template(self, template):
+        """Compile le template ; en cas d'échec il sera compilé à la première génération"""
+        try:
+            compile_template(template)
+        except Exception:
+            logger.exception("Compilation du template %s impossible", template.pk)
 
     def _extract_and_create_questions(self, template):
         """Ouvre le fichier du template, extrait les variables entre {} et crée le formulaire + questions"""
@@ -115,7 +183,7 @@ class TemplateDocumentViewSet(viewsets.GenericViewSet,
         for variable in variables:
             type_champ = self._infer_type(variable)
             # Générer un nom de variable slug à partir du label
-            slug = re.sub(r'[^\w]+', '_', variable.strip().lower()).strip('_')
+            slug = normalize_variable(variable)
             Question.objects.create(
                 formulaire=formulaire,
                 label=variable.strip(),
@@ -139,36 +207,20 @@ class TemplateDocumentViewSet(viewsets.GenericViewSet,
             return []
 
     def _extract_from_docx(self, fichier):
-        """Extraction des variables depuis un fichier .docx"""
+        """Extraction des variables depuis un fichier .docx (corps, tableaux, en-têtes, pieds de page, zones de texte)"""
         try:
             fichier.seek(0)
-            doc = Document(fichier)
-            full_text = ' '.join([p.text for p in doc.paragraphs])
-            # Aussi chercher dans les tableaux
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        full_text += ' ' + cell.text
-            return list(dict.fromkeys(re.findall(r'\{([^}]+)\}', full_text)))
+            return scan_docx(fichier).variables
         except Exception as e:
             print(f"Erreur lecture docx: {e}")
             return []
 
     def _infer_type(self, variable):
         """Déduit le type de champ à partir du nom de la variable"""
-        var = variable.lower()
-        if any(k in var for k in ['email', 'e-mail', 'mail', 'courriel']):
-            return 'email'
-        if any(k in var for k in ['date', 'jour', 'naissance']):
-            return 'date'
-        if any(k in var for k in ['montant', 'prix', 'total', 'nombre', 'quantite',
-                                   'numero', 'numéro', 'num', 'téléphone', 'telephone',
-                                   'tel', 'age', 'âge', 'salaire', 'taux', 'pourcentage']):
-            return 'number'
-        # Par défaut : texte (nom, prenom, adresse, ville, etc.)
-        return 'text'
+        return infer_type(variable)
 
     @action(detail=True, methods=['get'])
+    @cache_response
     def formulaires(self, request, pk=None):
         """Récupération de tous les formulaires d'un template"""
         template = self.get_object()
@@ -176,20 +228,94 @@ class TemplateDocumentViewSet(viewsets.GenericViewSet,
         serializer = FormulaireSerializer(formulaires, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
+    def importer(self, request):
+        """Import en masse de templates depuis une archive ZIP (voir ingestion.py)"""
+        serializer = TemplateArchiveSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            rapport = ingest_archive(
+                serializer.validated_data['archive'],
+                categorie=serializer.validated_data.get('categorie'),
+                actif=serializer.validated_data['actif'],
+            )
+        except IngestionError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        code = status.HTTP_201_CREATED if rapport['crees'] else status.HTTP_400_BAD_REQUEST
+        return Response(rapport, status=code)
+
+    @action(detail=True, methods=['get'])
+    @cache_response
+    def variables(self, request, pk=None):
+        """Variables du fichier du template et leurs emplacements (partie XML, numéro de paragraphe)"""
+        template = self.get_object()
+        if not template.fichier.name.lower().endswith('.docx'):
+            return Response(
+                {"error": "Seuls les templates .docx peuvent être analysés"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        with template.fichier.open('rb') as fichier:
+            result = scan_docx(fichier)
+        return Response([
+            {
+                'variable': variable,
+                'emplacements': [
+                    {'partie': partie, 'paragraphe': paragraphe}
+                    for partie, paragraphe in result.locations[variable]
+                ],
+            }
+            for variable in result.variables
+        ])
+
+    @action(detail=False, methods=['get'])
+    def couverture(self, request):
+        """
+        Templates classés selon le nombre de variables demandées qu'ils utilisent.
+        ?variables=nom,prenom,date_naissance
+        """
+        variables = [v for v in request.query_params.get('variables', '').split(',') if v.strip()]
+        if not variables:
+            return Response(
+                {"error": "Paramètre 'variables' requis (liste séparée par des virgules)"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        classement = rank_templates(variables, queryset=self.get_queryset())
+        return Response([
+            {
+                'template': c['template_id'],
+                'nom': c['template__nom'],
+                'variables_couvertes': c['couvertes'],
+                'variables_template': c['total'],
+                'taux': round(c['couvertes'] / c['total'], 4),
+            }
+            for c in classement
+        ])
+
     @action(detail=False, methods=['get'])
+    @cache_response
     def actifs(self, request):
         """Récupération des templates actifs"""
         templates = self.queryset.filter(status=True)
         serializer = self.get_serializer(templates, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def cache_stats(self, request):
+        """Compteurs du cache des templates (processus courant)"""
+        return Response(template_cache.get_cache().stats())
 
-class FormulaireViewSet(viewsets.GenericViewSet,
+
+class FormulaireViewSet(CatalogueCacheMixin,
+                        DeltaSyncMixin,
+                        viewsets.GenericViewSet,
                         viewsets.mixins.ListModelMixin,
                         viewsets.mixins.RetrieveModelMixin,
                         viewsets.mixins.CreateModelMixin):
 
-    queryset = Formulaire.objects.select_related('template').prefetch_related('questions')
+    queryset = Formulaire.objects.select_related('template').prefetch_related(questions_prefetch())
+    sync_modele = Suppression.FORMULAIRE
     serializer_class = FormulaireSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['template']
@@ -198,12 +324,14 @@ class FormulaireViewSet(viewsets.GenericViewSet,
     ordering = ['-date_add']
 
 
-class QuestionViewSet(viewsets.GenericViewSet,
+class QuestionViewSet(DeltaSyncMixin,
+                      viewsets.GenericViewSet,
                       viewsets.mixins.ListModelMixin,
                       viewsets.mixins.RetrieveModelMixin,
                       viewsets.mixins.CreateModelMixin):
 
-    queryset = Question.objects.select_related('formulaire')
+    queryset = Question.objects.select_related('formulaire').prefetch_related('choix')
+    sync_modele = Suppression.QUESTION
     serializer_class = QuestionSerializer
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['formulaire', 'type_champ', 'obligatoire']
@@ -223,7 +351,8 @@ class TypeDocumentViewSet(viewsets.GenericViewSet,
     ordering = ['nom']
 
 class DocumentGenereViewSet(viewsets.ModelViewSet):
-    queryset = DocumentGenere.objects.select_related('template', 'user').order_by('-date_generation')
+    queryset = DocumentGenere.objects.select_related('template', 'user').order_by('-date_generation', '-id')
+    pagination_class = KeysetPagination
 
     def get_serializer_class(self):
         """Définit quel serializer utiliser selon l'action"""
@@ -233,141 +362,64 @@ class DocumentGenereViewSet(viewsets.ModelViewSet):
             return DocumentGenereDetailSerializer
         return DocumentGenereListSerializer
 
-    def _replace_text_in_docx(self, doc, replacements):
-        """
-        Remplace les variables dans le document Word.
-        AMÉLIORÉ : Gère plusieurs formats de variables et le fractionnement des runs.
-        """
-        def replace_in_text(text, replacements):
-            """Fonction utilitaire pour remplacer dans un texte"""
-            for var, val in replacements.items():
-                # Support de plusieurs formats : {VAR}, {{VAR}}
-                patterns = [
-                    f"{{{var}}}",           # {Prénom & Nom du candidat}
-                    f"{{{{{var}}}}}",       # {{Prénom & Nom du candidat}}
-                ]
-                for pattern in patterns:
-                    if pattern in text:
-                        text = text.replace(pattern, str(val))
-            return text
-
-        def process_paragraphs(paragraphs):
-            """Traite les paragraphes en gérant le fractionnement des runs"""
-            for paragraph in paragraphs:
-                # 1. Récupérer le texte complet du paragraphe
-                full_text = paragraph.text
-                
-                # 2. Effectuer les remplacements
-                new_text = replace_in_text(full_text, replacements)
-                
-                # 3. Si des changements ont été effectués
-                if new_text != full_text:
-                    # Vider tous les runs sauf le premier
-                    if paragraph.runs:
-                        paragraph.runs[0].text = new_text
-                        for i in range(1, len(paragraph.runs)):
-                            paragraph.runs[i].text = ""
-
-        # Traiter les paragraphes principaux
-        process_paragraphs(doc.paragraphs)
-        
-        # Traiter les tableaux
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    process_paragraphs(cell.paragraphs)
+    def _async_requested(self, request):
+        """Génération asynchrone si activée dans les settings ou demandée avec ?async=1"""
+        flag = request.query_params.get('async', '').lower()
+        return get_setting('ASYNC') or flag in ('1', 'true', 'yes')
+
+    def _detail_data(self, document):
+        """Détail du document, réponses et questions chargées en une requête"""
+        prefetch_related_objects(
+            [document],
+            Prefetch('reponses', queryset=ReponseQuestion.objects.select_related('question'))
+        )
+        return DocumentGenereDetailSerializer(document).data
+
+    # Colonnes qui déterminent les représentations détail et statut d'un document
+    ETAG_FIELDS = ('status', 'tentatives', 'fichier', 'derniere_erreur', 'empreinte')
+
+    def _etag(self, pk, valeurs):
+        # Le détail contient aussi le template et les libellés des questions
+        version = catalogue.get_version() if self.action == 'retrieve' else None
+        # Fichier absent : None pour values_list, FieldFile vide pour l'instance
+        return make_etag(self.action, pk, version, *(valeur or '' for valeur in valeurs))
 
-    def _generer_fichier(self, document_obj, reponses_data):
+    def _document_etag(self, document):
+        return self._etag(document.pk, [getattr(document, field) for field in self.ETAG_FIELDS])
+
+    def _not_modified(self, request, pk):
         """
-        Génère le fichier final (DOCX ou PDF) en remplaçant les variables.
-        AMÉLIORÉ : Meilleur logging et gestion des erreurs.
+        Réponse 304 si le client a déjà la représentation courante, calculée
+        à partir de quelques colonnes sans charger les relations ni sérialiser
+        le document. Les permissions sur l'objet sont vérifiées comme par
+        get_object() : un ETag ne renseigne pas sur un document inaccessible.
         """
+        if not request.headers.get('If-None-Match'):
+            return None
+        queryset = (
+            self.filter_queryset(self.get_queryset())
+            .select_related(None)
+            .only('user', *self.ETAG_FIELDS)
+        )
         try:
-            if not document_obj.template.fichier:
-                print("[ERREUR] Aucun fichier template trouve")
-                return False
-
-            if not os.path.exists(document_obj.template.fichier.path):
-                print("[ERREUR] Fichier template introuvable sur le disque")
-                return False
-
-            # Ouvrir le document Word template
-            doc = Document(document_obj.template.fichier.path)
-            print(f"[OK] Template charge : {document_obj.template.fichier.path}")
-            
-            # Construction du dictionnaire de remplacement
-            replacements = {}
-            for r in reponses_data:
-                try:
-                    question = Question.objects.get(id=r['question'])
-                    valeur = r['valeur']
-                    
-                    # Utiliser le label original (tel qu'il apparaît dans le fichier)
-                    replacements[question.label] = valeur
-                    # Aussi ajouter le slug au cas où le template utilise ce format
-                    replacements[question.variable] = valeur
-                    print(f"[MAP] {{{question.label}}} -> {valeur}")
-                    
-                except Question.DoesNotExist:
-                    print(f"[WARN] Question ID {r['question']} non trouvee")
-                    continue
-
-            # DEBUG : Afficher toutes les variables trouvées dans le document
-            all_text = "\n".join([p.text for p in doc.paragraphs])
-            variables_in_doc = re.findall(r'\{([^}]+)\}', all_text)
-            print(f"[DEBUG] Variables detectees dans le template : {set(variables_in_doc)}")
-            print(f"[DEBUG] Variables a remplacer : {list(replacements.keys())}")
-
-            # Effectuer les remplacements
-            self._replace_text_in_docx(doc, replacements)
-            print("[OK] Remplacements effectues")
-
-            # Sauvegarder dans un dossier temporaire
-            with tempfile.TemporaryDirectory() as tmp_dir:
-                temp_docx = os.path.join(tmp_dir, 'out.docx')
-                doc.save(temp_docx)
-                print(f"[OK] Document temporaire sauvegarde : {temp_docx}")
-
-                ext = 'pdf' if document_obj.format == 'pdf' else 'docx'
-                final_name = f"document_{document_obj.id}.{ext}"
-                final_path = temp_docx
-
-                # Conversion en PDF si nécessaire
-                if document_obj.format == 'pdf':
-                    final_path = os.path.join(tmp_dir, 'out.pdf')
-                    print("[INFO] Conversion en PDF...")
-                    
-                    if platform.system() == 'Windows':
-                        pythoncom.CoInitialize()
-                        try:
-                            convert(temp_docx, final_path)
-                        finally:
-                            pythoncom.CoUninitialize()
-                    else:
-                        subprocess.run([
-                            'libreoffice', '--headless', '--convert-to', 'pdf', 
-                            '--outdir', tmp_dir, temp_docx
-                        ], check=True)
-                    
-                    print("[OK] Conversion PDF reussie")
-
-                # Sauvegarder le fichier final
-                with open(final_path, 'rb') as f:
-                    document_obj.fichier.save(final_name, ContentFile(f.read()), save=False)
-                
-                print(f"[OK] Fichier final sauvegarde : {final_name}")
-            
-            document_obj.status = 'done'
-            document_obj.save()
-            return True
-            
-        except Exception as e:
-            print(f"[ERREUR] Erreur generation : {e}")
-            import traceback
-            traceback.print_exc()
-            document_obj.status = 'error'
-            document_obj.save()
-            return False
+            document = queryset.filter(pk=pk).first()
+        except (ValueError, TypeError):
+            return None
+        if document is None:
+            return None
+        self.check_object_permissions(request, document)
+        etag = self._document_etag(document)
+        if is_not_modified(request, etag):
+            return not_modified(etag)
+        return None
+
+    def retrieve(self, request, *args, **kwargs):
+        """Détail d'un document (304 si inchangé)"""
+        response = self._not_modified(request, kwargs['pk'])
+        if response is not None:
+            return response
+        document = self.get_object()
+        return set_validators(Response(self._detail_data(document)), self._document_etag(document))
 
     def create(self, request, *args, **kwargs):
         """Crée un nouveau document généré"""
@@ -387,14 +439,32 @@ class DocumentGenereViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # 2. Récupérer les réponses déjà créées par le serializer
         reponses_data = request.data.get('reponses', [])
+
+        # 2. Document identique déjà généré : on réutilise son fichier
+        document.empreinte = document_fingerprint(document.template, document.format, reponses_data)
+        document.save(update_fields=['empreinte'])
+        if reuse_existing(document):
+            return Response(
+                self._detail_data(document),
+                status=status.HTTP_201_CREATED
+            )
+
+        # 3. Mode asynchrone : le worker generation_worker produira le fichier
+        if self._async_requested(request):
+            enqueue_document(document)
+            return Response(
+                self._detail_data(document),
+                status=status.HTTP_202_ACCEPTED
+            )
+
+        # 4. Réponses déjà créées par le serializer
         print(f"[INFO] Nombre de reponses : {len(reponses_data)}")
 
-        # 3. Générer le fichier
-        if self._generer_fichier(document, reponses_data):
+        # 5. Générer le fichier
+        if generer_fichier(document, reponses_data):
             return Response(
-                DocumentGenereDetailSerializer(document).data, 
+                self._detail_data(document),
                 status=status.HTTP_201_CREATED
             )
         return Response(
@@ -402,17 +472,59 @@ class DocumentGenereViewSet(viewsets.ModelViewSet):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """
+        Génération par lot : un document par ligne de réponses (JSON ou CSV).
+        POST /api/documents/documents/batch/
+        """
+        serializer = DocumentBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        template = serializer.validated_data['template']
+
+        if not template.fichier or not os.path.exists(template.fichier.path):
+            return Response(
+                {"error": "Fichier template introuvable. Veuillez recharger le template."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        user = request.user if request.user and request.user.is_authenticated else None
+        resultats = generate_batch(
+            template,
+            serializer.validated_data['format'],
+            serializer.validated_data['lignes'],
+            user=user,
+            asynchrone=self._async_requested(request),
+        )
+
+        reussis = sum(1 for r in resultats if r['status'] != 'error')
+        if not reussis:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif any(r['status'] == 'pending' for r in resultats):
+            # Mis en file d'attente (?async=1, ou lot trop long pour la requête)
+            response_status = status.HTTP_202_ACCEPTED
+        else:
+            response_status = status.HTTP_201_CREATED
+        return Response({
+            'template': template.id,
+            'format': serializer.validated_data['format'],
+            'total': len(resultats),
+            'reussis': reussis,
+            'echecs': len(resultats) - reussis,
+            'resultats': resultats,
+        }, status=response_status)
+
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def history(self, request):
-        """Historique des documents générés de l'utilisateur connecté."""
+        """Historique des documents générés de l'utilisateur connecté (paginé par curseur)."""
         documents = (
             DocumentGenere.objects
             .filter(user=request.user)
             .select_related('template')
-            .order_by('-date_generation')
         )
-        serializer = DocumentGenereListSerializer(documents, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(documents)
+        serializer = DocumentGenereListSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def recent(self, request):
@@ -421,11 +533,26 @@ class DocumentGenereViewSet(viewsets.ModelViewSet):
             DocumentGenere.objects
             .filter(user=request.user)
             .select_related('template')
-            .order_by('-date_generation')[:5]
+            .order_by('-date_generation', '-id')[:5]
         )
         serializer = DocumentGenereListSerializer(documents, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'])
+    def statut(self, request, pk=None):
+        """Suivi léger de la génération (utile en mode asynchrone, 304 si inchangé)"""
+        response = self._not_modified(request, pk)
+        if response is not None:
+            return response
+        document = self.get_object()
+        return set_validators(Response({
+            'id': document.id,
+            'status': document.status,
+            'tentatives': document.tentatives,
+            'erreur': document.derniere_erreur or None,
+            'fichier': document.fichier.url if document.fichier else None,
+        }), self._document_etag(document))
+
     @action(detail=True, methods=['get'])
     def download(self, request, pk=None):
         """Télécharge un document généré"""
@@ -445,6 +572,6 @@ class ReponseQuestionViewSet(viewsets.GenericViewSet,
 
     queryset = ReponseQuestion.objects.select_related('document', 'question')
     serializer_class = ReponseQuestionSerializer
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
-    filterset_fields = ['document', 'question']
-    ordering = ['date_add']
\ No newline at end of file
+    pagination_class = ReponseKeysetPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['document', 'question']
\ No newline at end of file
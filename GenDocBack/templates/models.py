@@ -59,6 +59,9 @@ class Template(TimeStampedModel):
     @property
     def current_version(self):
         """Retourne la dernière version active du template."""
+        # Versions actives préchargées (Prefetch(..., to_attr='active_versions'))
+        if hasattr(self, 'active_versions'):
+            return self.active_versions[0] if self.active_versions else None
         return self.versions.filter(is_active=True).order_by('-version_number').first()
 
 class TemplateVersion(TimeStampedModel):
@@ -14,6 +14,9 @@ class CategorySerializer(serializers.ModelSerializer):
     
     @extend_schema_field(serializers.IntegerField)
     def get_subcategories_count(self, obj):
+        # Annoté par CategoryViewSet.queryset (évite un COUNT par catégorie)
+        if hasattr(obj, 'subcategories_count'):
+            return obj.subcategories_count
         return obj.subcategories.count()
 
 
@@ -65,6 +68,8 @@ class TemplateSerializer(serializers.ModelSerializer):
     
     @extend_schema_field(serializers.IntegerField)
     def get_versions_count(self, obj):
+        if hasattr(obj, 'versions_count'):
+            return obj.versions_count
         return obj.versions.count()
 
 
@@ -80,8 +85,11 @@ class TemplateListSerializer(serializers.ModelSerializer):
             'engine', 'is_active', 'current_version_number', 'created_at'
         ]
         read_only_fields = ['uuid', 'created_at']
+
     @extend_schema_field(serializers.IntegerField(allow_null=True))
-    
     def get_current_version_number(self, obj):
+        # Annoté par TemplateViewSet (sous-requête) pour la liste
+        if hasattr(obj, 'current_version_number'):
+            return obj.current_version_number
         version = obj.current_version
         return version.version_number if version else None
@@ -1,3 +1,65 @@
-from django.test import TestCase
+"""
+Tests des API du catalogue de templates.
+Les listes doivent garder un nombre de requêtes constant quand le catalogue grandit.
+"""
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from document.testing import LOCAL_CACHES
+
+from .models import Category, Template, TemplateVersion
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class CatalogueQueriesTestCase(TestCase):
+    """Nombre de requêtes des listes du catalogue."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.racine = Category.objects.create(name='Racine', slug='racine')
+
+    def _add_templates(self, nombre):
+        for _ in range(nombre):
+            index = Category.objects.count()
+            category = Category.objects.create(name=f'Cat {index}', slug=f'cat-{index}', parent=self.racine)
+            Category.objects.create(name=f'Sous {index}', slug=f'sous-{index}', parent=category)
+            template = Template.objects.create(title=f'Template {index}', category=category, description='-')
+            for version in (1, 2):
+                TemplateVersion.objects.create(
+                    template=template, version_number=version,
+                    source_file='templates/sources/test.docx', change_log='-'
+                )
+
+    def _count(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+    def _assert_constant(self, url):
+        self._add_templates(2)
+        small, _ = self._count(url)
+        self._add_templates(10)
+        large, response = self._count(url)
+        self.assertEqual(small, large)
+        return response
+
+    def test_category_list(self):
+        response = self._assert_constant('/api/templates/categories/')
+        racine = next(c for c in response.data['results'] if c['slug'] == 'racine')
+        self.assertEqual(racine['subcategories_count'], 12)
+
+    def test_template_list(self):
+        response = self._assert_constant('/api/templates/templates/')
+        self.assertEqual({t['current_version_number'] for t in response.data['results']}, {2})
+
+    def test_template_detail(self):
+        self._add_templates(1)
+        template = Template.objects.get()
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/templates/templates/{template.id}/')
+        self.assertEqual(response.data['versions_count'], 2)
+        self.assertEqual(response.data['current_version']['version_number'], 2)
@@ -1,3 +1,4 @@
+from django.db.models import Count, OuterRef, Prefetch, Subquery
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -22,7 +23,7 @@ class CategoryViewSet(viewsets.ModelViewSet):
     - update: Modifier une catégorie (admin)
     - delete: Supprimer une catégorie (admin)
     """
-    queryset = Category.objects.all()
+    queryset = Category.objects.annotate(subcategories_count=Count('subcategories'))
     serializer_class = CategorySerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
@@ -48,6 +49,25 @@ class TemplateViewSet(viewsets.ModelViewSet):
     ordering_fields = ['title', 'created_at']
     ordering = ['-created_at']
     
+    def get_queryset(self):
+        queryset = super().get_queryset().select_related('category')
+        if self.action == 'list':
+            # Numéro de la version courante calculé par sous-requête
+            current = (
+                TemplateVersion.objects
+                .filter(template=OuterRef('pk'), is_active=True)
+                .order_by('-version_number')
+                .values('version_number')[:1]
+            )
+            return queryset.annotate(current_version_number=Subquery(current))
+        return queryset.annotate(versions_count=Count('versions')).prefetch_related(
+            Prefetch(
+                'versions',
+                queryset=TemplateVersion.objects.filter(is_active=True).order_by('-version_number'),
+                to_attr='active_versions'
+            )
+        )
+
     def get_serializer_class(self):
         if self.action == 'list':
             return TemplateListSerializer
@@ -74,6 +74,14 @@ export interface PaginatedResponse<T> {
   results: T[];
 }
 
+// Pagination par curseur (documents générés, historique, réponses)
+export interface CursorPage<T> {
+  next: string | null;
+  previous: string | null;
+  count?: number; // Seulement avec ?count=1
+  results: T[];
+}
+
 export interface DocumentHistory {
   id: number;
   template: number;
@@ -1,7 +1,8 @@
 import { Injectable, inject } from '@angular/core';
-import { Observable } from 'rxjs';
+import { EMPTY, Observable } from 'rxjs';
+import { expand, reduce } from 'rxjs/operators';
 import { ApiService } from './api.service';
-import { DocumentGenere, DocumentHistory, PaginatedResponse } from '../models/document.model';
+import { DocumentGenere, DocumentHistory, CursorPage } from '../models/document.model';
 
 @Injectable({
   providedIn: 'root'
@@ -10,12 +11,8 @@ export class DocumentGenereService {
   private readonly apiService = inject(ApiService);
   private readonly endpoint = 'documents/documents/';
 
-  getDocuments(page: number = 1, statut?: string): Observable<PaginatedResponse<DocumentGenere>> {
-    let url = `${this.endpoint}?page=${page}`;
-    if (statut) {
-      url += `&statut=${statut}`;
-    }
-    return this.apiService.get<PaginatedResponse<DocumentGenere>>(url);
+  getDocuments(next?: string | null): Observable<CursorPage<DocumentGenere>> {
+    return this.apiService.get<CursorPage<DocumentGenere>>(`${this.endpoint}${this.cursorQuery(next)}`);
   }
 
   getDocument(id: number): Observable<DocumentGenere> {
@@ -44,7 +41,20 @@ export class DocumentGenereService {
 
   // Historique des documents de l'utilisateur connecté
   getUserHistory(): Observable<DocumentHistory[]> {
-    return this.apiService.get<DocumentHistory[]>(`${this.endpoint}history/`);
+    return this.getHistoryPage().pipe(
+      expand((page) => (page.next ? this.getHistoryPage(page.next) : EMPTY)),
+      reduce((documents, page) => documents.concat(page.results), [] as DocumentHistory[])
+    );
+  }
+
+  // Une page de l'historique (next : lien renvoyé par la page précédente)
+  getHistoryPage(next?: string | null): Observable<CursorPage<DocumentHistory>> {
+    return this.apiService.get<CursorPage<DocumentHistory>>(`${this.endpoint}history/${this.cursorQuery(next)}`);
+  }
+
+  private cursorQuery(next?: string | null): string {
+    const cursor = next ? new URL(next).searchParams.get('cursor') : null;
+    return cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
   }
 
   // CORRIGÉ : Utiliser downloadFile au lieu de get
@@ -1,7 +1,7 @@
 import { Injectable, inject } from '@angular/core';
 import { Observable } from 'rxjs';
 import { ApiService } from './api.service';
-import { ReponseQuestion, PaginatedResponse } from '../models/document.model';
+import { ReponseQuestion, CursorPage } from '../models/document.model';
 
 @Injectable({
   providedIn: 'root'
@@ -10,12 +10,18 @@ export class ReponseService {
   private readonly apiService = inject(ApiService);
   private readonly endpoint = 'documents/reponses/';
 
-  getReponses(page: number = 1, documentId?: number): Observable<PaginatedResponse<ReponseQuestion>> {
-    let url = `${this.endpoint}?page=${page}`;
+  // next : lien renvoyé par la page précédente (pagination par curseur)
+  getReponses(next?: string | null, documentId?: number): Observable<CursorPage<ReponseQuestion>> {
+    const params = new URLSearchParams();
+    const cursor = next ? new URL(next).searchParams.get('cursor') : null;
+    if (cursor) {
+      params.set('cursor', cursor);
+    }
     if (documentId) {
-      url += `&document_genere=${documentId}`;
+      params.set('document', String(documentId));
     }
-    return this.apiService.get<PaginatedResponse<ReponseQuestion>>(url);
+    const query = params.toString();
+    return this.apiService.get<CursorPage<ReponseQuestion>>(`${this.endpoint}${query ? '?' + query : ''}`);
   }
 
   getReponse(id: number): Observable<ReponseQuestion> {